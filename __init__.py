@@ -5,15 +5,20 @@ from .nodes.stability_image_sd3 import StabilityImageSD3
 from .nodes.stability_upscale_fast import StabilityUpscaleFast
 from .nodes.stability_upscale_conservative import StabilityUpscaleConservative
 from .nodes.stability_upscale_creative import StabilityUpscaleCreative
+from .nodes.stability_upscale_tiled import StabilityUpscaleTiled
 from .nodes.stability_edit import StabilityEdit
 from .nodes.stability_image_to_video import StabilityImageToVideo
 from .nodes.stability_control_sketch import StabilityControlSketch
 from .nodes.stability_control_structure import StabilityControlStructure
 from .nodes.stability_control_style import StabilityControlStyle
+from .nodes.stability_seed_sweep import StabilitySeedSweep
 from .nodes.stability_fast_3d import StableFast3D
 from .nodes.stability_point_aware_3d import StablePointAware3D
 from .nodes.save_3d_model import Save3DModel
+from .nodes.decimate_3d_model import Decimate3DModel
 from .nodes.preview_3d_model import Preview3DModel
+from .metrics import register_metrics_route
+from .preview_server import register_preview_route
 
 
 NODE_CLASS_MAPPINGS = {
@@ -23,15 +28,18 @@ NODE_CLASS_MAPPINGS = {
     "StabilityUpscaleFast": StabilityUpscaleFast,
     "StabilityUpscaleConservative": StabilityUpscaleConservative,
     "StabilityUpscaleCreative": StabilityUpscaleCreative,
+    "StabilityUpscaleTiled": StabilityUpscaleTiled,
     "StabilityEdit": StabilityEdit,
     "StabilityImageToVideo": StabilityImageToVideo,
     "StabilityControlSketch": StabilityControlSketch,
     "StabilityControlStructure": StabilityControlStructure,
     "StabilityControlStyle": StabilityControlStyle,
-    # "StableFast3D": StableFast3D,
-    # "StablePointAware3D": StablePointAware3D,
-    # "Save3DModel": Save3DModel,
-    # "Preview3DModel": Preview3DModel,
+    "StabilitySeedSweep": StabilitySeedSweep,
+    "StableFast3D": StableFast3D,
+    "StablePointAware3D": StablePointAware3D,
+    "Save3DModel": Save3DModel,
+    "Decimate3DModel": Decimate3DModel,
+    "Preview3DModel": Preview3DModel,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -41,15 +49,26 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "StabilityUpscaleFast": "Stability Fast Upscaler",
     "StabilityUpscaleConservative": "Stability Conservative Upscaler",
     "StabilityUpscaleCreative": "Stability Creative Upscaler",
+    "StabilityUpscaleTiled": "Stability Tiled Upscaler",
     "StabilityEdit": "Stability Image Editor",
     "StabilityImageToVideo": "Stability Image to Video",
     "StabilityControlSketch": "Stability Sketch Control",
     "StabilityControlStructure": "Stability Structure Control",
     "StabilityControlStyle": "Stability Style Control",
-    # "StableFast3D": "Stability Fast 3D Generation",
-    # "StablePointAware3D": "Stability Point Aware 3D",
-    # "Save3DModel": "Save 3D Model",
-    # "Preview3DModel": "Preview 3D Model", 
+    "StabilitySeedSweep": "Stability Seed Sweep",
+    "StableFast3D": "Stability Fast 3D Generation",
+    "StablePointAware3D": "Stability Point Aware 3D",
+    "Save3DModel": "Save 3D Model",
+    "Decimate3DModel": "Decimate 3D Model",
+    "Preview3DModel": "Preview 3D Model",
 }
 
-__all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
\ No newline at end of file
+# Prometheus text endpoint with phase timings of API calls (ComfyUI server only)
+register_metrics_route()
+# Preview files for the 3D model viewer
+register_preview_route()
+
+# Front-end extensions (the 3D preview dialog)
+WEB_DIRECTORY = "./js"
+
+__all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS', 'WEB_DIRECTORY']
\ No newline at end of file
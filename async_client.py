@@ -0,0 +1,239 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Union, Coroutine, TypeVar, List, Iterable, Tuple
+import requests
+import torch
+from PIL import Image
+
+from .api_client import StabilityAPIClient
+from .downloads import SpooledBody
+from .config_manager import ConfigManager
+from .polling import get_poller
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the shared worker pool used for blocking HTTP and codec work
+
+    The pool size is read from [network] max_workers in config.ini.
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=ConfigManager().get_int("network", "max_workers", 16),
+                    thread_name_prefix="stability-io",
+                )
+    return _executor
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the background event loop that runs all Stability API coroutines
+
+    The loop lives in a daemon thread and is started on first use, so it is
+    independent of whichever thread ComfyUI executes nodes on.
+    """
+    global _loop, _loop_thread
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="stability-event-loop",
+                    daemon=True,
+                )
+                thread.start()
+                _loop, _loop_thread = loop, thread
+    return _loop
+
+
+async def gather_limited(coros: Iterable[Coroutine[Any, Any, T]], limit: int) -> List[T]:
+    """Await coroutines concurrently with at most `limit` running at once
+
+    Results are returned in input order. If any coroutine fails, the others
+    are cancelled and the first exception is raised.
+
+    Parameters:
+    -----------
+    coros : Iterable[Coroutine]
+        Coroutines to run
+    limit : int
+        Maximum number of coroutines in flight
+
+    Returns:
+    --------
+    List[Any]
+        Results in input order
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    tasks = [asyncio.ensure_future(run(coro)) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the background event loop and wait for its result
+
+    This is the sync facade used by node FUNCTIONs: the calling thread blocks,
+    while the coroutine (and any others submitted concurrently) make progress
+    on the shared loop.
+
+    Parameters:
+    -----------
+    coro : Coroutine
+        Coroutine to run
+
+    Returns:
+    --------
+    Any
+        Result of the coroutine
+    """
+    loop = get_event_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the Stability event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+class AsyncStabilityAPIClient:
+    """
+    Asyncio variant of StabilityAPIClient
+
+    Requests go through the wrapped StabilityAPIClient (and therefore the same
+    pooled session) on the shared worker pool, while waiting between polls is
+    done with asyncio.sleep so no thread is held while a generation is pending.
+    """
+    def __init__(self, client: StabilityAPIClient):
+        """Initialize the client
+
+        Parameters:
+        -----------
+        client : StabilityAPIClient
+            Synchronous client used for the underlying transport
+        """
+        self.client = client
+
+    @property
+    def api_key(self) -> str:
+        return self.client.api_key
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking callable on the shared worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+    async def request(self,
+                      method: str,
+                      endpoint: str,
+                      data: Optional[Dict[str, Any]] = None,
+                      files: Optional[Dict[str, Any]] = None,
+                      headers: Optional[Dict[str, str]] = None,
+                      stream: bool = False) -> requests.Response:
+        """Make an API request without blocking the event loop
+
+        Parameters are the same as StabilityAPIClient._make_request.
+
+        Returns:
+        --------
+        requests.Response
+            API response
+        """
+        return await self._run_blocking(
+            self.client._make_request, method, endpoint, data=data, files=files, headers=headers, stream=stream
+        )
+
+    async def poll(self,
+                   endpoint: str,
+                   headers: Optional[Dict[str, str]] = None,
+                   timeout: float = 300.0,
+                   stream: bool = False) -> requests.Response:
+        """Wait for an asynchronous generation without holding a thread
+
+        Polling is done by the shared GenerationPoller, which multiplexes every
+        outstanding generation on one scheduler thread with adaptive intervals.
+
+        Parameters:
+        -----------
+        endpoint : str
+            Result endpoint, e.g. /v2beta/results/{id}
+        headers : dict, optional
+            Additional headers
+        timeout : float
+            Maximum seconds to wait for the result
+        stream : bool
+            Request the final result as a streamed response
+
+        Returns:
+        --------
+        requests.Response
+            The first response with status 200
+        """
+        future = get_poller().submit(self.client, endpoint, headers, timeout, stream)
+        return await asyncio.wrap_future(future)
+
+    async def download(self,
+                       endpoint: str,
+                       headers: Optional[Dict[str, str]] = None) -> bytes:
+        """Download a response body
+
+        Parameters:
+        -----------
+        endpoint : str
+            API endpoint
+        headers : dict, optional
+            Additional headers
+
+        Returns:
+        --------
+        bytes
+            Response body
+        """
+        response = await self.request("GET", endpoint, headers=dict(headers or {}))
+        return response.content
+
+    async def download_body(self, response: requests.Response) -> SpooledBody:
+        """Read a streamed response body on the worker pool (see StabilityAPIClient.download_body)"""
+        return await self._run_blocking(self.client.download_body, response)
+
+    async def save_response(self, response: requests.Response, path: str) -> int:
+        """Stream a response body to a file on the worker pool (see StabilityAPIClient.save_response)"""
+        return await self._run_blocking(self.client.save_response, response, path)
+
+    async def image_to_bytes(self, image: Union[torch.Tensor, Image.Image], format: str = 'PNG') -> bytes:
+        """Encode an image on the worker pool (see StabilityAPIClient.image_to_bytes)"""
+        return await self._run_blocking(self.client.image_to_bytes, image, format)
+
+    async def encode_upload(self,
+                            image: Union[torch.Tensor, Image.Image],
+                            name: str = "image",
+                            lossless: bool = False) -> Tuple[str, bytes, str]:
+        """Encode an upload on the worker pool (see StabilityAPIClient.encode_upload)"""
+        return await self._run_blocking(self.client.encode_upload, image, name, lossless)
+
+    async def bytes_to_tensor(self, image_bytes: bytes) -> torch.Tensor:
+        """Decode an image on the worker pool (see StabilityAPIClient.bytes_to_tensor)"""
+        return await self._run_blocking(self.client.bytes_to_tensor, image_bytes)
+
+    async def bytes_to_tensor_batch(self, images_bytes: List[bytes]) -> torch.Tensor:
+        """Decode several images into one batch on the worker pool (see StabilityAPIClient.bytes_to_tensor_batch)"""
+        return await self._run_blocking(self.client.bytes_to_tensor_batch, images_bytes)
@@ -0,0 +1,31 @@
+import os
+import sys
+import types
+import importlib
+
+PACKAGE_NAME = "stability_api"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load(module: str):
+    """Import a module of this repository without running the ComfyUI node registration
+
+    The repository uses relative imports and a directory name that is not a
+    valid identifier, so it is mounted as an empty package named
+    `stability_api` and the requested submodule is imported from it.
+
+    Parameters:
+    -----------
+    module : str
+        Module name relative to the repository root, e.g. "image_codec"
+
+    Returns:
+    --------
+    module
+        The imported module
+    """
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [ROOT]
+        sys.modules[PACKAGE_NAME] = package
+    return importlib.import_module(f"{PACKAGE_NAME}.{module}")
@@ -0,0 +1,64 @@
+"""Compare upload codecs by encode time and payload size
+
+Usage:
+    python benchmarks/bench_encode.py [--sizes 1024x1024,3072x3072] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+from PIL import Image
+
+from _package import load
+
+image_codec = load("image_codec")
+
+# (label, codec, options)
+VARIANTS = [
+    ("png level 6 (PIL default)", "png", {"png_compress_level": 6}),
+    ("png level 1", "png", {"png_compress_level": 1}),
+    ("png level 0", "png", {"png_compress_level": 0}),
+    ("webp lossless method 0", "webp_lossless", {"webp_method": 0}),
+    ("webp lossless method 4", "webp_lossless", {"webp_method": 4}),
+    ("jpeg q95 4:4:4", "jpeg", {"jpeg_quality": 95}),
+    ("jpeg q85 4:4:4", "jpeg", {"jpeg_quality": 85}),
+]
+
+
+def synthetic_image(width: int, height: int, seed: int = 0) -> Image.Image:
+    """Create a photo-like test image: smooth gradients plus sensor-like noise"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([
+        128 + 100 * np.sin(x / width * 6.0),
+        128 + 100 * np.cos(y / height * 4.0),
+        128 + 100 * np.sin((x + y) / (width + height) * 9.0),
+    ], axis=-1)
+    noise = rng.normal(0, 6, size=base.shape)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8), mode="RGB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1024x1024,3072x3072",
+                        help="comma separated WIDTHxHEIGHT list (3072x3072 is the 9.4 MP edit/control limit)")
+    parser.add_argument("--repeat", type=int, default=3, help="encodes per variant; the fastest is reported")
+    args = parser.parse_args()
+
+    for size in args.sizes.split(","):
+        width, height = (int(v) for v in size.lower().split("x"))
+        image = synthetic_image(width, height)
+        print(f"\n{width}x{height} ({width * height / 1e6:.1f} MP)")
+        print(f"{'variant':<28}{'encode ms':>12}{'size MB':>10}{'< 10 MB':>9}")
+        for label, codec, options in VARIANTS:
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                data = image_codec.encode_image(image, codec, **options)
+                best = min(best, time.perf_counter() - start)
+            size_mb = len(data) / (1024 * 1024)
+            print(f"{label:<28}{best * 1000:>12.1f}{size_mb:>10.2f}{'yes' if size_mb < 10 else 'no':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""End-to-end node benchmarks against the local mock Stability API
+
+Scenarios:
+    latency     wall time of single node executions (median and best of --repeat)
+    throughput  seed sweep of --variants images at several concurrency levels
+    codec       upload encoding and result decoding cost per image size
+    memory      peak RSS of large-result scenarios, each in its own subprocess
+    connections TCP connections opened by sequential and concurrent requests;
+                fails if sequential requests (or, with pool_block, concurrent
+                ones) open more than [network] pool_maxsize
+
+The mock server (benchmarks/mock_server.py) runs in this process; memory
+scenarios run in child processes that use the same server, so payload
+generation is not counted in their peak RSS. By default the rate limiter,
+response cache and credit ledger are disabled and the poller starts checking
+after 0.5 s so the numbers reflect this package rather than those settings;
+override any setting with --set section.option=value.
+
+Usage:
+    python benchmarks/bench_nodes.py [--scenarios latency,throughput,codec,memory,connections]
+                                     [--latency 0.05] [--repeat 5] [--variants 16]
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import statistics
+import subprocess
+
+import torch
+
+from _package import load
+from mock_server import MockStabilityServer
+
+SCENARIOS = ("latency", "throughput", "codec", "memory", "connections")
+MEMORY_SCENARIOS = ("upscale_fast_batch4", "image_to_video", "fast_3d")
+
+DEFAULT_SETTINGS = [
+    "rate_limit.enabled=false",
+    "cache.enabled=false",
+    "credits.enabled=false",
+    "polling.first_delay=0.5",
+    "polling.min_interval=0.25",
+]
+
+
+def peak_rss_mb() -> float:
+    # On Linux ru_maxrss survives exec and may report the parent's peak; VmHWM does not
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def start_server(args) -> MockStabilityServer:
+    """Start the mock API and point the package at it (before any client is created)"""
+    server = MockStabilityServer(latency=args.latency, pending_polls=args.pending_polls,
+                                 error_rate=args.error_rate).start()
+    configure(server.base_url, args)
+    return server
+
+
+def configure(base_url: str, args) -> None:
+    """Point the package at the mock API and apply the setting overrides"""
+    os.environ["STABILITY_API_BASE_URL"] = base_url
+    config = load("config_manager").ConfigManager().config
+    for setting in DEFAULT_SETTINGS + (args.set or []):
+        key, value = setting.split("=", 1)
+        section, option = key.split(".", 1)
+        if not config.has_section(section):
+            config.add_section(section)
+        # In memory only; config.ini is not written
+        config.set(section, option, value)
+
+
+def node(module: str, name: str):
+    return getattr(load(f"nodes.{module}"), name)()
+
+
+def node_cases():
+    """(label, callable) pairs executing one node each"""
+    image_512 = torch.rand(1, 512, 512, 3)
+    image_768 = torch.rand(1, 768, 768, 3)
+    return [
+        ("core generate", lambda: node("stability_image_core", "StabilityImageCore").generate(
+            "a lighthouse", "1:1", seed=1, api_key="bench")),
+        ("fast upscale 512px", lambda: node("stability_upscale_fast", "StabilityUpscaleFast").upscale(
+            image_512, api_key="bench")),
+        ("creative upscale 512px", lambda: node("stability_upscale_creative", "StabilityUpscaleCreative").upscale(
+            image_512, "a lighthouse", seed=1, api_key="bench")),
+        ("image to video", lambda: node("stability_image_to_video", "StabilityImageToVideo").generate(
+            image_768, api_key="bench")),
+        ("fast 3d", lambda: node("stability_fast_3d", "StableFast3D").generate(image_512, api_key="bench")),
+        ("balance", lambda: load("api_client").StabilityAPIClient("bench").check_balance()),
+    ]
+
+
+def bench_latency(args, server: MockStabilityServer) -> None:
+    print(f"\nlatency (server latency {args.latency * 1000:.0f} ms, {args.pending_polls} pending polls)")
+    print(f"{'node':<26}{'median ms':>12}{'best ms':>10}{'requests':>10}")
+    for label, run in node_cases():
+        run()  # warm up imports, connections and payload caches
+        timings = []
+        before = server.requests
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        requests_per_run = (server.requests - before) / args.repeat
+        print(f"{label:<26}{statistics.median(timings) * 1000:>12.1f}{min(timings) * 1000:>10.1f}"
+              f"{requests_per_run:>10.1f}")
+
+
+def bench_throughput(args, server: MockStabilityServer) -> None:
+    sweep = node("stability_seed_sweep", "StabilitySeedSweep")
+    print(f"\nthroughput ({args.variants}-variant core seed sweep, server latency {args.latency * 1000:.0f} ms)")
+    print(f"{'concurrency':<14}{'wall s':>10}{'images/s':>10}")
+    # Warm up with the same seeds so every payload is already built by the mock server
+    sweep.generate("core", "a lighthouse", f"1-{args.variants}", max_concurrency=16, api_key="bench")
+    for concurrency in (1, 4, 8, 16):
+        start = time.perf_counter()
+        sweep.generate("core", "a lighthouse", f"1-{args.variants}", max_concurrency=concurrency, api_key="bench")
+        elapsed = time.perf_counter() - start
+        print(f"{concurrency:<14}{elapsed:>10.2f}{args.variants / elapsed:>10.1f}")
+
+
+def bench_codec(args, server: MockStabilityServer) -> None:
+    client = load("api_client").StabilityAPIClient("bench")
+    print("\ncodec (per image)")
+    print(f"{'size':<12}{'encode ms':>11}{'upload MB':>11}{'decode ms':>11}")
+    for size in (512, 1024, 2048):
+        image = torch.rand(1, size, size, 3)
+        encoded = server.payload("png", size, size, 0)
+        encode, decode = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            _, data, _ = client.encode_upload(image)
+            encode.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            client.bytes_to_tensor(encoded)
+            decode.append(time.perf_counter() - start)
+        print(f"{f'{size}x{size}':<12}{min(encode) * 1000:>11.1f}{len(data) / 2**20:>11.2f}"
+              f"{min(decode) * 1000:>11.1f}")
+
+
+def run_memory_child(scenario: str) -> None:
+    cases = {
+        "upscale_fast_batch4": lambda: node("stability_upscale_fast", "StabilityUpscaleFast").upscale(
+            torch.rand(4, 512, 512, 3), api_key="bench"),
+        "image_to_video": lambda: node("stability_image_to_video", "StabilityImageToVideo").generate(
+            torch.rand(1, 768, 768, 3), api_key="bench"),
+        "fast_3d": lambda: node("stability_fast_3d", "StableFast3D").generate(
+            torch.rand(1, 512, 512, 3), api_key="bench")[0][0].size,
+    }
+    # Import the modules before measuring
+    for module in ("api_client", "nodes.stability_upscale_fast", "nodes.stability_image_to_video",
+                   "nodes.stability_fast_3d"):
+        load(module)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    cases[scenario]()
+    print(f"{time.perf_counter() - start:.3f} {peak_rss_mb() - baseline:.1f}")
+
+
+def bench_memory(args, server: MockStabilityServer) -> None:
+    print("\npeak memory (each scenario in a fresh process)")
+    print(f"{'scenario':<24}{'wall s':>10}{'peak RSS +MB':>15}")
+    for scenario in MEMORY_SCENARIOS:
+        command = [sys.executable, __file__, "--memory-child", scenario, "--base-url", server.base_url]
+        for setting in args.set or []:
+            command += ["--set", setting]
+        output = subprocess.check_output(command, text=True).strip().splitlines()[-1]
+        elapsed, peak = output.split()
+        print(f"{scenario:<24}{float(elapsed):>10.2f}{float(peak):>15.1f}")
+
+
+def bench_connections(args, server: MockStabilityServer) -> None:
+    """Check that the pooled session reuses keep-alive connections"""
+    http_session = load("http_session")
+    config = load("config_manager").ConfigManager()
+    pool_maxsize = config.get_int("network", "pool_maxsize", 16)
+    # Without pool_block a concurrent burst may open extra connections that are not kept
+    pool_block = config.get_bool("network", "pool_block", False)
+    client = load("api_client").StabilityAPIClient("bench")
+    sweep = node("stability_seed_sweep", "StabilitySeedSweep")
+    runs = [
+        ("sequential", True, lambda: [client.check_balance() for _ in range(args.variants * 4)]),
+        ("concurrent", pool_block, lambda: sweep.generate("core", "a lighthouse", f"1-{args.variants}",
+                                                          max_concurrency=16, api_key="bench")),
+    ]
+    print(f"\nconnections (pool_maxsize {pool_maxsize})")
+    print(f"{'requests':<14}{'sent':>10}{'opened':>10}")
+    failures = []
+    for label, checked, run in runs:
+        # Start from an empty pool so every connection this run needs is counted
+        http_session.reset_session()
+        requests_before, connections_before = server.requests, server.connections
+        run()
+        sent = server.requests - requests_before
+        opened = server.connections - connections_before
+        print(f"{label:<14}{sent:>10}{opened:>10}")
+        if checked and opened > pool_maxsize:
+            failures.append(f"{label}: {opened} connections for {sent} requests")
+    if failures:
+        raise SystemExit(f"connections not reused within pool_maxsize {pool_maxsize}: {'; '.join(failures)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.05, help="mock server latency per response in seconds")
+    parser.add_argument("--pending-polls", type=int, default=2, help="202 answers before an async result is ready")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock requests that fail with 503")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement")
+    parser.add_argument("--variants", type=int, default=16, help="images in the throughput sweep")
+    parser.add_argument("--set", action="append", metavar="SECTION.OPTION=VALUE",
+                        help="override a config.ini setting in memory (repeatable)")
+    parser.add_argument("--memory-child", choices=MEMORY_SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.memory_child:
+        configure(args.base_url, args)
+        run_memory_child(args.memory_child)
+        return
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    server = start_server(args)
+    print(f"mock API at {server.base_url}; settings: {', '.join(DEFAULT_SETTINGS + (args.set or []))}")
+    try:
+        if "latency" in scenarios:
+            bench_latency(args, server)
+        if "throughput" in scenarios:
+            bench_throughput(args, server)
+        if "codec" in scenarios:
+            bench_codec(args, server)
+        if "memory" in scenarios:
+            bench_memory(args, server)
+        if "connections" in scenarios:
+            bench_connections(args, server)
+    finally:
+        server.stop()
+    if server.errors:
+        print(f"\n{server.errors} of {server.requests} mock requests failed by injection")
+
+
+if __name__ == "__main__":
+    main()
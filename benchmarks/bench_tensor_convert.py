@@ -0,0 +1,79 @@
+"""Compare tensor -> uint8 -> PIL conversion paths by time and peak memory
+
+Each variant runs in its own subprocess so that its peak RSS can be measured
+independently.
+
+Usage:
+    python benchmarks/bench_tensor_convert.py [--size 3840x2160] [--repeat 5]
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+from _package import load
+
+VARIANTS = ("legacy", "chunked")
+
+
+def legacy(image: torch.Tensor) -> Image.Image:
+    """Conversion as previously done by tensor_to_pil: two full-size temporaries, truncation"""
+    img_array = image.cpu().numpy()
+    img_array = (img_array * 255).astype(np.uint8)
+    return Image.fromarray(img_array)
+
+
+def chunked(image: torch.Tensor) -> Image.Image:
+    image_codec = load("image_codec")
+    return image_codec.uint8_to_pil(image_codec.tensor_to_uint8(image))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def run_child(variant: str, width: int, height: int, repeat: int) -> None:
+    convert = legacy if variant == "legacy" else chunked
+    image = torch.rand(height, width, 3)
+    convert(image[:8, :8])  # import and warm up outside the measurement
+    baseline = peak_rss_mb()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        convert(image)
+        best = min(best, time.perf_counter() - start)
+    print(f"{best * 1000:.1f} {peak_rss_mb() - baseline:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="3840x2160", help="WIDTHxHEIGHT of the float32 input")
+    parser.add_argument("--repeat", type=int, default=5, help="conversions per variant; the fastest is reported")
+    parser.add_argument("--child", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    if args.child:
+        run_child(args.child, width, height, args.repeat)
+        return
+
+    input_mb = width * height * 3 * 4 / (1024 * 1024)
+    print(f"{width}x{height} RGB float32 input ({input_mb:.0f} MB)")
+    print(f"{'variant':<10}{'time ms':>10}{'peak RSS +MB':>15}")
+    for variant in VARIANTS:
+        output = subprocess.check_output(
+            [sys.executable, __file__, "--child", variant, "--size", args.size, "--repeat", str(args.repeat)],
+            text=True)
+        elapsed, peak = output.split()
+        print(f"{variant:<10}{float(elapsed):>10.1f}{float(peak):>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""Local stand-in for the Stability AI API used by the benchmarks
+
+Serves the endpoints the nodes call with synthetic payloads:
+    POST /v2beta/stable-image/generate/*         image of the requested aspect ratio
+    POST /v2beta/stable-image/upscale/fast       input size x upscale_factor
+    POST /v2beta/stable-image/upscale/conservative
+    POST /v2beta/stable-image/upscale/creative   generation ID, result via /v2beta/results/{id}
+    POST /v2beta/stable-image/edit/*, control/*  input size
+    POST /v2beta/image-to-video                  generation ID, result via /v2beta/image-to-video/result/{id}
+    POST /v2beta/3d/*                            GLB mesh
+    GET  /v1/user/balance
+
+Latency, 202 polling sequences, error injection and payload sizes are
+configurable. Accepted TCP connections are counted in `connections`, so
+keep-alive reuse of the client's connection pool can be checked. Run standalone and point the package at it with
+STABILITY_API_BASE_URL=http://127.0.0.1:PORT.
+
+Usage:
+    python benchmarks/mock_server.py [--port 8123] [--latency 0.2] [--pending-polls 2] [--error-rate 0.1]
+"""
+import io
+import os
+import json
+import time
+import uuid
+import random
+import struct
+import argparse
+import tempfile
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional, Dict, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Output size of the generate endpoints per aspect ratio (about one megapixel)
+ASPECT_SIZES = {
+    "1:1": (1024, 1024), "16:9": (1344, 768), "21:9": (1536, 640), "2:3": (832, 1216), "3:2": (1216, 832),
+    "4:5": (896, 1088), "5:4": (1088, 896), "9:16": (768, 1344), "9:21": (640, 1536), "4:3": (1152, 896),
+    "3:4": (896, 1152),
+}
+
+
+def synthetic_png(width: int, height: int, seed: int = 0) -> bytes:
+    """Photo-like PNG (gradients plus noise) so payload sizes resemble real results"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 6.0, width, dtype=np.float32)
+    y = np.linspace(0, 4.0, height, dtype=np.float32)
+    base = np.empty((height, width, 3), dtype=np.float32)
+    base[..., 0] = 128 + 100 * np.sin(x)[None, :]
+    base[..., 1] = 128 + 100 * np.cos(y)[:, None]
+    base[..., 2] = 128 + 100 * np.sin(x[None, :] + y[:, None])
+    base += rng.standard_normal(size=base.shape, dtype=np.float32) * 6
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(base, 0, 255).astype(np.uint8), "RGB").save(buffer, "PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def synthetic_mp4(width: int, height: int, frames: int) -> bytes:
+    """MP4 clip with moving content, encoded with OpenCV"""
+    import cv2
+
+    handle, path = tempfile.mkstemp(suffix=".mp4")
+    os.close(handle)
+    try:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 24, (width, height))
+        gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+        for index in range(frames):
+            frame = np.broadcast_to((gradient + index * 8) % 256, (height, width, 3)).astype(np.uint8)
+            writer.write(frame)
+        writer.release()
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def synthetic_glb(grid: int) -> bytes:
+    """Binary glTF containing a grid x grid vertex height-field mesh"""
+    ys, xs = np.mgrid[0:grid, 0:grid].astype(np.float32) / max(1, grid - 1)
+    positions = np.stack([xs, np.sin(xs * 6) * np.cos(ys * 6) * 0.1, ys], axis=-1).reshape(-1, 3)
+    quads = np.arange(grid * grid, dtype=np.uint32).reshape(grid, grid)[:-1, :-1].reshape(-1)
+    indices = np.stack([quads, quads + 1, quads + grid, quads + 1, quads + grid + 1, quads + grid], axis=-1)
+    indices = indices.astype(np.uint32).reshape(-1)
+
+    binary = positions.tobytes() + indices.tobytes()
+    document = {
+        "asset": {"version": "2.0"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": 1}]}],
+        "buffers": [{"byteLength": len(binary)}],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": positions.nbytes, "target": 34962},
+            {"buffer": 0, "byteOffset": positions.nbytes, "byteLength": indices.nbytes, "target": 34963},
+        ],
+        "accessors": [
+            {"bufferView": 0, "componentType": 5126, "count": len(positions), "type": "VEC3",
+             "min": positions.min(axis=0).tolist(), "max": positions.max(axis=0).tolist()},
+            {"bufferView": 1, "componentType": 5125, "count": len(indices), "type": "SCALAR"},
+        ],
+    }
+    json_chunk = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    binary += b"\0" * (-len(binary) % 4)
+    total = 12 + 8 + len(json_chunk) + 8 + len(binary)
+    return (struct.pack("<4sII", b"glTF", 2, total)
+            + struct.pack("<I4s", len(json_chunk), b"JSON") + json_chunk
+            + struct.pack("<I4s", len(binary), b"BIN\0") + binary)
+
+
+class MockStabilityServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server emulating the Stability AI API
+
+    Every response is delayed by `latency` (+ up to `jitter`) seconds. A
+    fraction `error_rate` of requests fails with `error_status` (429 and 503
+    include Retry-After). Asynchronous generations answer 202 until they have
+    been polled `pending_polls` times and `generation_seconds` have passed.
+    """
+    daemon_threads = True
+
+    def __init__(self,
+                 port: int = 0,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 pending_polls: int = 2,
+                 generation_seconds: float = 0.0,
+                 error_rate: float = 0.0,
+                 error_status: int = 503,
+                 upscale_factor: int = 4,
+                 video_size: Tuple[int, int] = (768, 768),
+                 video_frames: int = 25,
+                 glb_grid: int = 256,
+                 seed: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.pending_polls = pending_polls
+        self.generation_seconds = generation_seconds
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.upscale_factor = upscale_factor
+        self.video_size = video_size
+        self.video_frames = video_frames
+        self.glb_grid = glb_grid
+        self.requests = 0
+        self.errors = 0
+        # TCP connections accepted (one handler per connection with HTTP/1.1 keep-alive)
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._jobs: Dict[str, Dict] = {}
+        self._payloads: Dict[Tuple, bytes] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "MockStabilityServer":
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-stability-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def payload(self, kind: str, *args) -> bytes:
+        """Build a synthetic payload once and reuse it for identical requests"""
+        key = (kind,) + args
+        with self._lock:
+            data = self._payloads.get(key)
+        if data is None:
+            builder = {"png": synthetic_png, "mp4": synthetic_mp4, "glb": synthetic_glb}[kind]
+            data = builder(*args)
+            with self._lock:
+                self._payloads[key] = data
+        return data
+
+    def count_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+    def delay(self) -> None:
+        with self._lock:
+            extra = self._random.random() * self.jitter if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def create_job(self, kind: str, result: Tuple) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {"kind": kind, "result": result, "polls": 0, "created": time.monotonic()}
+        return job_id
+
+    def poll_job(self, job_id: str) -> Optional[Tuple]:
+        """Return the job result once ready, None while pending; KeyError if unknown"""
+        with self._lock:
+            job = self._jobs[job_id]
+            job["polls"] += 1
+            ready = (job["polls"] > self.pending_polls
+                     and time.monotonic() - job["created"] >= self.generation_seconds)
+            if ready:
+                del self._jobs[job_id]
+        return job["result"] if ready else None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockStabilityServer
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, document, headers: Optional[Dict[str, str]] = None):
+        self._send(status, json.dumps(document).encode("utf-8"), "application/json", headers)
+
+    def _form(self) -> Tuple[Dict[str, str], Dict[str, bytes]]:
+        """Parse a multipart body into (fields, files)"""
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        content_type = self.headers.get("Content-Type", "")
+        fields, files = {}, {}
+        if not content_type.startswith("multipart/"):
+            return fields, files
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body)
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            payload = part.get_payload(decode=True) or b""
+            if part.get_filename():
+                files[name] = payload
+            else:
+                fields[name] = payload.decode("utf-8", "replace")
+        return fields, files
+
+    def _input_size(self, files: Dict[str, bytes]) -> Tuple[int, int]:
+        data = files.get("image")
+        if not data:
+            return (1024, 1024)
+        with Image.open(io.BytesIO(data)) as image:
+            return image.size
+
+    def _image(self, size: Tuple[int, int], seed: int = 0):
+        width, height = size
+        self._send(200, self.server.payload("png", width, height, seed), "image/png",
+                   {"seed": str(seed), "finish-reason": "SUCCESS"})
+
+    def _fail(self) -> bool:
+        if not self.server.should_fail():
+            return False
+        status = self.server.error_status
+        headers = {"Retry-After": "1"} if status in (429, 503) else None
+        self._json(status, {"name": "injected_error", "errors": [f"Injected {status}"]}, headers)
+        return True
+
+    def do_GET(self):
+        self.server.delay()
+        if self._fail():
+            return
+        path = self.path.split("?", 1)[0]
+        if path == "/v1/user/balance":
+            self._json(200, {"credits": 1000.0})
+        elif path.startswith("/v2beta/results/") or path.startswith("/v2beta/image-to-video/result/"):
+            try:
+                result = self.server.poll_job(path.rsplit("/", 1)[1])
+            except KeyError:
+                self._json(404, {"name": "not_found", "errors": ["Unknown generation ID"]})
+                return
+            if result is None:
+                self._json(202, {"id": path.rsplit("/", 1)[1], "status": "in-progress"})
+            elif result[0] == "png":
+                self._image(result[1:])
+            else:
+                self._send(200, self.server.payload(*result), "video/mp4")
+        else:
+            self._json(404, {"name": "not_found", "errors": [f"Unknown endpoint {path}"]})
+
+    def do_POST(self):
+        fields, files = self._form()
+        self.server.delay()
+        if self._fail():
+            return
+        path = self.path.split("?", 1)[0]
+        seed = int(fields.get("seed") or 0)
+        factor = self.server.upscale_factor
+
+        if path.startswith("/v2beta/stable-image/generate/"):
+            if "image" in files:
+                self._image(self._input_size(files), seed)
+            else:
+                self._image(ASPECT_SIZES.get(fields.get("aspect_ratio", "1:1"), (1024, 1024)), seed)
+        elif path in ("/v2beta/stable-image/upscale/fast", "/v2beta/stable-image/upscale/conservative"):
+            width, height = self._input_size(files)
+            self._image((width * factor, height * factor), seed)
+        elif path == "/v2beta/stable-image/upscale/creative":
+            width, height = self._input_size(files)
+            self._json(200, {"id": self.server.create_job("upscale", ("png", width * factor, height * factor))})
+        elif path.startswith("/v2beta/stable-image/edit/") or path.startswith("/v2beta/stable-image/control/"):
+            self._image(self._input_size(files), seed)
+        elif path == "/v2beta/image-to-video":
+            width, height = self.server.video_size
+            job = self.server.create_job("video", ("mp4", width, height, self.server.video_frames))
+            self._json(200, {"id": job})
+        elif path.startswith("/v2beta/3d/"):
+            self._send(200, self.server.payload("glb", self.server.glb_grid), "model/gltf-binary")
+        else:
+            self._json(404, {"name": "not_found", "errors": [f"Unknown endpoint {path}"]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency up to this many seconds")
+    parser.add_argument("--pending-polls", type=int, default=2, help="202 answers before a result is ready")
+    parser.add_argument("--generation-seconds", type=float, default=0.0, help="minimum time before a result is ready")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="status code of injected failures")
+    parser.add_argument("--upscale-factor", type=int, default=4)
+    parser.add_argument("--video-frames", type=int, default=25)
+    parser.add_argument("--glb-grid", type=int, default=256, help="vertices per side of the returned mesh")
+    args = parser.parse_args()
+
+    server = MockStabilityServer(
+        port=args.port, latency=args.latency, jitter=args.jitter, pending_polls=args.pending_polls,
+        generation_seconds=args.generation_seconds, error_rate=args.error_rate, error_status=args.error_status,
+        upscale_factor=args.upscale_factor, video_frames=args.video_frames, glb_grid=args.glb_grid)
+    print(f"Mock Stability API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
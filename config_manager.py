@@ -47,6 +47,31 @@ class ConfigManager:
         except:
             return None
     
+    def get_setting(self, section: str, option: str, fallback: Optional[str] = None) -> Optional[str]:
+        """Get a string setting, returning fallback if it is not configured"""
+        return self.config.get(section, option, fallback=fallback)
+
+    def get_int(self, section: str, option: str, fallback: int) -> int:
+        """Get an integer setting, returning fallback if it is missing or invalid"""
+        try:
+            return self.config.getint(section, option, fallback=fallback)
+        except ValueError:
+            return fallback
+
+    def get_float(self, section: str, option: str, fallback: float) -> float:
+        """Get a float setting, returning fallback if it is missing or invalid"""
+        try:
+            return self.config.getfloat(section, option, fallback=fallback)
+        except ValueError:
+            return fallback
+
+    def get_bool(self, section: str, option: str, fallback: bool) -> bool:
+        """Get a boolean setting, returning fallback if it is missing or invalid"""
+        try:
+            return self.config.getboolean(section, option, fallback=fallback)
+        except ValueError:
+            return fallback
+
     def set_api_key(self, api_key: str) -> None:
         """Set the Stability API Key"""
         if not self.config.has_section("stability"):
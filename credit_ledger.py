@@ -0,0 +1,362 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable
+
+from .config_manager import ConfigManager
+from .response_cache import _form_fields
+
+# Credits charged per successful request, keyed by the endpoint without the
+# /v2beta/ prefix. SD3 costs depend on the model and are keyed as endpoint@model.
+# Any entry can be overridden in the [credit_costs] section of config.ini.
+DEFAULT_COSTS = {
+    "stable-image/generate/ultra": 8.0,
+    "stable-image/generate/core": 3.0,
+    "stable-image/generate/sd3": 6.5,
+    "stable-image/generate/sd3@sd3.5-large": 6.5,
+    "stable-image/generate/sd3@sd3.5-large-turbo": 4.0,
+    "stable-image/generate/sd3@sd3.5-medium": 3.5,
+    "stable-image/generate/sd3@sd3-large": 6.5,
+    "stable-image/generate/sd3@sd3-large-turbo": 4.0,
+    "stable-image/generate/sd3@sd3-medium": 3.5,
+    "stable-image/upscale/fast": 1.0,
+    "stable-image/upscale/conservative": 25.0,
+    "stable-image/upscale/creative": 25.0,
+    "stable-image/edit/erase": 3.0,
+    "stable-image/edit/inpaint": 3.0,
+    "stable-image/edit/outpaint": 4.0,
+    "stable-image/edit/search-and-replace": 4.0,
+    "stable-image/edit/search-and-recolor": 5.0,
+    "stable-image/edit/remove-background": 2.0,
+    "stable-image/control/sketch": 3.0,
+    "stable-image/control/structure": 3.0,
+    "stable-image/control/style": 4.0,
+    "image-to-video": 20.0,
+    "3d/stable-fast-3d": 2.0,
+    "3d/stable-point-aware-3d": 4.0,
+}
+
+# Spend is kept for this many recent prompts
+MAX_TRACKED_PROMPTS = 100
+
+_ledgers: Dict[str, "CreditLedger"] = {}
+_ledgers_lock = threading.Lock()
+
+
+class CreditLimitError(Exception):
+    """Raised when a request would exceed the credit budget or the account balance"""
+    def __init__(self, message: str, cost: float):
+        self.cost = cost
+        super().__init__(message)
+
+
+def current_prompt_id() -> str:
+    """ID of the prompt ComfyUI is executing, or an empty string outside ComfyUI"""
+    try:
+        from server import PromptServer
+        return getattr(PromptServer.instance, "last_prompt_id", None) or ""
+    except (ImportError, AttributeError):
+        return ""
+
+
+class Reservation:
+    """Credits set aside for one request until it succeeds or fails"""
+    def __init__(self, ledger: "CreditLedger", cost: float, prompt_id: str, endpoint: str):
+        self.ledger = ledger
+        self.cost = cost
+        self.prompt_id = prompt_id
+        self.endpoint = endpoint
+        self.settled = False
+
+    def commit(self) -> None:
+        """Record the credits as spent (the API accepted the request)"""
+        self.ledger.commit(self)
+
+    def release(self) -> None:
+        """Return the credits (the request failed)"""
+        self.ledger.release(self)
+
+
+class CreditLedger:
+    """
+    Estimate, reserve and track the credits spent through one API key
+
+    Before a POST is sent its cost is estimated from the cost table and
+    reserved; the reservation becomes spend when the API accepts the
+    request and is released when it fails. A request is refused when it
+    would take the session or the current prompt over its budget, or the
+    estimated balance below `min_balance`. If it only fails because other
+    requests are still in flight, it waits up to `wait_timeout` seconds
+    for them to settle first.
+
+    The balance is fetched from /v1/user/balance once and then refreshed in
+    the background every `balance_refresh` seconds; in between it is
+    estimated by subtracting the spend since the last fetch, so node calls
+    never wait for a balance round-trip.
+    """
+    def __init__(self,
+                 budget: float = 0.0,
+                 prompt_budget: float = 0.0,
+                 min_balance: float = 0.0,
+                 check_balance: bool = True,
+                 balance_refresh: float = 300.0,
+                 wait_timeout: float = 60.0,
+                 costs: Optional[Dict[str, float]] = None):
+        """Initialize the ledger
+
+        Parameters:
+        -----------
+        budget : float
+            Maximum credits spent in this session (0 = unlimited)
+        prompt_budget : float
+            Maximum credits spent by one ComfyUI prompt (0 = unlimited)
+        min_balance : float
+            Credits that must remain on the account after a request
+        check_balance : bool
+            Track the account balance
+        balance_refresh : float
+            Seconds after which the cached balance is refreshed
+        wait_timeout : float
+            Seconds a request may wait for in-flight reservations to settle
+        costs : dict, optional
+            Cost table (defaults to DEFAULT_COSTS)
+        """
+        self.budget = budget
+        self.prompt_budget = prompt_budget
+        self.min_balance = min_balance
+        self.check_balance = check_balance
+        self.balance_refresh = balance_refresh
+        self.wait_timeout = wait_timeout
+        self.costs = dict(DEFAULT_COSTS if costs is None else costs)
+        self.spent = 0.0
+        self.reserved = 0.0
+        self.spent_by_prompt: "OrderedDict[str, float]" = OrderedDict()
+        self._reserved_by_prompt: Dict[str, float] = {}
+        self._balance: Optional[float] = None
+        # Time of the last fetch attempt, None until the first one
+        self._balance_checked: Optional[float] = None
+        self._spent_since_balance = 0.0
+        self._refreshing = False
+        self._fetch_lock = threading.Lock()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls) -> "CreditLedger":
+        """Create a ledger from the [credits] and [credit_costs] sections of config.ini"""
+        config = ConfigManager()
+        costs = dict(DEFAULT_COSTS)
+        if config.config.has_section("credit_costs"):
+            for key, value in config.config.items("credit_costs"):
+                try:
+                    costs[key.strip().lower()] = float(value)
+                except ValueError:
+                    print(f"[comfyui-stability-ai-api] Invalid credit cost ignored: {key} = {value}")
+        return cls(
+            budget=config.get_float("credits", "budget", 0.0),
+            prompt_budget=config.get_float("credits", "prompt_budget", 0.0),
+            min_balance=config.get_float("credits", "min_balance", 0.0),
+            check_balance=config.get_bool("credits", "check_balance", True),
+            balance_refresh=config.get_float("credits", "balance_refresh", 300.0),
+            wait_timeout=config.get_float("credits", "wait_timeout", 60.0),
+            costs=costs,
+        )
+
+    def estimate(self,
+                 method: str,
+                 endpoint: str,
+                 data: Optional[Dict[str, Any]] = None,
+                 files: Optional[Dict[str, Any]] = None) -> float:
+        """Estimate the credits a request costs
+
+        GET requests (result polls, balance checks) are free. For endpoints
+        missing from the cost table 0 is returned.
+        """
+        if method.upper() != "POST":
+            return 0.0
+        key = endpoint.split("/v2beta/", 1)[-1].strip("/").lower()
+        model = _form_fields(data, files).get("model")
+        if model is not None and f"{key}@{model}" in self.costs:
+            return self.costs[f"{key}@{model}"]
+        return self.costs.get(key, 0.0)
+
+    def balance(self) -> Optional[float]:
+        """Estimated balance: the last fetched balance minus the spend since, or None if unknown"""
+        with self._condition:
+            if self._balance is None:
+                return None
+            return self._balance - self._spent_since_balance
+
+    def set_balance(self, balance: float) -> None:
+        """Replace the estimate with a freshly fetched balance"""
+        with self._condition:
+            self._balance = balance
+            self._balance_checked = time.monotonic()
+            self._spent_since_balance = 0.0
+            self._condition.notify_all()
+
+    def refresh_balance(self, fetch: Callable[[], float]) -> None:
+        """Fetch the balance now when it is unknown, or in the background when it is stale
+
+        While the first fetch is in flight, concurrent callers wait for it
+        (up to wait_timeout), so the initial requests of a batch are all
+        checked against the balance. A failed fetch is retried after
+        balance_refresh seconds.
+        """
+        if not self.check_balance:
+            return
+        with self._condition:
+            known = self._balance is not None
+            stale = self._balance_checked is None or \
+                time.monotonic() - self._balance_checked >= self.balance_refresh
+            if not stale:
+                return
+            if self._refreshing:
+                if not known:
+                    self._condition.wait_for(lambda: not self._refreshing, self.wait_timeout)
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                with self._fetch_lock:
+                    self.set_balance(float(fetch()))
+            except Exception as e:
+                # Do not block generation when the balance cannot be fetched; try again later
+                print(f"[comfyui-stability-ai-api] Failed to fetch the credit balance: {e}")
+                with self._condition:
+                    self._balance_checked = time.monotonic()
+            finally:
+                with self._condition:
+                    self._refreshing = False
+                    self._condition.notify_all()
+
+        if known:
+            from .async_client import get_executor
+            get_executor().submit(run)
+        else:
+            run()
+
+    def _refusal(self, cost: float, prompt_id: str, reserved: float, prompt_reserved: float) -> Optional[str]:
+        """Reason why `cost` cannot be reserved given the reserved amounts, or None"""
+        if self.budget > 0 and self.spent + reserved + cost > self.budget:
+            return (f"the session budget of {self.budget:g} credits would be exceeded "
+                    f"({self.spent:g} spent, {reserved:g} in flight)")
+        if self.prompt_budget > 0:
+            prompt_spent = self.spent_by_prompt.get(prompt_id, 0.0)
+            if prompt_spent + prompt_reserved + cost > self.prompt_budget:
+                return (f"the per-prompt budget of {self.prompt_budget:g} credits would be exceeded "
+                        f"({prompt_spent:g} spent, {prompt_reserved:g} in flight)")
+        if self._balance is not None:
+            available = self._balance - self._spent_since_balance - reserved
+            if available - cost < self.min_balance:
+                return f"the account balance of about {available:g} credits is insufficient"
+        return None
+
+    def reserve(self, cost: float, endpoint: str = "", prompt_id: Optional[str] = None) -> Reservation:
+        """Set aside credits for a request
+
+        Parameters:
+        -----------
+        cost : float
+            Estimated cost of the request
+        endpoint : str
+            Endpoint, for error messages
+        prompt_id : str, optional
+            ComfyUI prompt the request belongs to (defaults to the executing one)
+
+        Returns:
+        --------
+        Reservation
+            Commit it when the request succeeded or release it when it failed
+
+        Raises:
+        -------
+        CreditLimitError
+            If the request would exceed a budget or the balance
+        """
+        prompt_id = current_prompt_id() if prompt_id is None else prompt_id
+        deadline = time.monotonic() + self.wait_timeout
+        with self._condition:
+            while True:
+                reason = self._refusal(cost, prompt_id, self.reserved, self._reserved_by_prompt.get(prompt_id, 0.0))
+                if reason is None:
+                    break
+                # Wait only if the request would fit once the requests in flight have settled
+                remaining = deadline - time.monotonic()
+                if self.reserved <= 0 or remaining <= 0 or self._refusal(cost, prompt_id, 0.0, 0.0) is not None:
+                    raise CreditLimitError(f"Request to {endpoint} ({cost:g} credits) refused: {reason}", cost)
+                self._condition.wait(remaining)
+
+            self.reserved += cost
+            self._reserved_by_prompt[prompt_id] = self._reserved_by_prompt.get(prompt_id, 0.0) + cost
+        return Reservation(self, cost, prompt_id, endpoint)
+
+    def _settle(self, reservation: Reservation) -> bool:
+        if reservation.settled:
+            return False
+        reservation.settled = True
+        self.reserved -= reservation.cost
+        left = self._reserved_by_prompt.get(reservation.prompt_id, 0.0) - reservation.cost
+        if left > 1e-9:
+            self._reserved_by_prompt[reservation.prompt_id] = left
+        else:
+            self._reserved_by_prompt.pop(reservation.prompt_id, None)
+        return True
+
+    def commit(self, reservation: Reservation) -> None:
+        """Record the reserved credits as spent"""
+        with self._condition:
+            if not self._settle(reservation):
+                return
+            self.spent += reservation.cost
+            self._spent_since_balance += reservation.cost
+            prompt_id = reservation.prompt_id
+            self.spent_by_prompt[prompt_id] = self.spent_by_prompt.pop(prompt_id, 0.0) + reservation.cost
+            while len(self.spent_by_prompt) > MAX_TRACKED_PROMPTS:
+                self.spent_by_prompt.popitem(last=False)
+            self._condition.notify_all()
+
+    def release(self, reservation: Reservation) -> None:
+        """Return the reserved credits of a failed request"""
+        with self._condition:
+            if self._settle(reservation):
+                self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of the current spend, reservations and balance estimate"""
+        with self._condition:
+            return {
+                "spent": self.spent,
+                "reserved": self.reserved,
+                "balance": None if self._balance is None else self._balance - self._spent_since_balance,
+                "spent_by_prompt": dict(self.spent_by_prompt),
+            }
+
+
+def get_credit_ledger(api_key: str) -> Optional[CreditLedger]:
+    """Get the credit ledger for an API key, or None if [credits] enabled is false
+
+    One ledger exists per API key and process, shared by all nodes.
+    """
+    config = ConfigManager()
+    if not config.get_bool("credits", "enabled", True):
+        return None
+
+    # Never keep the key itself
+    key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    ledger = _ledgers.get(key_id)
+    if ledger is None:
+        with _ledgers_lock:
+            ledger = _ledgers.get(key_id)
+            if ledger is None:
+                ledger = CreditLedger.from_config()
+                _ledgers[key_id] = ledger
+    return ledger
+
+
+def ledger_snapshots() -> Dict[str, Dict[str, Any]]:
+    """Snapshots of every ledger, keyed by a hash of the API key"""
+    with _ledgers_lock:
+        ledgers = dict(_ledgers)
+    return {key_id: ledger.snapshot() for key_id, ledger in ledgers.items()}
@@ -0,0 +1,235 @@
+import io
+import os
+import mmap
+import shutil
+import tempfile
+import threading
+from typing import Optional, Dict, Any, Union, BinaryIO
+
+from .config_manager import ConfigManager
+
+
+def get_download_settings() -> Dict[str, Any]:
+    """Read the [download] section of config.ini
+
+    - spool_max_mb : bodies up to this size stay in memory, larger ones spill to a temporary file (default: 8)
+    - chunk_kb     : size of the chunks read from the connection (default: 1024)
+    - directory    : directory for spilled bodies (default: system temp directory)
+    """
+    config = ConfigManager()
+    return {
+        "spool_max_bytes": int(config.get_float("download", "spool_max_mb", 8) * 1024 * 1024),
+        "chunk_size": max(1, config.get_int("download", "chunk_kb", 1024)) * 1024,
+        "directory": config.get_setting("download", "directory", "") or None,
+    }
+
+
+class SpooledBody:
+    """
+    Response body held in memory while small and in a temporary file once large
+
+    Unlike tempfile.SpooledTemporaryFile the spilled file is named, so
+    decoders that need a path (OpenCV) can open it directly. The body is read
+    back without copying through view(), which returns a memoryview of the
+    in-memory buffer or a read-only mmap of the file.
+
+    A body shared by several holders (coalesced requests) is reference
+    counted: retain() adds holders, and close() releases the buffer and file
+    only once every holder has closed it.
+    """
+    def __init__(self, spool_max_bytes: int, directory: Optional[str] = None, content_type: str = ""):
+        """Initialize an empty body
+
+        Parameters:
+        -----------
+        spool_max_bytes : int
+            Size above which the body is moved to a temporary file
+        directory : str, optional
+            Directory for the temporary file
+        content_type : str
+            Content-Type of the response
+        """
+        self.spool_max_bytes = spool_max_bytes
+        self.directory = directory
+        self.content_type = content_type
+        self.size = 0
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._refs = 1
+        self._refs_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __enter__(self) -> "SpooledBody":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def path(self) -> Optional[str]:
+        """Path of the temporary file, or None while the body is in memory"""
+        return self._file.name if self._file is not None else None
+
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk, spilling to a temporary file when the size limit is passed"""
+        if self._buffer is not None and self.size + len(chunk) > self.spool_max_bytes:
+            # Windows cannot reopen a file created with delete=True, so it is removed in close()
+            self._file = tempfile.NamedTemporaryFile(
+                prefix="stability-download-", dir=self.directory, delete=os.name != "nt")
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        (self._buffer if self._buffer is not None else self._file).write(chunk)
+        self.size += len(chunk)
+
+    def finish(self) -> None:
+        """Flush written data so the file can be opened by path"""
+        if self._file is not None:
+            self._file.flush()
+
+    def view(self) -> Union[memoryview, mmap.mmap]:
+        """Get the whole body as a read-only buffer without copying it"""
+        if self._buffer is not None:
+            return self._buffer.getbuffer()
+        if self.size == 0:
+            return memoryview(b"")
+        if self._mmap is None:
+            self.finish()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def open(self) -> BinaryIO:
+        """Open an independent file object positioned at the start of the body"""
+        if self._buffer is not None:
+            return io.BytesIO(self._buffer.getbuffer())
+        self.finish()
+        return open(self._file.name, "rb")
+
+    def read(self) -> bytes:
+        """Read the whole body into a bytes object"""
+        return bytes(self.view())
+
+    def save(self, path: str) -> int:
+        """Copy the body to a file, renaming it into place once complete
+
+        Returns:
+        --------
+        int
+            Number of bytes written
+        """
+        partial = f"{path}.part"
+        try:
+            with self.open() as source, open(partial, "wb") as f:
+                shutil.copyfileobj(source, f, 1024 * 1024)
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        return self.size
+
+    def persist(self, path: str) -> int:
+        """Store the body at `path`, hard-linking the spilled file instead of copying it where possible
+
+        The body stays usable; closing it afterwards leaves `path` in place.
+
+        Returns:
+        --------
+        int
+            Size of the body
+        """
+        if self._file is not None:
+            self.finish()
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+                os.link(self._file.name, path)
+                return self.size
+            except OSError:
+                pass
+        return self.save(path)
+
+    def retain(self, count: int = 1) -> "SpooledBody":
+        """Register `count` more holders; each of them closes the body once"""
+        with self._refs_lock:
+            self._refs += count
+        return self
+
+    def close(self) -> None:
+        """Release the buffer and remove the temporary file once the last holder closes the body"""
+        with self._refs_lock:
+            if self._refs <= 0:
+                return
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            name = self._file.name
+            self._file.close()
+            if os.name == "nt" and os.path.exists(name):
+                try:
+                    os.remove(name)
+                except OSError:
+                    pass
+            self._file = None
+        self._buffer = None
+
+
+class BodyDict(dict):
+    """
+    Result dict whose "string" entry is read from a SpooledBody on access
+
+    Used for VIDEO values when ComfyUI's video types are unavailable:
+    {"body": SpooledBody, "mimetype": ...}. Code that only knows the
+    {"string": bytes, "mimetype": ...} form keeps working via value["string"],
+    while code aware of the body can stream from it. The bytes are not
+    stored back, so the dict never holds a second copy.
+    """
+    def __missing__(self, key):
+        if key == "string" and dict.__contains__(self, "body"):
+            return self["body"].read()
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return dict.__contains__(self, key) or (key == "string" and dict.__contains__(self, "body"))
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
+def read_response(response, settings: Optional[Dict[str, Any]] = None) -> SpooledBody:
+    """Read a response body chunk by chunk into a SpooledBody
+
+    The response should be requested with stream=True, otherwise requests has
+    already buffered the whole body. The response is closed afterwards.
+
+    Parameters:
+    -----------
+    response : requests.Response
+        Response to read
+    settings : dict, optional
+        Settings as returned by get_download_settings()
+
+    Returns:
+    --------
+    SpooledBody
+        The response body
+    """
+    settings = settings or get_download_settings()
+    body = SpooledBody(settings["spool_max_bytes"], settings["directory"],
+                       response.headers.get("content-type", ""))
+    try:
+        for chunk in response.iter_content(chunk_size=settings["chunk_size"]):
+            body.write(chunk)
+        body.finish()
+    except BaseException:
+        body.close()
+        raise
+    finally:
+        response.close()
+    return body
@@ -0,0 +1,76 @@
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config_manager import ConfigManager
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Get the process-wide pooled HTTP session
+
+    The session is shared by every StabilityAPIClient regardless of API key,
+    so TCP/TLS connections to the API host are kept alive and reused across
+    node executions. Authorization is sent per request, never stored on the
+    session.
+
+    Returns:
+    --------
+    requests.Session
+        Shared session with a connection pool mounted for http and https
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def reset_session() -> None:
+    """Close the shared session and drop its pooled connections
+
+    The next call to get_session() creates a new session using the current
+    configuration.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_timeout() -> Tuple[float, float]:
+    """Get the (connect, read) timeout in seconds for API requests"""
+    config = ConfigManager()
+    return (
+        config.get_float("network", "connect_timeout", 10.0),
+        config.get_float("network", "read_timeout", 300.0),
+    )
+
+
+def _create_session() -> requests.Session:
+    """Create a session with a keep-alive connection pool
+
+    Pool sizes are read from the [network] section of config.ini:
+    - pool_connections : number of hosts to keep pools for
+    - pool_maxsize     : maximum connections kept open per host
+    - pool_block       : wait for a free connection instead of opening extra ones
+    """
+    config = ConfigManager()
+    adapter = HTTPAdapter(
+        pool_connections=config.get_int("network", "pool_connections", 4),
+        pool_maxsize=config.get_int("network", "pool_maxsize", 16),
+        pool_block=config.get_bool("network", "pool_block", False),
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # Never carry cookies from one API key's responses into another's requests
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
@@ -0,0 +1,322 @@
+import io
+from typing import Optional, Tuple, Dict, Any, List, Union
+import numpy as np
+import torch
+from PIL import Image
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+from .config_manager import ConfigManager
+from .downloads import SpooledBody
+
+# Encoded image data: bytes or any buffer, or a downloaded response body
+EncodedImage = Union[bytes, memoryview, SpooledBody]
+
+# codec name -> (PIL format, MIME type, file extension, lossless)
+UPLOAD_CODECS = {
+    "png": ("PNG", "image/png", "png", True),
+    "webp_lossless": ("WEBP", "image/webp", "webp", True),
+    "jpeg": ("JPEG", "image/jpeg", "jpg", False),
+}
+
+# Values quantized per step on the CPU; 1 MB of float32 stays cache resident
+QUANTIZE_CHUNK_ELEMENTS = 1 << 18
+
+
+def tensor_to_uint8(image: torch.Tensor, chunk_elements: int = QUANTIZE_CHUNK_ELEMENTS) -> np.ndarray:
+    """Clamp and quantize a 0-1 float tensor to a uint8 array
+
+    On the CPU the tensor is processed in cache-sized chunks through one
+    reused float buffer and written straight into a preallocated uint8 array,
+    so no full-size float temporary is created. CUDA tensors are quantized on
+    the device and transferred as uint8. Any shape is accepted ([H,W,C],
+    [H,W], [B,H,W,C], ...); uint8 tensors are returned without conversion.
+
+    Parameters:
+    -----------
+    image : torch.Tensor
+        Image or mask tensor with values in the range 0-1
+    chunk_elements : int
+        Number of values converted per step on the CPU
+
+    Returns:
+    --------
+    np.ndarray
+        uint8 array of the same shape, rounded to the nearest value
+    """
+    image = image.detach()
+    if image.dtype == torch.uint8:
+        return image.cpu().numpy()
+    if image.device.type != "cpu":
+        return image.mul(255.0).round_().clamp_(0, 255).to(torch.uint8).cpu().numpy()
+
+    out = torch.empty(image.shape, dtype=torch.uint8)
+    source = image.reshape(-1)
+    target = out.view(-1)
+    total = source.numel()
+    buffer = torch.empty(min(chunk_elements, total), dtype=torch.float32)
+    for start in range(0, total, chunk_elements):
+        count = min(chunk_elements, total - start)
+        chunk = buffer[:count]
+        torch.mul(source[start:start + count], 255.0, out=chunk)
+        # +0.5 then truncation in the uint8 copy rounds to nearest
+        chunk.add_(0.5).clamp_(0, 255)
+        target[start:start + count].copy_(chunk)
+    return out.numpy()
+
+
+def uint8_to_pil(array: np.ndarray) -> Image.Image:
+    """Wrap a uint8 [H,W], [H,W,1] or [H,W,3] array as a PIL image without copying the pixels"""
+    if array.ndim == 3 and array.shape[2] == 1:
+        array = array[:, :, 0]
+    if array.ndim == 2:
+        return Image.frombuffer("L", (array.shape[1], array.shape[0]), np.ascontiguousarray(array), "raw", "L", 0, 1)
+    if array.ndim == 3 and array.shape[2] == 3:
+        return Image.frombuffer("RGB", (array.shape[1], array.shape[0]), np.ascontiguousarray(array), "raw", "RGB", 0, 1)
+    if array.ndim == 3:
+        raise ValueError(f"Unsupported number of channels: {array.shape[2]}")
+    raise ValueError(f"Unsupported number of dimensions: {array.ndim}")
+
+
+def get_upload_settings() -> Dict[str, Any]:
+    """Read the [upload] section of config.ini
+
+    - codec                : preferred codec (png, webp_lossless, jpeg; default: png)
+    - png_compress_level   : zlib level 0-9 for PNG (default: 1)
+    - webp_method          : WebP effort 0-6 (default: 0)
+    - jpeg_quality         : JPEG quality 1-100 (default: 95)
+    - max_upload_mb        : size limit per uploaded file (default: 10, the API answers 413 above it)
+    - allow_lossy_fallback : fall back to JPEG when lossless codecs exceed the limit (default: true)
+    """
+    config = ConfigManager()
+    codec = (config.get_setting("upload", "codec", "png") or "png").lower()
+    return {
+        "codec": codec if codec in UPLOAD_CODECS else "png",
+        "png_compress_level": min(9, max(0, config.get_int("upload", "png_compress_level", 1))),
+        "webp_method": min(6, max(0, config.get_int("upload", "webp_method", 0))),
+        "jpeg_quality": min(100, max(1, config.get_int("upload", "jpeg_quality", 95))),
+        "max_bytes": int(config.get_float("upload", "max_upload_mb", 10) * 1024 * 1024),
+        "allow_lossy_fallback": config.get_bool("upload", "allow_lossy_fallback", True),
+    }
+
+
+def encode_image(image: Image.Image,
+                 codec: str = "png",
+                 png_compress_level: int = 1,
+                 webp_method: int = 0,
+                 jpeg_quality: int = 95) -> bytes:
+    """Encode a PIL image with one of the upload codecs
+
+    Parameters:
+    -----------
+    image : PIL.Image
+        Image to encode
+    codec : str
+        'png', 'webp_lossless' or 'jpeg'
+    png_compress_level : int
+        zlib compression level for PNG (lower is faster)
+    webp_method : int
+        WebP effort (lower is faster)
+    jpeg_quality : int
+        JPEG quality
+
+    Returns:
+    --------
+    bytes
+        Encoded image
+    """
+    pil_format = UPLOAD_CODECS[codec][0]
+    buffer = io.BytesIO()
+    if codec == "png":
+        image.save(buffer, format=pil_format, compress_level=png_compress_level)
+    elif codec == "webp_lossless":
+        image.save(buffer, format=pil_format, lossless=True, method=webp_method, quality=0)
+    else:
+        # 4:4:4 chroma keeps edges sharp for edit and control inputs
+        image.save(buffer, format=pil_format, quality=jpeg_quality, subsampling=0)
+    return buffer.getvalue()
+
+
+def encode_upload(image: Image.Image,
+                  name: str = "image",
+                  lossless: bool = False,
+                  settings: Optional[Dict[str, Any]] = None) -> Tuple[str, bytes, str]:
+    """Encode an image for upload, staying under the API size limit
+
+    The configured codec is tried first. If the result exceeds the size limit,
+    the other lossless codecs are tried (unless the first result was far over
+    the limit), then, unless `lossless` is set or the lossy fallback is
+    disabled, JPEG at decreasing quality.
+
+    Parameters:
+    -----------
+    image : PIL.Image
+        Image to encode
+    name : str
+        Base file name of the multipart part
+    lossless : bool
+        Never use a lossy codec (required for masks)
+    settings : dict, optional
+        Settings as returned by get_upload_settings()
+
+    Returns:
+    --------
+    Tuple[str, bytes, str]
+        (file name, encoded bytes, MIME type), usable directly as a `files` entry
+    """
+    settings = settings or get_upload_settings()
+    preferred = settings["codec"]
+    if lossless and not UPLOAD_CODECS[preferred][3]:
+        preferred = "png"
+
+    options = {
+        "png_compress_level": settings["png_compress_level"],
+        "webp_method": settings["webp_method"],
+        "jpeg_quality": settings["jpeg_quality"],
+    }
+    candidates = [(preferred, options)]
+    candidates += [("webp_lossless", dict(options, webp_method=4)), ("png", dict(options, png_compress_level=9))]
+    if not lossless and settings["allow_lossy_fallback"]:
+        candidates += [("jpeg", dict(options, jpeg_quality=quality)) for quality in (95, 90, 85, 75)]
+
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    size = 0
+    for codec, codec_options in candidates:
+        # Other lossless codecs only shave off 10-20%, so skip them when far over the limit
+        if size > settings["max_bytes"] * 1.2 and UPLOAD_CODECS[codec][3]:
+            continue
+        data = encode_image(image, codec, **codec_options)
+        if len(data) <= settings["max_bytes"]:
+            _, mimetype, extension, _ = UPLOAD_CODECS[codec]
+            return (f"{name}.{extension}", data, mimetype)
+        size = len(data) if not size else min(size, len(data))
+
+    raise ValueError(f"Could not encode the image under {settings['max_bytes'] / (1024 * 1024):.0f} MB "
+                     f"(smallest result: {size / (1024 * 1024):.1f} MB)")
+
+
+def _open_encoded(data: EncodedImage):
+    """Open encoded image data as a file object without copying a SpooledBody"""
+    return data.open() if isinstance(data, SpooledBody) else io.BytesIO(data)
+
+
+def image_size(data: EncodedImage) -> Tuple[int, int]:
+    """Read (width, height) from an encoded image header without decoding the pixels"""
+    with _open_encoded(data) as f, Image.open(f) as image:
+        return image.size
+
+
+def decode_rgb_uint8(data: EncodedImage) -> np.ndarray:
+    """Decode an encoded image to a uint8 RGB array [H,W,3]
+
+    OpenCV is used when available (decoding straight into one uint8 buffer and
+    swapping channels in place); otherwise PIL. Alpha channels are dropped and
+    grayscale images are expanded to RGB.
+
+    Parameters:
+    -----------
+    data : bytes or SpooledBody
+        Encoded image (PNG, JPEG, WebP)
+
+    Returns:
+    --------
+    np.ndarray
+        uint8 array [H,W,3]
+    """
+    if cv2 is not None:
+        buffer = data.view() if isinstance(data, SpooledBody) else data
+        array = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), cv2.IMREAD_COLOR)
+        del buffer
+        if array is not None:
+            return cv2.cvtColor(array, cv2.COLOR_BGR2RGB, dst=array)
+    with _open_encoded(data) as f, Image.open(f) as image:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return np.asarray(image)
+
+
+def decode_into(data: EncodedImage, out: torch.Tensor) -> torch.Tensor:
+    """Decode an image into a preallocated float32 tensor [H,W,3] with values 0-1
+
+    The uint8 pixels are converted while copying into `out`, and the scaling
+    is done in place, so no intermediate float array is created.
+
+    Parameters:
+    -----------
+    data : bytes or SpooledBody
+        Encoded image
+    out : torch.Tensor
+        Destination tensor [H,W,3], float32, matching the image size
+
+    Returns:
+    --------
+    torch.Tensor
+        `out`
+    """
+    pixels = decode_rgb_uint8(data)
+    if tuple(pixels.shape) != tuple(out.shape):
+        raise ValueError(f"Decoded image shape {tuple(pixels.shape)} does not match the destination {tuple(out.shape)}")
+    out.copy_(torch.from_numpy(pixels))
+    return out.div_(255.0)
+
+
+def decode_batch(images_data: List[EncodedImage]) -> torch.Tensor:
+    """Decode several images into one float32 tensor [B,H,W,3]
+
+    Image sizes are read from the headers first so the batch tensor can be
+    allocated once; each image is then decoded directly into its slice.
+
+    Parameters:
+    -----------
+    images_data : List[bytes or SpooledBody]
+        Encoded images, all with the same dimensions
+
+    Returns:
+    --------
+    torch.Tensor
+        Image tensor [B,H,W,3], float32 in the range 0-1, in input order
+    """
+    if not images_data:
+        raise ValueError("No images to decode: the batch is empty")
+    sizes = [image_size(data) for data in images_data]
+    if len(set(sizes)) > 1:
+        raise ValueError(f"All images in a batch must have the same size: {sorted(set(sizes))}")
+    width, height = sizes[0]
+    out = torch.empty((len(images_data), height, width, 3), dtype=torch.float32)
+    for index, data in enumerate(images_data):
+        decode_into(data, out[index])
+    return out
+
+
+def decode_letterboxed(images_data: List[EncodedImage]) -> torch.Tensor:
+    """Decode images of different sizes into one float32 tensor [B,H,W,3]
+
+    The batch is sized to the largest width and height; each image is decoded
+    centered into its slice and the remaining border is black.
+
+    Parameters:
+    -----------
+    images_data : List[bytes or SpooledBody]
+        Encoded images
+
+    Returns:
+    --------
+    torch.Tensor
+        Image tensor [B,H,W,3], float32 in the range 0-1, in input order
+    """
+    if not images_data:
+        raise ValueError("No images to decode: the batch is empty")
+    sizes = [image_size(data) for data in images_data]
+    width = max(w for w, _ in sizes)
+    height = max(h for _, h in sizes)
+    out = torch.zeros((len(images_data), height, width, 3), dtype=torch.float32)
+    for index, (data, (w, h)) in enumerate(zip(images_data, sizes)):
+        top = (height - h) // 2
+        left = (width - w) // 2
+        decode_into(data, out[index, top:top + h, left:left + w])
+    return out
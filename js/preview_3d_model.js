@@ -28,7 +28,8 @@ app.registerExtension({
     name: "Stability.Preview3DModel",
     async setup() {
         // 3Dプレビューダイアログを作成する関数
-        const createPreviewDialog = async (modelData, modelType) => {
+        // models: [{ url, model_type, full_url }]。複数ある場合はセレクターで切り替える
+        const createPreviewDialog = async (models) => {
             // Three.jsをロード
             await loadThreeJS();
 
@@ -69,6 +70,39 @@ app.registerExtension({
             closeButton.onclick = () => dialog.close();
 
             titleBar.appendChild(title);
+
+            // バッチの場合はモデルを選択するセレクターを追加
+            const selector = document.createElement('select');
+            selector.style.cssText = `
+                margin-left: auto;
+                margin-right: 10px;
+                background: #2a2a2a;
+                color: white;
+                border: 1px solid #333;
+            `;
+            models.forEach((_, index) => {
+                const option = document.createElement('option');
+                option.value = index;
+                option.textContent = `Model ${index + 1} / ${models.length}`;
+                selector.appendChild(option);
+            });
+            if (models.length > 1) {
+                titleBar.appendChild(selector);
+            }
+
+            // 軽量版が表示されている場合は元のモデルに切り替えるチェックボックスを追加
+            const fullQualityLabel = document.createElement('label');
+            fullQualityLabel.style.marginRight = '10px';
+            const fullQuality = document.createElement('input');
+            fullQuality.type = 'checkbox';
+            fullQualityLabel.appendChild(fullQuality);
+            fullQualityLabel.appendChild(document.createTextNode(' Full quality'));
+            if (models.some(({ url, full_url }) => full_url && full_url !== url)) {
+                if (models.length <= 1) {
+                    fullQualityLabel.style.marginLeft = 'auto';
+                }
+                titleBar.appendChild(fullQualityLabel);
+            }
             titleBar.appendChild(closeButton);
 
             // 3Dビューアーのコンテナを作成
@@ -107,57 +141,60 @@ app.registerExtension({
             controls.enableDamping = true;
             controls.dampingFactor = 0.05;
 
-            // モデルデータをBlobに変換
-            const modelBlob = new Blob([modelData], { type: 'application/octet-stream' });
-            const modelUrl = URL.createObjectURL(modelBlob);
-
             // モデルタイプに応じてローダーを選択
-            let modelPromise;
-            switch (modelType.toLowerCase()) {
-                case 'glb':
-                case 'gltf':
-                    modelPromise = loadGLTF(modelUrl);
-                    break;
-                case 'obj':
-                    modelPromise = loadOBJ(modelUrl);
-                    break;
-                case 'ply':
-                    modelPromise = loadPLY(modelUrl);
-                    break;
-                default:
-                    console.error('Unsupported model type:', modelType);
-                    dialog.close();
-                    return;
-            }
-
-            try {
-                const model = await modelPromise;
-                scene.add(model);
-
-                // モデルを中央に配置し、カメラの位置を調整
-                const box = new THREE.Box3().setFromObject(model);
-                const center = box.getCenter(new THREE.Vector3());
-                model.position.sub(center);
-
-                const size = box.getSize(new THREE.Vector3());
-                const maxDim = Math.max(size.x, size.y, size.z);
-                camera.position.z = maxDim * 2;
-
-                // アニメーションループを開始
-                function animate() {
-                    requestAnimationFrame(animate);
-                    controls.update();
-                    renderer.render(scene, camera);
+            const loadModel = (modelUrl, modelType) => {
+                switch (modelType.toLowerCase()) {
+                    case 'glb':
+                    case 'gltf':
+                        return loadGLTF(modelUrl);
+                    case 'obj':
+                        return loadOBJ(modelUrl);
+                    case 'ply':
+                        return loadPLY(modelUrl);
+                    default:
+                        return Promise.reject(new Error(`Unsupported model type: ${modelType}`));
+                }
+            };
+
+            // 選択されたモデルを読み込み、表示中のモデルと置き換える
+            let current = null;
+            const showModel = async (index) => {
+                const { url, model_type, full_url } = models[index];
+                try {
+                    const model = await loadModel(fullQuality.checked && full_url ? full_url : url, model_type);
+                    if (current) {
+                        scene.remove(current);
+                    }
+                    current = model;
+                    scene.add(model);
+
+                    // モデルを中央に配置し、カメラの位置を調整
+                    const box = new THREE.Box3().setFromObject(model);
+                    const center = box.getCenter(new THREE.Vector3());
+                    model.position.sub(center);
+
+                    const size = box.getSize(new THREE.Vector3());
+                    const maxDim = Math.max(size.x, size.y, size.z);
+                    camera.position.z = maxDim * 2;
+                } catch (error) {
+                    console.error('Error loading model:', error);
+                    if (!current) {
+                        dialog.close();
+                    }
                 }
-                animate();
+            };
+            selector.onchange = () => showModel(Number(selector.value));
+            fullQuality.onchange = () => showModel(Number(selector.value));
 
-            } catch (error) {
-                console.error('Error loading model:', error);
-                dialog.close();
-            }
+            await showModel(0);
 
-            // Clean up
-            URL.revokeObjectURL(modelUrl);
+            // アニメーションループを開始
+            function animate() {
+                requestAnimationFrame(animate);
+                controls.update();
+                renderer.render(scene, camera);
+            }
+            animate();
 
             // ウィンドウリサイズ対応
             window.addEventListener('resize', () => {
@@ -206,8 +243,13 @@ app.registerExtension({
 
         // プレビューイベントのハンドラーを登録
         api.addEventListener("preview_3d_model", ({ detail }) => {
-            const { model_data, model_type } = detail;
-            createPreviewDialog(model_data, model_type);
+            // モデル本体はwebsocketでは送られないため、HTTPで取得する（ファイル名が内容のハッシュなのでブラウザにキャッシュされる）
+            const models = detail.models || [{ url: detail.url, model_type: detail.model_type }];
+            createPreviewDialog(models.map(({ url, model_type, full_url }) => ({
+                url: api.apiURL(url),
+                model_type,
+                full_url: full_url && api.apiURL(full_url),
+            })));
         });
     }
 });
\ No newline at end of file
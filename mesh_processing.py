@@ -0,0 +1,602 @@
+import os
+import json
+import struct
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .image_codec import decode_rgb_uint8, uint8_to_pil, encode_image
+
+GLB_MAGIC = 0x46546C67  # b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+COMPONENT_TYPES = {
+    5120: np.int8,
+    5121: np.uint8,
+    5122: np.int16,
+    5123: np.uint16,
+    5125: np.uint32,
+    5126: np.float32,
+}
+TYPE_WIDTHS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+TEXTURE_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp"}
+
+# Material properties kept when a mesh is re-exported (textures other than the base color are dropped)
+MATERIAL_FACTORS = ("baseColorFactor", "metallicFactor", "roughnessFactor")
+
+ROWS_PER_CHUNK = 65536
+
+
+class Mesh:
+    """
+    Triangle mesh with optional per-vertex attributes and a base color texture
+
+    Arrays are NumPy arrays in glTF conventions: vertices float32 [N,3],
+    faces uint32 [M,3], normals float32 [N,3], uvs float32 [N,2] with the
+    origin at the top left, colors float32 [N,4] in the range 0-1.
+    """
+    def __init__(self,
+                 vertices: np.ndarray,
+                 faces: np.ndarray,
+                 normals: Optional[np.ndarray] = None,
+                 uvs: Optional[np.ndarray] = None,
+                 colors: Optional[np.ndarray] = None,
+                 texture: Optional[bytes] = None,
+                 texture_mimetype: str = "image/png",
+                 material: Optional[Dict[str, Any]] = None):
+        self.vertices = vertices
+        self.faces = faces
+        self.normals = normals
+        self.uvs = uvs
+        self.colors = colors
+        self.texture = texture
+        self.texture_mimetype = texture_mimetype
+        self.material = dict(material or {})
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def face_count(self) -> int:
+        return len(self.faces)
+
+
+def parse_glb(data) -> Tuple[Dict[str, Any], memoryview]:
+    """Split a GLB file into its JSON document and binary chunk
+
+    Parameters:
+    -----------
+    data : bytes-like
+        GLB content (bytes, memoryview or mmap)
+
+    Returns:
+    --------
+    Tuple[dict, memoryview]
+        (glTF JSON, view of the BIN chunk without copying)
+    """
+    view = memoryview(data).cast("B")
+    if len(view) < 12:
+        raise ValueError("Not a GLB file: too short")
+    magic, version, length = struct.unpack_from("<III", view, 0)
+    if magic != GLB_MAGIC:
+        raise ValueError("Not a GLB file: bad magic")
+    if version != 2:
+        raise ValueError(f"Unsupported GLB version: {version}")
+
+    gltf, binary = None, view[0:0]
+    offset = 12
+    end = min(length, len(view))
+    while offset + 8 <= end:
+        chunk_length, chunk_type = struct.unpack_from("<II", view, offset)
+        chunk = view[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == CHUNK_JSON and gltf is None:
+            gltf = json.loads(bytes(chunk))
+        elif chunk_type == CHUNK_BIN and not len(binary):
+            binary = chunk
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise ValueError("GLB file has no JSON chunk")
+    return gltf, binary
+
+
+def read_accessor(gltf: Dict[str, Any], binary: memoryview, index: int) -> np.ndarray:
+    """Read a glTF accessor into a new [count, width] array
+
+    Interleaved (strided) buffer views are gathered with a strided view and
+    normalized integer attributes are converted to float32.
+    """
+    accessor = gltf["accessors"][index]
+    if "sparse" in accessor:
+        raise ValueError("Sparse accessors are not supported")
+    dtype = np.dtype(COMPONENT_TYPES[accessor["componentType"]]).newbyteorder("<")
+    width = TYPE_WIDTHS[accessor["type"]]
+    count = accessor["count"]
+    if "bufferView" not in accessor:
+        return np.zeros((count, width), dtype=dtype)
+
+    buffer_view = gltf["bufferViews"][accessor["bufferView"]]
+    if buffer_view.get("buffer", 0) != 0:
+        raise ValueError("External glTF buffers are not supported")
+    offset = buffer_view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+    element = dtype.itemsize * width
+    stride = buffer_view.get("byteStride") or element
+    size = (count - 1) * stride + element if count else 0
+    raw = np.frombuffer(binary, dtype=np.uint8, count=size, offset=offset)
+    if stride != element:
+        raw = np.lib.stride_tricks.as_strided(raw, shape=(count, element), strides=(stride, 1))
+    values = np.ascontiguousarray(raw).view(dtype).reshape(count, width).copy()
+
+    if accessor.get("normalized") and dtype.kind in "iu":
+        scale = float(np.iinfo(dtype).max)
+        values = np.maximum(values.astype(np.float32) / scale, -1.0)
+    return values
+
+
+def _node_matrix(node: Dict[str, Any]) -> np.ndarray:
+    """Local transform of a glTF node as a 4x4 matrix"""
+    if "matrix" in node:
+        # glTF matrices are column-major
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+    x, y, z, w = node.get("rotation", (0.0, 0.0, 0.0, 1.0))
+    rotation = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation * np.array(node.get("scale", (1.0, 1.0, 1.0)))
+    matrix[:3, 3] = node.get("translation", (0.0, 0.0, 0.0))
+    return matrix
+
+
+def _mesh_instances(gltf: Dict[str, Any]) -> List[Tuple[int, np.ndarray]]:
+    """(mesh index, world matrix) of every mesh in the default scene"""
+    nodes = gltf.get("nodes", [])
+    scenes = gltf.get("scenes")
+    if scenes:
+        roots = scenes[gltf.get("scene", 0)].get("nodes", [])
+    else:
+        children = {child for node in nodes for child in node.get("children", [])}
+        roots = [i for i in range(len(nodes)) if i not in children]
+    if not nodes:
+        return [(i, np.eye(4)) for i in range(len(gltf.get("meshes", [])))]
+
+    instances = []
+    stack = [(index, np.eye(4)) for index in roots]
+    while stack:
+        index, parent = stack.pop()
+        node = nodes[index]
+        world = parent @ _node_matrix(node)
+        if "mesh" in node:
+            instances.append((node["mesh"], world))
+        stack.extend((child, world) for child in node.get("children", []))
+    return instances
+
+
+def _base_color_texture(gltf: Dict[str, Any], binary: memoryview,
+                        material: Dict[str, Any]) -> Tuple[Optional[bytes], str]:
+    """Encoded base color texture of a material and its MIME type"""
+    info = material.get("pbrMetallicRoughness", {}).get("baseColorTexture")
+    if info is None:
+        return None, "image/png"
+    image = gltf["images"][gltf["textures"][info["index"]]["source"]]
+    if "bufferView" not in image:
+        return None, "image/png"
+    buffer_view = gltf["bufferViews"][image["bufferView"]]
+    start = buffer_view.get("byteOffset", 0)
+    return bytes(binary[start:start + buffer_view["byteLength"]]), image.get("mimeType", "image/png")
+
+
+def load_glb(data) -> Mesh:
+    """Parse the triangle meshes of a GLB file into one Mesh
+
+    Node transforms are applied, so the result is in world space. All
+    triangle primitives are merged; the base color texture of the first
+    textured material is kept. Points and lines are ignored.
+
+    Parameters:
+    -----------
+    data : bytes-like
+        GLB content (bytes, memoryview or mmap)
+
+    Returns:
+    --------
+    Mesh
+        Merged mesh
+    """
+    gltf, binary = parse_glb(data)
+    meshes = gltf.get("meshes", [])
+    materials = gltf.get("materials", [])
+
+    parts = []
+    texture, texture_mimetype, material = None, "image/png", {}
+    for mesh_index, world in _mesh_instances(gltf):
+        for primitive in meshes[mesh_index].get("primitives", []):
+            if primitive.get("mode", 4) != 4:
+                continue
+            attributes = primitive["attributes"]
+            vertices = read_accessor(gltf, binary, attributes["POSITION"]).astype(np.float64)
+            vertices = (vertices @ world[:3, :3].T + world[:3, 3]).astype(np.float32)
+            if "indices" in primitive:
+                faces = read_accessor(gltf, binary, primitive["indices"]).astype(np.uint32).reshape(-1, 3)
+            else:
+                faces = np.arange(len(vertices), dtype=np.uint32).reshape(-1, 3)
+
+            normals = None
+            if "NORMAL" in attributes:
+                normal_matrix = np.linalg.inv(world[:3, :3]).T
+                normals = read_accessor(gltf, binary, attributes["NORMAL"]).astype(np.float64) @ normal_matrix.T
+                normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+                normals = normals.astype(np.float32)
+            uvs = read_accessor(gltf, binary, attributes["TEXCOORD_0"]).astype(np.float32) \
+                if "TEXCOORD_0" in attributes else None
+            colors = None
+            if "COLOR_0" in attributes:
+                colors = read_accessor(gltf, binary, attributes["COLOR_0"]).astype(np.float32)
+                if colors.shape[1] == 3:
+                    colors = np.hstack([colors, np.ones((len(colors), 1), dtype=np.float32)])
+            parts.append((vertices, faces, normals, uvs, colors))
+
+            if "material" in primitive and texture is None:
+                source = materials[primitive["material"]]
+                texture, texture_mimetype = _base_color_texture(gltf, binary, source)
+                pbr = source.get("pbrMetallicRoughness", {})
+                material = {key: pbr[key] for key in MATERIAL_FACTORS if key in pbr}
+                if source.get("doubleSided"):
+                    material["doubleSided"] = True
+    del binary
+    if not parts:
+        raise ValueError("The GLB file contains no triangle meshes")
+
+    offsets = np.cumsum([0] + [len(part[0]) for part in parts[:-1]])
+    vertices = np.concatenate([part[0] for part in parts])
+    faces = np.concatenate([part[1] + np.uint32(offset) for part, offset in zip(parts, offsets)])
+
+    def merge(index: int, width: int, fill: float) -> Optional[np.ndarray]:
+        if all(part[index] is None for part in parts):
+            return None
+        return np.concatenate([part[index] if part[index] is not None else
+                               np.full((len(part[0]), width), fill, dtype=np.float32) for part in parts])
+
+    return Mesh(vertices, faces, merge(2, 3, 0.0), merge(3, 2, 0.0), merge(4, 4, 1.0),
+                texture, texture_mimetype, material)
+
+
+def compute_normals(vertices: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    """Area-weighted vertex normals"""
+    corners = vertices[faces.astype(np.int64)]
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    normals = np.zeros_like(vertices, dtype=np.float64)
+    for axis in range(3):
+        normals[:, axis] = np.bincount(faces.ravel(), weights=np.repeat(face_normals[:, axis], 3),
+                                       minlength=len(vertices))
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+    return normals.astype(np.float32)
+
+
+def _cluster(mesh: Mesh, resolution: int) -> Mesh:
+    """Merge the vertices falling into the same cell of a resolution^3 grid"""
+    vertices = mesh.vertices.astype(np.float64)
+    low = vertices.min(axis=0)
+    cell = max(float((vertices.max(axis=0) - low).max()), 1e-12) / resolution
+    grid = np.minimum(((vertices - low) / cell).astype(np.int64), resolution - 1)
+    key = (grid[:, 0] * resolution + grid[:, 1]) * resolution + grid[:, 2]
+    if mesh.uvs is not None:
+        # Keep vertices of different UV islands apart so texture seams survive
+        span = 3 * resolution
+        uv_grid = np.clip(np.floor(mesh.uvs * resolution).astype(np.int64) + resolution, 0, span - 1)
+        key = (key * span + uv_grid[:, 0]) * span + uv_grid[:, 1]
+    _, cluster, counts = np.unique(key, return_inverse=True, return_counts=True)
+    cluster = cluster.ravel()
+
+    faces = cluster[mesh.faces.astype(np.int64)]
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])]
+    # Drop triangles that collapsed onto the same three clusters, keeping the first one's winding
+    ordered = np.sort(faces, axis=1)
+    if len(counts) < (1 << 21):
+        ordered = (ordered[:, 0] << 42) | (ordered[:, 1] << 21) | ordered[:, 2]
+        _, first = np.unique(ordered, return_index=True)
+    else:
+        _, first = np.unique(ordered, axis=0, return_index=True)
+    faces = faces[np.sort(first)]
+
+    # Compact to the clusters that are still referenced
+    used, faces = np.unique(faces, return_inverse=True)
+    faces = faces.reshape(-1, 3).astype(np.uint32)
+
+    def mean(values: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if values is None:
+            return None
+        sums = np.stack([np.bincount(cluster, weights=values[:, axis], minlength=len(counts))
+                         for axis in range(values.shape[1])], axis=1)
+        return (sums / counts[:, None])[used].astype(np.float32)
+
+    vertices = mean(mesh.vertices)
+    return Mesh(vertices, faces, compute_normals(vertices, faces) if mesh.normals is not None else None,
+                mean(mesh.uvs), mean(mesh.colors), mesh.texture, mesh.texture_mimetype, mesh.material)
+
+
+def decimate(mesh: Mesh, target_faces: int, max_resolution: int = 1024) -> Mesh:
+    """Reduce a mesh to at most `target_faces` triangles by vertex clustering
+
+    Vertices are merged on a uniform grid; the finest grid whose result fits
+    the target is found by binary search. Merged vertices take the mean
+    position, UV and color of their cluster, and normals are recomputed.
+    This is fast and robust, but coarser than quadric-error simplification.
+
+    Parameters:
+    -----------
+    mesh : Mesh
+        Mesh to simplify
+    target_faces : int
+        Maximum number of triangles (0 or more than the current count keeps the mesh)
+    max_resolution : int
+        Finest grid (cells along the longest axis) that is tried
+
+    Returns:
+    --------
+    Mesh
+        Simplified mesh (or `mesh` itself when it is already small enough)
+    """
+    if target_faces <= 0 or mesh.face_count <= target_faces:
+        return mesh
+    low, high, best = 1, max_resolution, None
+    while low <= high:
+        resolution = (low + high) // 2
+        candidate = _cluster(mesh, resolution)
+        if candidate.face_count <= target_faces:
+            best, low = candidate, resolution + 1
+        else:
+            high = resolution - 1
+    return best if best is not None else _cluster(mesh, 1)
+
+
+def resize_texture(mesh: Mesh, max_size: int, jpeg_quality: int = 85) -> Mesh:
+    """Downscale the base color texture and re-encode it as JPEG
+
+    Parameters:
+    -----------
+    mesh : Mesh
+        Textured mesh
+    max_size : int
+        Longest side of the texture in pixels (0 keeps the resolution)
+    jpeg_quality : int
+        JPEG quality of the re-encoded texture
+
+    Returns:
+    --------
+    Mesh
+        Mesh sharing the geometry of `mesh` with the new texture (or `mesh`
+        itself when it has no texture). Alpha is dropped, as in bake_vertex_colors.
+    """
+    if mesh.texture is None:
+        return mesh
+    image = uint8_to_pil(decode_rgb_uint8(mesh.texture))
+    if max_size > 0 and max(image.size) > max_size:
+        scale = max_size / max(image.size)
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                             Image.BOX)
+    texture = encode_image(image, "jpeg", jpeg_quality=jpeg_quality)
+    return Mesh(mesh.vertices, mesh.faces, mesh.normals, mesh.uvs, mesh.colors,
+                texture, "image/jpeg", mesh.material)
+
+
+def bake_vertex_colors(mesh: Mesh) -> Optional[np.ndarray]:
+    """Sample the base color texture at every vertex UV (nearest texel)
+
+    Returns:
+    --------
+    np.ndarray or None
+        uint8 RGB [N,3], or None when the mesh has no texture or UVs
+    """
+    if mesh.texture is None or mesh.uvs is None:
+        return None
+    texture = decode_rgb_uint8(mesh.texture)
+    height, width = texture.shape[:2]
+    # glTF wraps UVs by default (REPEAT)
+    x = (np.mod(mesh.uvs[:, 0], 1.0) * width).astype(np.int64).clip(0, width - 1)
+    y = (np.mod(mesh.uvs[:, 1], 1.0) * height).astype(np.int64).clip(0, height - 1)
+    return texture[y, x]
+
+
+def _write_rows(f, template: str, array: np.ndarray) -> None:
+    """Write formatted rows in chunks (one % format per chunk instead of per row)"""
+    for start in range(0, len(array), ROWS_PER_CHUNK):
+        chunk = array[start:start + ROWS_PER_CHUNK]
+        f.write((template * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def export_obj(mesh: Mesh, path: str) -> List[str]:
+    """Write a Wavefront OBJ file
+
+    With a texture, a .mtl material and the texture image are written next
+    to it; otherwise vertex colors (if any) are written as the common
+    "v x y z r g b" extension.
+
+    Returns:
+    --------
+    List[str]
+        Paths of all written files
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    directory = os.path.dirname(path)
+    written = [path]
+    textured = mesh.texture is not None and mesh.uvs is not None
+
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("# comfyui-stability-ai-api\n")
+        if textured:
+            f.write(f"mtllib {stem}.mtl\nusemtl material0\n")
+        if mesh.colors is not None and not textured:
+            _write_rows(f, "v %.6f %.6f %.6f %.4f %.4f %.4f\n", np.hstack([mesh.vertices, mesh.colors[:, :3]]))
+        else:
+            _write_rows(f, "v %.6f %.6f %.6f\n", mesh.vertices)
+        if mesh.uvs is not None:
+            # OBJ texture coordinates have their origin at the bottom left
+            _write_rows(f, "vt %.6f %.6f\n", np.column_stack([mesh.uvs[:, 0], 1.0 - mesh.uvs[:, 1]]))
+        if mesh.normals is not None:
+            _write_rows(f, "vn %.6f %.6f %.6f\n", mesh.normals)
+
+        faces = mesh.faces.astype(np.int64) + 1
+        if mesh.uvs is not None and mesh.normals is not None:
+            _write_rows(f, "f %d/%d/%d %d/%d/%d %d/%d/%d\n", np.repeat(faces, 3, axis=1))
+        elif mesh.uvs is not None:
+            _write_rows(f, "f %d/%d %d/%d %d/%d\n", np.repeat(faces, 2, axis=1))
+        elif mesh.normals is not None:
+            _write_rows(f, "f %d//%d %d//%d %d//%d\n", np.repeat(faces, 2, axis=1))
+        else:
+            _write_rows(f, "f %d %d %d\n", faces)
+
+    if textured:
+        texture_name = f"{stem}.{TEXTURE_EXTENSIONS.get(mesh.texture_mimetype, 'png')}"
+        mtl_path = os.path.join(directory, f"{stem}.mtl")
+        with open(mtl_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(f"newmtl material0\nKa 1 1 1\nKd 1 1 1\nKs 0 0 0\nd 1\nillum 1\nmap_Kd {texture_name}\n")
+        texture_path = os.path.join(directory, texture_name)
+        with open(texture_path, "wb") as f:
+            f.write(mesh.texture)
+        written += [mtl_path, texture_path]
+    return written
+
+
+def export_ply(mesh: Mesh, path: str) -> List[str]:
+    """Write a binary little-endian PLY file
+
+    The vertex and face records are built as NumPy structured arrays and
+    written in one call each. PLY has no texture support, so a textured
+    mesh gets per-vertex colors sampled from its texture.
+
+    Returns:
+    --------
+    List[str]
+        Paths of all written files
+    """
+    colors = bake_vertex_colors(mesh)
+    if colors is None and mesh.colors is not None:
+        colors = (np.clip(mesh.colors[:, :3], 0.0, 1.0) * 255 + 0.5).astype(np.uint8)
+
+    fields = [("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
+    if mesh.normals is not None:
+        fields += [("nx", "<f4"), ("ny", "<f4"), ("nz", "<f4")]
+    if mesh.uvs is not None:
+        fields += [("s", "<f4"), ("t", "<f4")]
+    if colors is not None:
+        fields += [("red", "u1"), ("green", "u1"), ("blue", "u1")]
+
+    vertices = np.empty(mesh.vertex_count, dtype=fields)
+    vertices["x"], vertices["y"], vertices["z"] = mesh.vertices.T
+    if mesh.normals is not None:
+        vertices["nx"], vertices["ny"], vertices["nz"] = mesh.normals.T
+    if mesh.uvs is not None:
+        vertices["s"], vertices["t"] = mesh.uvs[:, 0], 1.0 - mesh.uvs[:, 1]
+    if colors is not None:
+        vertices["red"], vertices["green"], vertices["blue"] = colors.T
+
+    faces = np.empty(mesh.face_count, dtype=[("count", "u1"), ("indices", "<i4", (3,))])
+    faces["count"] = 3
+    faces["indices"] = mesh.faces
+
+    ply_types = {"<f4": "float", "u1": "uchar"}
+    header = ["ply", "format binary_little_endian 1.0", "comment comfyui-stability-ai-api",
+              f"element vertex {mesh.vertex_count}"]
+    header += [f"property {ply_types[kind]} {name}" for name, kind in fields]
+    header += [f"element face {mesh.face_count}", "property list uchar int vertex_indices", "end_header"]
+
+    with open(path, "wb") as f:
+        f.write(("\n".join(header) + "\n").encode("ascii"))
+        f.write(vertices.tobytes())
+        f.write(faces.tobytes())
+    return [path]
+
+
+def to_glb(mesh: Mesh) -> bytes:
+    """Encode a mesh as a GLB file with a single node, mesh and material"""
+    binary = bytearray()
+    buffer_views: List[Dict[str, Any]] = []
+    accessors: List[Dict[str, Any]] = []
+
+    def add_view(data: bytes, target: Optional[int] = None) -> int:
+        binary.extend(b"\0" * (-len(binary) % 4))
+        view = {"buffer": 0, "byteOffset": len(binary), "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        binary.extend(data)
+        buffer_views.append(view)
+        return len(buffer_views) - 1
+
+    def add_accessor(array: np.ndarray, kind: str, target: int, bounds: bool = False) -> int:
+        component = {np.dtype(np.float32): 5126, np.dtype(np.uint32): 5125}[array.dtype]
+        accessor = {
+            "bufferView": add_view(np.ascontiguousarray(array).astype(array.dtype.newbyteorder("<")).tobytes(), target),
+            "componentType": component,
+            "count": len(array),
+            "type": kind,
+        }
+        if bounds:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    attributes = {"POSITION": add_accessor(mesh.vertices.astype(np.float32), "VEC3", 34962, bounds=True)}
+    if mesh.normals is not None:
+        attributes["NORMAL"] = add_accessor(mesh.normals.astype(np.float32), "VEC3", 34962)
+    if mesh.uvs is not None:
+        attributes["TEXCOORD_0"] = add_accessor(mesh.uvs.astype(np.float32), "VEC2", 34962)
+    if mesh.colors is not None:
+        attributes["COLOR_0"] = add_accessor(mesh.colors.astype(np.float32), "VEC4", 34962)
+    indices = add_accessor(mesh.faces.astype(np.uint32).reshape(-1), "SCALAR", 34963)
+
+    pbr = {key: mesh.material[key] for key in MATERIAL_FACTORS if key in mesh.material}
+    material: Dict[str, Any] = {"pbrMetallicRoughness": pbr}
+    if mesh.material.get("doubleSided"):
+        material["doubleSided"] = True
+    gltf: Dict[str, Any] = {
+        "asset": {"version": "2.0", "generator": "comfyui-stability-ai-api"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": attributes, "indices": indices, "material": 0, "mode": 4}]}],
+        "materials": [material],
+    }
+    if mesh.texture is not None and mesh.uvs is not None:
+        pbr["baseColorTexture"] = {"index": 0}
+        gltf["images"] = [{"bufferView": add_view(mesh.texture), "mimeType": mesh.texture_mimetype}]
+        gltf["samplers"] = [{"magFilter": 9729, "minFilter": 9987}]
+        gltf["textures"] = [{"sampler": 0, "source": 0}]
+    binary.extend(b"\0" * (-len(binary) % 4))
+    gltf["accessors"] = accessors
+    gltf["bufferViews"] = buffer_views
+    gltf["buffers"] = [{"byteLength": len(binary)}]
+
+    document = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    document += b" " * (-len(document) % 4)
+    total = 12 + 8 + len(document) + 8 + len(binary)
+    return b"".join([
+        struct.pack("<III", GLB_MAGIC, 2, total),
+        struct.pack("<II", len(document), CHUNK_JSON), document,
+        struct.pack("<II", len(binary), CHUNK_BIN), bytes(binary),
+    ])
+
+
+def export_glb(mesh: Mesh, path: str) -> List[str]:
+    """Write a GLB file
+
+    Returns:
+    --------
+    List[str]
+        Paths of all written files
+    """
+    with open(path, "wb") as f:
+        f.write(to_glb(mesh))
+    return [path]
+
+
+EXPORTERS = {
+    "glb": export_glb,
+    "obj": export_obj,
+    "ply": export_ply,
+}
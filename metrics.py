@@ -0,0 +1,296 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+
+from .config_manager import ConfigManager
+
+# Event fields that become labels of the aggregated metrics
+LABELS = ("phase", "endpoint", "method", "status", "source")
+# Numeric event fields that are summed into counters
+COUNTERS = ("bytes", "bytes_up", "bytes_down", "retries", "polls", "images")
+
+METRICS_ROUTE = "/stability/metrics"
+
+_metrics: Optional["Metrics"] = None
+_metrics_lock = threading.Lock()
+
+
+def endpoint_label(endpoint: str) -> str:
+    """Strip generation IDs from result endpoints so they aggregate under one label
+
+    e.g. /v2beta/results/abc123 -> /v2beta/results/{id}
+    """
+    base, _, last = endpoint.rpartition("/")
+    if base.endswith(("/results", "/result")):
+        return f"{base}/{{id}}"
+    return endpoint
+
+
+def payload_size(data: Optional[Dict[str, Any]] = None, files: Optional[Dict[str, Any]] = None) -> int:
+    """Approximate number of bytes uploaded for form fields and multipart parts"""
+    size = sum(len(str(value)) for value in (data or {}).values())
+    for value in (files or {}).values():
+        content = value[1] if isinstance(value, tuple) else value
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            size += len(content)
+        else:
+            size += len(str(content))
+    return size
+
+
+class LogSink:
+    """Print one line per event"""
+    def write(self, event: Dict[str, Any]) -> None:
+        fields = " ".join(f"{key}={value}" for key, value in event.items() if key not in ("ts", "phase"))
+        print(f"[comfyui-stability-ai-api] metrics {event['phase']}: {fields}")
+
+
+class JsonlSink:
+    """Append one JSON object per event to a file"""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class Metrics:
+    """
+    Phase timings and counters of API calls
+
+    Every instrumented step (encoding, requests, polling, downloads and
+    decoding) is recorded as an event: a phase name, its duration and
+    fields such as the endpoint, HTTP status and bytes transferred. Events
+    are aggregated in memory for the Prometheus text endpoint and passed
+    to every sink. A sink is any object with a `write(event)` method.
+    """
+    def __init__(self, sinks: Optional[List[Any]] = None):
+        self.sinks = list(sinks or [])
+        self._lock = threading.Lock()
+        # labels -> [count, total seconds, max seconds]
+        self._timings: Dict[Tuple, List[float]] = {}
+        # (counter, labels) -> total
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+
+    @classmethod
+    def from_config(cls) -> "Metrics":
+        """Create the metrics with the sinks listed in the [metrics] section of config.ini"""
+        config = ConfigManager()
+        sinks = []
+        for name in config.get_setting("metrics", "sinks", "").split(","):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name == "log":
+                sinks.append(LogSink())
+            elif name == "jsonl":
+                path = config.get_setting("metrics", "jsonl_path", "") or \
+                    os.path.join(os.path.dirname(__file__), "metrics.jsonl")
+                sinks.append(JsonlSink(path))
+            else:
+                print(f"[comfyui-stability-ai-api] Unknown metrics sink ignored: {name}")
+        return cls(sinks)
+
+    def add_sink(self, sink: Any) -> None:
+        """Register an additional sink"""
+        self.sinks.append(sink)
+
+    def record(self, phase: str, seconds: float, **fields: Any) -> None:
+        """Record one event
+
+        Parameters:
+        -----------
+        phase : str
+            Step that was measured (encode, request, poll, download, decode)
+        seconds : float
+            Duration of the step
+        **fields
+            Labels (endpoint, method, status, source) and counters (bytes,
+            bytes_up, bytes_down, retries, polls, images); other fields are
+            only passed to the sinks
+        """
+        fields = {key: value for key, value in fields.items() if value is not None}
+        if "endpoint" in fields:
+            fields["endpoint"] = endpoint_label(fields["endpoint"])
+        event = {"ts": round(time.time(), 3), "phase": phase, "seconds": round(seconds, 6), **fields}
+
+        labels = tuple(str(event.get(key, "")) for key in LABELS)
+        with self._lock:
+            timing = self._timings.setdefault(labels, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+            for counter in COUNTERS:
+                if fields.get(counter):
+                    key = (counter, labels)
+                    self._counters[key] = self._counters.get(key, 0) + fields[counter]
+
+        for sink in self.sinks:
+            try:
+                sink.write(event)
+            except Exception as e:
+                print(f"[comfyui-stability-ai-api] Metrics sink {type(sink).__name__} failed: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of the aggregated timings and counters"""
+        with self._lock:
+            return {
+                "timings": [
+                    {**dict(zip(LABELS, labels)), "count": count, "seconds": total, "max_seconds": peak}
+                    for labels, (count, total, peak) in self._timings.items()
+                ],
+                "counters": [
+                    {**dict(zip(LABELS, labels)), "counter": counter, "value": value}
+                    for (counter, labels), value in self._counters.items()
+                ],
+            }
+
+    def render_prometheus(self) -> str:
+        """Render the aggregated metrics, retry, polling, coalescing and credit
+        counters in the Prometheus text exposition format"""
+        from .retry_policy import retry_stats
+        from . import polling
+        from .singleflight import get_single_flight
+        from .credit_ledger import ledger_snapshots
+
+        with self._lock:
+            timings = {labels: list(timing) for labels, timing in self._timings.items()}
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP stability_phase_seconds Time spent per phase of API calls",
+            "# TYPE stability_phase_seconds summary",
+        ]
+        for labels, (count, total, _) in sorted(timings.items()):
+            lines.append(f"stability_phase_seconds_count{_labels(labels)} {count}")
+            lines.append(f"stability_phase_seconds_sum{_labels(labels)} {total:.6f}")
+        lines += [
+            "# HELP stability_phase_seconds_max Longest single duration per phase",
+            "# TYPE stability_phase_seconds_max gauge",
+        ]
+        for labels, (_, _, peak) in sorted(timings.items()):
+            lines.append(f"stability_phase_seconds_max{_labels(labels)} {peak:.6f}")
+
+        for counter in COUNTERS:
+            values = sorted((labels, value) for (name, labels), value in counters.items() if name == counter)
+            if not values:
+                continue
+            lines += [f"# TYPE stability_{counter}_total counter"]
+            lines += [f"stability_{counter}_total{_labels(labels)} {value:.15g}" for labels, value in values]
+
+        retries = retry_stats.snapshot()
+        lines += ["# HELP stability_retries_by_reason_total Retried requests by status code or exception",
+                  "# TYPE stability_retries_by_reason_total counter"]
+        lines += [f'stability_retries_by_reason_total{{reason="{_escape(reason)}"}} {count}'
+                  for reason, count in sorted(retries["retries_by_reason"].items())]
+        lines += ["# TYPE stability_retry_give_ups_total counter",
+                  f"stability_retry_give_ups_total {retries['gave_up']}"]
+
+        # Do not start the poller thread just to report that it has not polled
+        poller = polling._poller
+        lines += ["# TYPE stability_polls_sent_total counter",
+                  f"stability_polls_sent_total {poller.total_polls if poller is not None else 0}"]
+
+        single_flight = get_single_flight()
+        if single_flight is not None:
+            coalesce = single_flight.snapshot()
+            lines += ["# HELP stability_coalesced_calls_total Requests sent (executed) or answered by an identical in-flight request (shared)",
+                      "# TYPE stability_coalesced_calls_total counter",
+                      f'stability_coalesced_calls_total{{result="executed"}} {coalesce["executed"]}',
+                      f'stability_coalesced_calls_total{{result="shared"}} {coalesce["shared"]}',
+                      "# TYPE stability_coalesced_in_flight gauge",
+                      f"stability_coalesced_in_flight {coalesce['in_flight']}"]
+
+        ledgers = ledger_snapshots()
+        if ledgers:
+            lines += ["# HELP stability_credits_spent_total Estimated credits spent per API key",
+                      "# TYPE stability_credits_spent_total counter"]
+            lines += [f'stability_credits_spent_total{{key="{key_id}"}} {ledger["spent"]:.15g}'
+                      for key_id, ledger in sorted(ledgers.items())]
+            lines += ["# TYPE stability_credits_reserved gauge"]
+            lines += [f'stability_credits_reserved{{key="{key_id}"}} {ledger["reserved"]:.15g}'
+                      for key_id, ledger in sorted(ledgers.items())]
+            balances = [(key_id, ledger["balance"]) for key_id, ledger in sorted(ledgers.items())
+                        if ledger["balance"] is not None]
+            if balances:
+                lines += ["# HELP stability_credits_balance Estimated account balance",
+                          "# TYPE stability_credits_balance gauge"]
+                lines += [f'stability_credits_balance{{key="{key_id}"}} {balance:.15g}' for key_id, balance in balances]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(values: Tuple) -> str:
+    pairs = [f'{key}="{_escape(value)}"' for key, value in zip(LABELS, values) if value]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def get_metrics() -> Optional[Metrics]:
+    """Get the process-wide metrics, or None when [metrics] enabled is false"""
+    global _metrics
+    if not ConfigManager().get_bool("metrics", "enabled", True):
+        return None
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics.from_config()
+    return _metrics
+
+
+@contextmanager
+def timed(phase: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """Measure the enclosed block as one event of `phase`
+
+    Yields a dict of the event fields that the block may extend (e.g. with
+    the status or bytes transferred). An exception leaving the block is
+    recorded in the `error` field. Nothing is measured when metrics are disabled.
+    """
+    metrics = get_metrics()
+    if metrics is None:
+        yield fields
+        return
+    started = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        metrics.record(phase, time.perf_counter() - started, **fields)
+
+
+def register_metrics_route() -> bool:
+    """Serve the Prometheus text format at /stability/metrics on the ComfyUI server
+
+    Returns False outside ComfyUI (or when [metrics] prometheus is false).
+    """
+    if not ConfigManager().get_bool("metrics", "prometheus", True):
+        return False
+    try:
+        from aiohttp import web
+        from server import PromptServer
+    except ImportError:
+        return False
+    if getattr(PromptServer, "instance", None) is None:
+        return False
+
+    @PromptServer.instance.routes.get(METRICS_ROUTE)
+    async def stability_metrics(request):
+        metrics = get_metrics()
+        body = metrics.render_prometheus() if metrics is not None else ""
+        return web.Response(body=body.encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    return True
@@ -0,0 +1,274 @@
+import io
+import os
+import json
+import mmap
+import shutil
+import struct
+import hashlib
+import tempfile
+import threading
+import weakref
+from collections.abc import Mapping
+from typing import Optional, Dict, Any, Union, BinaryIO, Iterator
+
+from PIL import Image
+
+from .downloads import SpooledBody, get_download_settings
+
+GLB_MIMETYPE = "model/gltf-binary"
+
+# Bytes of an embedded image read to get its size from the header
+IMAGE_HEADER_BYTES = 65536
+
+
+def model_extension(mimetype: str) -> str:
+    """File extension of a model MIME type, e.g. "glb" for model/gltf-binary"""
+    model_type = mimetype.split("/")[-1]
+    return "glb" if model_type == "gltf-binary" else model_type
+
+
+class _Resources:
+    """File and mapping of a Model3D, released by a finalizer without referencing the model"""
+    def __init__(self, path: str, temporary: bool):
+        self.path = path
+        self.temporary = temporary
+        self.mmap: Optional[mmap.mmap] = None
+
+    def release(self) -> None:
+        if self.mmap is not None:
+            try:
+                self.mmap.close()
+            except BufferError:
+                # Still exported (e.g. a NumPy array over the mapping); it is unmapped once that is gone
+                return
+            self.mmap = None
+
+    def cleanup(self) -> None:
+        self.release()
+        if self.temporary:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class Model3D(Mapping):
+    """
+    MODEL_3D value backed by a file on disk
+
+    Passing the model between nodes passes this object, never the bytes.
+    The file is memory-mapped on first access; the SHA-256 and the mesh
+    metadata (vertex and face counts, texture sizes) are computed on first
+    use, the metadata from the GLB JSON chunk and image headers only.
+    Temporary files are removed when the object is garbage collected.
+
+    For compatibility with code written for {"string": bytes, "mimetype": str}
+    dicts it is a read-only mapping with those two keys; model["string"]
+    reads the whole file. Equality and hashing use the file path, never the content.
+    """
+    def __init__(self, path: str, mimetype: str = GLB_MIMETYPE, temporary: bool = False):
+        """Wrap a model file
+
+        Parameters:
+        -----------
+        path : str
+            Model file
+        mimetype : str
+            MIME type of the file (e.g. "model/gltf-binary")
+        temporary : bool
+            Delete the file when this object is garbage collected
+        """
+        self.mimetype = mimetype
+        self._resources = _Resources(path, temporary)
+        self._finalizer = weakref.finalize(self, self._resources.cleanup)
+        self._lock = threading.Lock()
+        self._sha256: Optional[str] = None
+        self._info: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _temporary_path(mimetype: str = GLB_MIMETYPE) -> str:
+        fd, path = tempfile.mkstemp(prefix="stability-model-", suffix=f".{model_extension(mimetype)}",
+                                    dir=get_download_settings()["directory"])
+        os.close(fd)
+        return path
+
+    @classmethod
+    def from_body(cls, body: SpooledBody, mimetype: str = GLB_MIMETYPE) -> "Model3D":
+        """Take over a downloaded body; the body is closed afterwards
+
+        A body that was spilled to disk is hard-linked into place instead of copied.
+        """
+        path = cls._temporary_path(mimetype)
+        try:
+            body.persist(path)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        finally:
+            body.close()
+        return cls(path, mimetype, temporary=True)
+
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, memoryview], mimetype: str = GLB_MIMETYPE) -> "Model3D":
+        """Write model data to a temporary file"""
+        path = cls._temporary_path(mimetype)
+        with open(path, "wb") as f:
+            f.write(data)
+        return cls(path, mimetype, temporary=True)
+
+    @property
+    def path(self) -> str:
+        return self._resources.path
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+    @property
+    def extension(self) -> str:
+        """Model type as a file extension, e.g. "glb" for model/gltf-binary"""
+        return model_extension(self.mimetype)
+
+    def view(self) -> Union[memoryview, mmap.mmap]:
+        """Get the whole file as a read-only buffer (mapped on first use)"""
+        with self._lock:
+            if self._resources.mmap is None:
+                if self.size == 0:
+                    return memoryview(b"")
+                with open(self.path, "rb") as f:
+                    self._resources.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._resources.mmap
+
+    def open(self) -> BinaryIO:
+        """Open an independent file object positioned at the start"""
+        return open(self.path, "rb")
+
+    def read(self) -> bytes:
+        """Read the whole file into a bytes object"""
+        with self.open() as f:
+            return f.read()
+
+    def save(self, path: str) -> int:
+        """Copy the file (in the kernel where supported), renaming it into place once complete
+
+        Returns:
+        --------
+        int
+            Number of bytes written
+        """
+        partial = f"{path}.part"
+        try:
+            shutil.copyfile(self.path, partial)
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        return self.size
+
+    def close(self) -> None:
+        """Unmap the file (it is mapped again on the next access)"""
+        with self._lock:
+            self._resources.release()
+
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 of the file content"""
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.view()).hexdigest()
+        return self._sha256
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        """Mesh metadata from the GLB JSON chunk, without reading the geometry
+
+        Returns:
+        --------
+        dict
+            meshes, vertex_count and face_count (per mesh definition, node
+            instancing is not expanded) and textures as a list of (width, height)
+        """
+        if self._info is None:
+            self._info = self._read_info()
+        return self._info
+
+    def _read_info(self) -> Dict[str, Any]:
+        info = {"meshes": 0, "vertex_count": 0, "face_count": 0, "textures": []}
+        if self.extension != "glb":
+            return info
+        view = self.view()
+        if len(view) < 20:
+            return info
+        json_length, json_type = struct.unpack_from("<II", view, 12)
+        if json_type != 0x4E4F534A:
+            return info
+        gltf = json.loads(bytes(view[20:20 + json_length]))
+        bin_start = 20 + json_length + 8
+
+        accessors = gltf.get("accessors", [])
+        info["meshes"] = len(gltf.get("meshes", []))
+        for mesh in gltf.get("meshes", []):
+            for primitive in mesh.get("primitives", []):
+                if primitive.get("mode", 4) != 4:
+                    continue
+                vertices = accessors[primitive["attributes"]["POSITION"]]["count"]
+                info["vertex_count"] += vertices
+                indices = accessors[primitive["indices"]]["count"] if "indices" in primitive else vertices
+                info["face_count"] += indices // 3
+
+        buffer_views = gltf.get("bufferViews", [])
+        for image in gltf.get("images", []):
+            if "bufferView" not in image:
+                continue
+            start = bin_start + buffer_views[image["bufferView"]].get("byteOffset", 0)
+            header = bytes(view[start:start + IMAGE_HEADER_BYTES])
+            try:
+                with Image.open(io.BytesIO(header)) as texture:
+                    info["textures"].append(texture.size)
+            except Exception:
+                pass
+        return info
+
+    # Mapping interface of the {"string", "mimetype"} dict form
+    def __getitem__(self, key: str) -> Any:
+        if key == "string":
+            return self.read()
+        if key == "mimetype":
+            return self.mimetype
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("string", "mimetype"))
+
+    def __len__(self) -> int:
+        return 2
+
+    # Mapping would compare the file contents through model["string"]; models are equal when they share the file
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Model3D):
+            return os.path.abspath(self.path) == os.path.abspath(other.path)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(os.path.abspath(self.path))
+
+    def __repr__(self) -> str:
+        return f"Model3D({self.path!r}, {self.mimetype!r})"
+
+
+def to_model_3d(value: Any) -> Model3D:
+    """Convert a MODEL_3D value of any supported form to a Model3D
+
+    Accepts a Model3D, a {"body": SpooledBody, "mimetype"} dict or a
+    {"string": bytes, "mimetype"} dict. Dicts are copied to a file, so the
+    original value stays usable.
+    """
+    if isinstance(value, Model3D):
+        return value
+    mimetype = value.get("mimetype", GLB_MIMETYPE)
+    if "body" in value:
+        path = Model3D._temporary_path(mimetype)
+        value["body"].save(path)
+        return Model3D(path, mimetype, temporary=True)
+    return Model3D.from_bytes(value["string"], mimetype)
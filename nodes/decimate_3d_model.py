@@ -0,0 +1,34 @@
+from typing import Tuple
+from ..mesh_processing import load_glb, decimate, to_glb
+from ..model_3d import Model3D, to_model_3d
+
+
+class Decimate3DModel:
+    """3Dモデルの面数をローカルで削減するノード
+
+    高精細なモデルを1回だけ生成し、target_countを変えてAPIを再度呼ぶ代わりに
+    ここで複数のLODを作成できる。
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "model_3d": ("MODEL_3D",),
+                "target_faces": ("INT", {"default": 5000, "min": 100, "max": 1000000, "step": 100}),
+            },
+        }
+
+    RETURN_TYPES = ("MODEL_3D",)
+    RETURN_NAMES = ("model_3d",)
+    FUNCTION = "decimate"
+    CATEGORY = "Stability AI"
+
+    def decimate(self, model_3d, target_faces: int) -> Tuple[Model3D]:
+        """GLBを解析し、頂点クラスタリングで指定の面数以下に削減"""
+        mesh = load_glb(to_model_3d(model_3d).view())
+
+        simplified = decimate(mesh, target_faces)
+        print(f"[comfyui-stability-ai-api] Decimated: {mesh.face_count} -> {simplified.face_count} faces")
+
+        return (Model3D.from_bytes(to_glb(simplified), "model/gltf-binary"),)
@@ -1,3 +1,6 @@
+from ..preview_server import publish_model_preview
+
+
 class Preview3DModel:
     """3Dモデルをプレビュー表示するノード"""
     
@@ -14,6 +17,8 @@ class Preview3DModel:
     
     RETURN_TYPES = ()
     RETURN_NAMES = ()
+    # バッチ生成されたモデルをまとめて1つのダイアログで表示する
+    INPUT_IS_LIST = True
     FUNCTION = "preview"
     OUTPUT_NODE = True
     CATEGORY = "Stability AI/preview"
@@ -24,10 +29,8 @@ class Preview3DModel:
         
         Parameters:
         -----------
-        model_3d : dict
-            3Dモデルデータ。以下のキーを含む:
-            - string: モデルデータのバイト列
-            - mimetype: モデルのMIMEタイプ (例: "model/gltf-binary")
+        model_3d : list
+            3Dモデル (Model3D) のリスト
         
         Returns:
         --------
@@ -35,16 +38,9 @@ class Preview3DModel:
             空のタプル (このノードは出力を生成しない)
         """
         from server import PromptServer
-        
-        # モデルタイプを取得 (例: "model/gltf-binary" -> "glb")
-        model_type = model_3d["mimetype"].split("/")[-1]
-        if model_type == "gltf-binary":
-            model_type = "glb"
-            
-        # プレビューイベントを発火
-        PromptServer.instance.send_sync("preview_3d_model", {
-            "model_data": model_3d["string"],  # モデルのバイナリデータ
-            "model_type": model_type,          # モデルの種類 (glb, obj, ply など)
-        })
-        
-        return ()
\ No newline at end of file
+
+        # モデルを一時ディレクトリに保存し、websocketにはURLだけを送る（ブラウザがHTTPで取得してキャッシュする）
+        models = [publish_model_preview(model) for model in model_3d]
+        PromptServer.instance.send_sync("preview_3d_model", {**models[0], "models": models})
+
+        return ()
@@ -1,46 +1,87 @@
 # nodes/save_3d_model.py
 import os
-from typing import Tuple
+import re
+from typing import Tuple, List
+from ..mesh_processing import load_glb, decimate, EXPORTERS
+from ..model_3d import Model3D, to_model_3d
 
 class Save3DModel:
-    """3Dモデルを保存するノード"""
+    """3Dモデルを保存するノード
+
+    バッチ生成されたモデルのリストをまとめて受け取り、既存ファイルと重複しない
+    連番のファイル名で一度に保存する。
+    """
 
     @classmethod
     def INPUT_TYPES(s):
         return {
             "required": {
                 "model_3d": ("MODEL_3D",),
+                # ファイル名の接頭辞（"<filename>_00001_.glb" の形式で保存）
                 "filename": ("STRING", {"default": "model"}),
                 "model_type": (["GLB", "OBJ", "PLY"], {"default": "GLB"}),
+            },
+            "optional": {
+                # 0の場合は面数を減らさない。APIを再度呼ばずにローカルでLODを作成できる
+                "target_faces": ("INT", {"default": 0, "min": 0, "max": 1000000, "step": 100}),
             },
              "hidden": {"prompt": "PROMPT", "extra_pnginfo": "EXTRA_PNGINFO"},
         }
 
     RETURN_TYPES = ("MODEL_3D",) 
     RETURN_NAMES = ("model_3d",) 
+    # モデルのリストを1回の呼び出しで受け取り、そのままリストで返す
+    INPUT_IS_LIST = True
+    OUTPUT_IS_LIST = (True,)
     FUNCTION = "save_model"
     OUTPUT_NODE = True
     CATEGORY = "Stability AI"
 
-    def save_model(self, model_3d, filename: str, model_type:str, prompt=None, extra_pnginfo=None) -> Tuple:
-        """3Dモデルを保存"""
+    def get_output_paths(self, filename_prefix: str, extension: str, count: int) -> List[str]:
+        """ComfyUIの出力フォルダ内に、既存ファイルと重複しない連番のパスをcount個作成"""
+        try:
+            import folder_paths
+        except ImportError:
+            folder_paths = None
 
-        model_bytes = model_3d["string"] # バイトデータを取得
+        if folder_paths is not None:
+            full_output_folder, filename, counter, _, _ = folder_paths.get_save_image_path(
+                filename_prefix, folder_paths.get_output_directory())
+        else:
+            # ComfyUI外で実行された場合はカレントディレクトリのoutputに保存
+            # （get_save_image_pathと同様に、既存ファイルの最大の連番の次から割り当てる）
+            full_output_folder = "output"
+            os.makedirs(full_output_folder, exist_ok=True)
+            filename = filename_prefix
+            pattern = re.compile(rf"^{re.escape(filename)}_(\d{{5,}})_")
+            counters = [int(match.group(1)) for match in map(pattern.match, os.listdir(full_output_folder)) if match]
+            counter = max(counters, default=0) + 1
+
+        return [os.path.join(full_output_folder, f"{filename}_{counter + i:05}_.{extension}") for i in range(count)]
+
+    def save_model(self, model_3d, filename, model_type, target_faces=None,
+                   prompt=None, extra_pnginfo=None) -> Tuple[List[Model3D]]:
+        """3Dモデルを保存"""
 
-        # 出力ディレクトリの作成
-        output_dir = "output"
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        # INPUT_IS_LISTのため、ウィジェットの値もリストで渡される
+        filename = filename[0]
+        model_type = model_type[0]
+        target_faces = target_faces[0] if target_faces else 0
 
-        # 拡張子を付ける
-        filename += "." + model_type.lower()
-        # ファイルパスの作成
-        filepath = os.path.join(output_dir, filename)
+        models = [to_model_3d(model) for model in model_3d]
+        paths = self.get_output_paths(filename, model_type.lower(), len(models))
 
-        # GLBファイルとして保存
-        with open(filepath, 'wb') as f:
-            f.write(model_bytes)
+        for model, filepath in zip(models, paths):
+            if model_type == "GLB" and target_faces <= 0:
+                # GLBファイルとして保存（メモリに読み込まずにファイルをコピー）
+                model.save(filepath)
+                written = [filepath]
+            else:
+                # GLBを解析し、必要なら面数を減らしてから指定の形式に変換
+                mesh = decimate(load_glb(model.view()), target_faces)
+                written = EXPORTERS[model_type.lower()](mesh, filepath)
 
-        print(f"[comfyui-stability-ai-api] Saved: {filepath}")
+            for path in written:
+                print(f"[comfyui-stability-ai-api] Saved: {path}")
 
-        return ({"string": model_bytes, "mimetype": "model/gltf-binary"},)
\ No newline at end of file
+        return (models,)
@@ -1,6 +1,9 @@
 import torch
 from typing import List, Tuple, Dict, Any, Optional
 from ..api_client import StabilityAPIClient
+from ..async_client import AsyncStabilityAPIClient, run_sync, gather_limited
+from ..config_manager import ConfigManager
+from ..downloads import SpooledBody
 
 class StabilityBaseNode:
     """StabilityAI APIノードの基底クラス"""
@@ -34,7 +37,140 @@ class StabilityBaseNode:
         if self.client is None or (api_key and api_key != self.client.api_key):
             self.client = StabilityAPIClient(api_key if api_key else None)
         return self.client
+
+    def get_async_client(self, api_key: str = "") -> AsyncStabilityAPIClient:
+        """非同期APIクライアントを取得
+
+        Parameters
+        ----------
+        api_key : str, optional
+            APIキー。指定された場合、このキーを優先的に使用
+
+        Returns
+        -------
+        AsyncStabilityAPIClient
+            get_clientで取得したクライアントをラップした非同期クライアント
+        """
+        return AsyncStabilityAPIClient(self.get_client(api_key))
+
+    def run_async(self, coro):
+        """コルーチンを共有イベントループで実行し、結果を待つ
+
+        ノードのFUNCTIONは同期的に呼ばれるため、HTTP処理はこのメソッドを通して
+        バックグラウンドのイベントループ上で実行する。
+
+        Parameters
+        ----------
+        coro : Coroutine
+            実行するコルーチン
+
+        Returns
+        -------
+        Any
+            コルーチンの戻り値
+        """
+        return run_sync(coro)
+
+    def get_batch_concurrency(self) -> int:
+        """バッチ処理で同時に実行するAPIリクエスト数の上限を取得
+
+        config.iniの[batch] max_concurrencyで設定する（デフォルト: 4）
+        """
+        return ConfigManager().get_int("batch", "max_concurrency", 4)
+
+    async def gather_batch(self, coros) -> list:
+        """バッチの各要素に対するコルーチンを同時実行数を制限して実行する
+
+        Parameters
+        ----------
+        coros : Iterable[Coroutine]
+            バッチの各要素を処理するコルーチン
+
+        Returns
+        -------
+        list
+            入力と同じ順序の結果のリスト
+        """
+        return await gather_limited(coros, self.get_batch_concurrency())
+
+    def extract_image_bytes(self, response) -> bytes:
+        """画像レスポンスから画像のバイト列を取り出す
+
+        Parameters
+        ----------
+        response : requests.Response
+            APIレスポンス（画像データまたはbase64のartifactsを含むJSON）
+
+        Returns
+        -------
+        bytes
+            画像のバイト列
+        """
+        content_type = response.headers.get('content-type', '')
+        if 'application/json' in content_type:
+            # JSONレスポンスの場合
+            response_data = response.json()
+            if 'artifacts' in response_data and response_data['artifacts']:
+                image_data = response_data['artifacts'][0].get('base64')
+                if image_data:
+                    import base64
+                    return base64.b64decode(image_data)
+                raise Exception("No base64 image data in response")
+            raise Exception("No artifacts in response")
+        elif 'image/' in content_type:
+            # 画像データの場合
+            return response.content
+        raise Exception(f"Unexpected content type: {content_type}")
     
+    async def download_result(self, client, response, content_type: str = None):
+        """ストリーミングで受信したレスポンスを検証し、本文をチャンク単位で読み込む
+
+        大きな結果（3Dモデル、動画、アップスケール画像）をメモリに一括で保持しないよう、
+        本文はサイズに応じてメモリまたは一時ファイルに書き込まれる
+
+        Parameters
+        ----------
+        client : AsyncStabilityAPIClient
+            非同期APIクライアント
+        response : requests.Response
+            stream=Trueで取得したAPIレスポンス
+        content_type : str, optional
+            期待するコンテンツタイプ (例: "image/*")
+
+        Returns
+        -------
+        SpooledBody
+            レスポンス本文
+        """
+        try:
+            self.check_response(response, content_type)
+        except Exception:
+            response.close()
+            raise
+        return await client.download_body(response)
+
+    def bodies_to_tensor(self, client, bodies: list) -> torch.Tensor:
+        """ダウンロードした画像をバッチテンソルへ変換し、一時ファイルを解放する
+
+        Parameters
+        ----------
+        client : AsyncStabilityAPIClient
+            非同期APIクライアント
+        bodies : list
+            画像のSpooledBodyまたはバイト列のリスト
+
+        Returns
+        -------
+        torch.Tensor
+            画像テンソル [B,H,W,C]
+        """
+        try:
+            return client.client.bytes_to_tensor_batch(bodies)
+        finally:
+            for body in bodies:
+                if isinstance(body, SpooledBody):
+                    body.close()
+
     def handle_response(self, response, content_type: str = None) -> bytes:
         """APIレスポンスを処理し、エラーがあれば適切な例外を発生させる
         
@@ -50,6 +186,26 @@ class StabilityBaseNode:
         bytes
             処理されたレスポンスコンテンツ
             
+        Raises
+        ------
+        Exception
+            様々なAPIエラーに対応する例外
+        """
+        self.check_response(response, content_type)
+        return response.content
+
+    def check_response(self, response, content_type: str = None) -> None:
+        """APIレスポンスのステータスとコンテンツタイプを検証する
+
+        本文を読み込まないため、stream=Trueのレスポンスにも使用できる
+
+        Parameters
+        ----------
+        response : requests.Response
+            APIレスポンス
+        content_type : str, optional
+            期待するコンテンツタイプ (例: "image/*", "application/json")
+
         Raises
         ------
         Exception
@@ -93,6 +249,4 @@ class StabilityBaseNode:
         if content_type:
             resp_content_type = response.headers.get('content-type', '')
             if not resp_content_type.startswith(content_type.replace('*', '')):
-                raise ValueError(f"予期しないコンテンツタイプです: {resp_content_type}")
-
-        return response.content
\ No newline at end of file
+                raise ValueError(f"予期しないコンテンツタイプです: {resp_content_type}")
\ No newline at end of file
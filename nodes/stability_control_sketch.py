@@ -50,7 +50,7 @@ class StabilityControlSketch(StabilityBaseNode):
                 api_key: str = "") -> Tuple[torch.Tensor]:
         """スケッチから画像を生成"""
 
-        client = self.get_client(api_key)
+        client = self.get_async_client(api_key)
 
         # 画像サイズのバリデーション
         height, width = image.shape[1:3]
@@ -62,6 +62,26 @@ class StabilityControlSketch(StabilityBaseNode):
         if aspect_ratio < 0.4 or aspect_ratio > 2.5:
             raise ValueError(f"アスペクト比は1:2.5から2.5:1の間である必要があります。現在のアスペクト比: {aspect_ratio:.2f}")
 
+        # バッチの各画像を同時実行数を制限してリクエスト
+        images_bytes = self.run_async(self.gather_batch([
+            self.generate_async(client, item, prompt, negative_prompt, control_strength, seed, style_preset, output_format)
+            for item in client.client.split_batch(image)
+        ]))
+
+        # 結果を入力順に1つのバッチテンソルへ変換
+        image_tensor = client.client.bytes_to_tensor_batch(images_bytes)
+        return (image_tensor,)
+
+    async def generate_async(self,
+                             client,
+                             image: torch.Tensor,
+                             prompt: str,
+                             negative_prompt: str = "",
+                             control_strength: float = 0.7,
+                             seed: int = 0,
+                             style_preset: str = "none",
+                             output_format: str = "png") -> bytes:
+        """スケッチから画像を生成し、画像のバイト列を返す"""
         # リクエストデータの準備
         data = {
             "prompt": prompt,
@@ -78,12 +98,12 @@ class StabilityControlSketch(StabilityBaseNode):
 
         # ファイルの準備
         files = {
-            "image": ("image.png", client.image_to_bytes(image))
+            "image": await client.encode_upload(image)
         }
 
         # APIリクエストを実行
         headers = {"Accept": "image/*"}
-        response = client._make_request(
+        response = await client.request(
             "POST",
             "/v2beta/stable-image/control/sketch",
             data=data,
@@ -94,6 +114,5 @@ class StabilityControlSketch(StabilityBaseNode):
         # レスポンスの処理とエラーチェック
         self.handle_response(response, "image/*")
 
-        # レスポンスを画像テンソルに変換
-        image_tensor = client.bytes_to_tensor(response.content)
-        return (image_tensor,)
\ No newline at end of file
+        # レスポンスの画像データを返す
+        return response.content
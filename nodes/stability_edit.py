@@ -72,15 +72,15 @@ class StabilityEdit(StabilityBaseNode):
             api_key: str = "") -> Tuple[torch.Tensor]:
         """画像を編集"""
 
-        client = self.get_client(api_key)
+        client = self.get_async_client(api_key)
 
         # マスクの前処理
         if mask is not None and edit_type in ["erase", "inpaint"]:
-            # マスクの形状を確認
+            # マスクの形状を[B,H,W]形式に揃える
             if len(mask.shape) == 4:  # [B,C,H,W]形式
-                mask = mask.squeeze(0).squeeze(0)  # [H,W]形式に変換
-            elif len(mask.shape) == 3:  # [B,H,W]形式
-                mask = mask.squeeze(0)  # [H,W]形式に変換
+                mask = mask[:, 0]  # [B,H,W]形式に変換
+            elif len(mask.shape) == 2:  # [H,W]形式
+                mask = mask.unsqueeze(0)  # [1,H,W]形式に変換
 
             # マスクの値を0-1の範囲に正規化
             if mask.dtype != torch.float32:
@@ -117,13 +117,54 @@ class StabilityEdit(StabilityBaseNode):
             if not 0 <= creativity <= 1:
                 raise ValueError("creativityは0から1の間である必要があります")
 
+        # バッチの各画像に対応するマスクを用意（マスクが1枚の場合は全画像で共有）
+        images = client.client.split_batch(image)
+        masks = [mask] * len(images)
+        if mask is not None and edit_type in ["erase", "inpaint"]:
+            if mask.shape[0] == 1:
+                masks = [mask[0]] * len(images)
+            elif mask.shape[0] == len(images):
+                masks = [mask[i] for i in range(len(images))]
+            else:
+                raise ValueError(f"マスクのバッチサイズ({mask.shape[0]})は1または画像のバッチサイズ({len(images)})と一致する必要があります")
+
+        # バッチの各画像を同時実行数を制限してリクエスト
+        images_bytes = self.run_async(self.gather_batch([
+            self.edit_async(client, item, edit_type, prompt, negative_prompt, item_mask, grow_mask, seed,
+                            style_preset, output_format, search_or_select_prompt, left, right, up, down,
+                            creativity)
+            for item, item_mask in zip(images, masks)
+        ]))
+
+        # 結果を入力順に1つのバッチテンソルへ変換
+        image_tensor = client.client.bytes_to_tensor_batch(images_bytes)
+        return (image_tensor,)
+
+    async def edit_async(self,
+                         client,
+                         image: torch.Tensor,
+                         edit_type: str,
+                         prompt: str = "",
+                         negative_prompt: str = "",
+                         mask: Optional[torch.Tensor] = None,
+                         grow_mask: int = 5,
+                         seed: int = 0,
+                         style_preset: str = "none",
+                         output_format: str = "png",
+                         search_or_select_prompt: str = "",
+                         left: int = 0,
+                         right: int = 0,
+                         up: int = 0,
+                         down: int = 0,
+                         creativity: float = 0.5) -> bytes:
+        """画像を編集し、画像のバイト列を返す"""
         # remove-backgroundの場合は最小限のパラメータのみ使用
         if edit_type == "remove-background":
             data = {
                 "output_format": output_format
             }
             files = {
-                "image": ("image.png", client.image_to_bytes(image))
+                "image": await client.encode_upload(image)
             }
         else:
             # リクエストデータの準備
@@ -156,17 +197,16 @@ class StabilityEdit(StabilityBaseNode):
 
             # ファイルの準備
             files = {
-                "image": ("image.png", client.image_to_bytes(image))
+                "image": await client.encode_upload(image)
             }
 
             if edit_type in ["erase", "inpaint"] and mask is not None:
-                # マスクをPNG形式のバイト列に変換
-                mask_bytes = client.image_to_bytes(mask)
-                files["mask"] = ("mask.png", mask_bytes)
+                # マスクは常に可逆形式でエンコード
+                files["mask"] = await client.encode_upload(mask, name="mask", lossless=True)
 
         # APIリクエストを実行
         headers = {"Accept": "image/*"}
-        response = client._make_request(
+        response = await client.request(
             "POST",
             f"/v2beta/stable-image/edit/{edit_type}",
             data=data,
@@ -177,6 +217,5 @@ class StabilityEdit(StabilityBaseNode):
         # レスポンスの処理とエラーチェック
         self.handle_response(response, "image/*")
 
-        # レスポンスを画像テンソルに変換
-        image_tensor = client.bytes_to_tensor(response.content)
-        return (image_tensor,)
\ No newline at end of file
+        # レスポンスの画像データを返す
+        return response.content
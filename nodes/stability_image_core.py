@@ -39,7 +39,23 @@ class StabilityImageCore(StabilityBaseNode):
                 output_format: str = "png",
                 api_key: str = "") -> Tuple[torch.Tensor]:
         """画像を生成"""
-        client = self.get_client(api_key)
+        client = self.get_async_client(api_key)
+        image_bytes = self.run_async(self.generate_async(
+            client, prompt, aspect_ratio, negative_prompt, seed, style_preset, output_format))
+
+        # バイト列を画像テンソルに変換
+        image_tensor = client.client.bytes_to_tensor(image_bytes)
+        return (image_tensor,)
+
+    async def generate_async(self,
+                             client,
+                             prompt: str,
+                             aspect_ratio: str,
+                             negative_prompt: str = "",
+                             seed: int = 0,
+                             style_preset: str = "none",
+                             output_format: str = "png") -> bytes:
+        """画像を生成し、画像のバイト列を返す"""
         # リクエストデータの準備
         data = {
             "prompt": prompt,
@@ -64,7 +80,7 @@ class StabilityImageCore(StabilityBaseNode):
         for key, value in data.items():
             files[key] = (None, str(value))
 
-        response = client._make_request(
+        response = await client.request(
             "POST",
             "/v2beta/stable-image/generate/core",
             files=files,
@@ -75,26 +91,4 @@ class StabilityImageCore(StabilityBaseNode):
         self.handle_response(response, "image/*")
 
         # Content-Typeに基づいて処理を分岐
-        content_type = response.headers.get('content-type', '')
-        if 'application/json' in content_type:
-            # JSONレスポンスの場合
-            response_data = response.json()
-
-            if 'artifacts' in response_data and response_data['artifacts']:
-                image_data = response_data['artifacts'][0].get('base64')
-                if image_data:
-                    import base64
-                    image_bytes = base64.b64decode(image_data)
-                else:
-                    raise Exception("No base64 image data in response")
-            else:
-                raise Exception("No artifacts in response")
-        elif 'image/' in content_type:
-            # 画像データの場合
-            image_bytes = response.content
-        else:
-            raise Exception(f"Unexpected content type: {content_type}")
-
-        # バイト列を画像テンソルに変換
-        image_tensor = client.bytes_to_tensor(image_bytes)
-        return (image_tensor,)
\ No newline at end of file
+        return self.extract_image_bytes(response)
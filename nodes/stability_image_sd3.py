@@ -54,7 +54,36 @@ class StabilityImageSD3(StabilityBaseNode):
                 api_key: str = "") -> Tuple[torch.Tensor]:
         """画像を生成"""
 
-        client = self.get_client(api_key)
+        client = self.get_async_client(api_key)
+        # image-to-imageの場合はバッチの各画像を同時実行数を制限してリクエスト
+        if mode == "image-to-image" and image is not None:
+            images = client.client.split_batch(image)
+        else:
+            images = [image]
+        images_bytes = self.run_async(self.gather_batch([
+            self.generate_async(client, prompt, model, mode, negative_prompt, seed, cfg_scale, item, strength,
+                                aspect_ratio, style_preset, output_format)
+            for item in images
+        ]))
+
+        # 結果を入力順に1つのバッチテンソルへ変換
+        image_tensor = client.client.bytes_to_tensor_batch(images_bytes)
+        return (image_tensor,)
+
+    async def generate_async(self,
+                             client,
+                             prompt: str,
+                             model: str,
+                             mode: str,
+                             negative_prompt: str = "",
+                             seed: int = 0,
+                             cfg_scale: float = 7.0,
+                             image: Optional[torch.Tensor] = None,
+                             strength: float = 0.7,
+                             aspect_ratio: str = "1:1",
+                             style_preset: str = "none",
+                             output_format: str = "png") -> bytes:
+        """画像を生成し、画像のバイト列を返す"""
 
         # リクエストデータの準備
         data = {
@@ -90,9 +119,9 @@ class StabilityImageSD3(StabilityBaseNode):
         
         files = {}
         if mode == "image-to-image":
-            files["image"] = ("image.png", client.image_to_bytes(image))
+            files["image"] = await client.encode_upload(image)
         
-        response = client._make_request(
+        response = await client.request(
                 "POST",
                 "/v2beta/stable-image/generate/sd3",
                 data=data,
@@ -104,25 +133,4 @@ class StabilityImageSD3(StabilityBaseNode):
         self.handle_response(response, "image/*")
         
         # Content-Typeに基づいて処理を分岐
-        content_type = response.headers.get('content-type', '')
-        if 'application/json' in content_type:
-            # JSONレスポンスの場合
-            response_data = response.json()
-            if 'artifacts' in response_data and response_data['artifacts']:
-                image_data = response_data['artifacts'][0].get('base64')
-                if image_data:
-                    import base64
-                    image_bytes = base64.b64decode(image_data)
-                else:
-                    raise Exception("No base64 data in artifact")
-            else:
-                raise Exception("No valid artifacts in response")
-        elif 'image/' in content_type:
-            # 直接画像データが返される場合
-            image_bytes = response.content
-        else:
-            raise Exception(f"Unexpected content type: {content_type}")
-
-        # 画像データをテンソルに変換
-        image_tensor = client.bytes_to_tensor(image_bytes)
-        return (image_tensor,)
\ No newline at end of file
+        return self.extract_image_bytes(response)
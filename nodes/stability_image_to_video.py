@@ -1,9 +1,17 @@
+import os
+import tempfile
 import torch
-from typing import Tuple
+from typing import Dict, Optional, Union, Any
 from .stability_base_node import StabilityBaseNode
-import cv2
-import numpy as np
-import io
+from ..downloads import SpooledBody, BodyDict
+from ..video_decoder import decode_video
+
+try:
+    from comfy_api.input_impl import VideoFromFile
+except ImportError:
+    VideoFromFile = None
+
+OUTPUT_MODES = ["frames", "file", "frames+file"]
 
 class StabilityImageToVideo(StabilityBaseNode):
     """Stability Image to Videoノード"""
@@ -28,22 +36,151 @@ class StabilityImageToVideo(StabilityBaseNode):
             "seed": ("INT", {"default": 0, "min": 0, "max": 4294967295, "step": 1}),
             "cfg_scale": ("FLOAT", {"default": 1.8, "min": 0.0, "max": 10.0, "step": 0.1}),
             "motion_bucket_id": ("INT", {"default": 127, "min": 1, "max": 255, "step": 1}),
+            # デコードするフレームの範囲・間隔・解像度（end_frame=0は最後まで）
+            "start_frame": ("INT", {"default": 0, "min": 0, "max": 10000, "step": 1}),
+            "end_frame": ("INT", {"default": 0, "min": 0, "max": 10000, "step": 1}),
+            "frame_stride": ("INT", {"default": 1, "min": 1, "max": 100, "step": 1}),
+            "scale": ("FLOAT", {"default": 1.0, "min": 0.1, "max": 1.0, "step": 0.05}),
+            # frames: フレームをデコード / file: MP4をそのまま出力フォルダに保存（デコードは先頭フレームのみ）
+            "output_mode": (OUTPUT_MODES, {"default": "frames"}),
+            "filename_prefix": ("STRING", {"default": "stability_video"}),
         })
 
         return types
 
-    RETURN_TYPES = ("IMAGE",)
+    RETURN_TYPES = ("IMAGE", "VIDEO", "STRING")
+    RETURN_NAMES = ("images", "video", "filepath")
     FUNCTION = "generate"
+    OUTPUT_NODE = True
 
     def generate(self,
                 image: torch.Tensor,
                 seed: int = 0,
                 cfg_scale: float = 1.8,
                 motion_bucket_id: int = 127,
-                api_key: str = "") -> Tuple[torch.Tensor]:
-        """画像からビデオを生成"""
+                start_frame: int = 0,
+                end_frame: int = 0,
+                frame_stride: int = 1,
+                scale: float = 1.0,
+                output_mode: str = "frames",
+                filename_prefix: str = "stability_video",
+                api_key: str = "") -> Dict[str, Any]:
+        """画像からビデオを生成
+
+        fileモードで保存したMP4はui出力としてフロントエンドに通知する
+        """
+
+        if end_frame and end_frame <= start_frame:
+            raise ValueError("end_frameはstart_frameより大きい値を指定してください")
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"無効なoutput_modeです: {output_mode}")
+
+        # fileモードではレスポンスを出力フォルダへ直接ストリーミングし、メモリにMP4全体を保持しない
+        filepath = self.get_output_path(filename_prefix) if output_mode != "frames" else None
+
+        client = self.get_async_client(api_key)
+        video_content = self.run_async(
+            self.generate_async(client, image, seed, cfg_scale, motion_bucket_id, destination=filepath))
+
+        if filepath is not None:
+            print(f"[comfyui-stability-ai-api] Saved: {filepath}")
+
+        if output_mode == "file":
+            # IMAGE出力用に先頭フレームだけをデコードする
+            frames_tensor = decode_video(video_content, end_frame=1, scale=scale)
+        else:
+            # 選択したフレームだけを1枚ずつデコードし、確保済みの[T, H, W, C]テンソルへ直接書き込む
+            frames_tensor = decode_video(
+                video_content,
+                start_frame=start_frame,
+                end_frame=end_frame or None,
+                stride=frame_stride,
+                scale=scale
+            )
+
+        result = (frames_tensor, self.to_video_output(video_content), filepath or "")
+        if filepath is None:
+            return {"ui": {}, "result": result}
+        # 保存したMP4をフロントエンドのノード上に表示する（ComfyUIのSaveVideoと同じ形式）
+        return {"ui": {"images": [self.saved_file_info(filepath)], "animated": (True,)}, "result": result}
+
+    def saved_file_info(self, filepath: str) -> dict:
+        """保存したファイルをフロントエンドが参照する形式（filename, subfolder, type）に変換"""
+        try:
+            import folder_paths
+            output_dir = folder_paths.get_output_directory()
+        except ImportError:
+            # get_output_pathと同じく、ComfyUI外ではカレントディレクトリのoutput
+            output_dir = "output"
+        subfolder = os.path.relpath(os.path.dirname(filepath), output_dir)
+        return {
+            "filename": os.path.basename(filepath),
+            "subfolder": "" if subfolder == "." else subfolder,
+            "type": "output",
+        }
 
-        client = self.get_client(api_key)
+    def get_output_path(self, filename_prefix: str) -> str:
+        """ComfyUIの出力フォルダ内に、既存ファイルと重複しないMP4のパスを作成"""
+        try:
+            import folder_paths
+        except ImportError:
+            folder_paths = None
+
+        if folder_paths is not None:
+            full_output_folder, filename, counter, _, _ = folder_paths.get_save_image_path(
+                filename_prefix, folder_paths.get_output_directory())
+            return os.path.join(full_output_folder, f"{filename}_{counter:05}_.mp4")
+
+        # ComfyUI外で実行された場合はカレントディレクトリのoutputに保存
+        output_dir = "output"
+        os.makedirs(output_dir, exist_ok=True)
+        counter = 1
+        while os.path.exists(os.path.join(output_dir, f"{filename_prefix}_{counter:05}_.mp4")):
+            counter += 1
+        return os.path.join(output_dir, f"{filename_prefix}_{counter:05}_.mp4")
+
+    def get_temp_video_path(self) -> str:
+        """VIDEO出力用のMP4ファイルを一時フォルダに作成（ComfyUIの一時フォルダは起動時に削除される）"""
+        try:
+            import folder_paths
+            directory = folder_paths.get_temp_directory()
+        except ImportError:
+            directory = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix="stability-video-", suffix=".mp4", dir=directory)
+        os.close(fd)
+        return path
+
+    def to_video_output(self, video_content: Union[SpooledBody, str]):
+        """VIDEO出力を作成（MP4の本文または保存先パス）
+
+        ComfyUIのビデオAPIがあればVideoFromFileを返し、
+        なければ{"body": SpooledBody, "mimetype"}形式の辞書を返す。本文を渡した場合、その解放はこのメソッドが行う
+        """
+        if isinstance(video_content, str):
+            if VideoFromFile is not None:
+                return VideoFromFile(video_content)
+            return {"path": video_content, "mimetype": "video/mp4"}
+        if VideoFromFile is not None:
+            # 本文をメモリに読み込まず、一時ファイルへ移して（ディスク上ならハードリンクで）渡す
+            with video_content:
+                path = self.get_temp_video_path()
+                video_content.persist(path)
+            return VideoFromFile(path)
+        return BodyDict(body=video_content, mimetype="video/mp4")
+
+    async def generate_async(self,
+                             client,
+                             image: torch.Tensor,
+                             seed: int = 0,
+                             cfg_scale: float = 1.8,
+                             motion_bucket_id: int = 127,
+                             destination: Optional[str] = None) -> Union[SpooledBody, str]:
+        """画像からビデオを生成し、MP4の本文を返す
+
+        destinationを指定した場合は、結果をストリーミングでそのファイルに書き込み、パスを返す
+        """
 
         # リクエストデータの準備
         data = {
@@ -53,64 +190,40 @@ class StabilityImageToVideo(StabilityBaseNode):
         }
 
         files = {
-            "image": ("image.png", client.image_to_bytes(image))
+            "image": await client.encode_upload(image)
         }
 
         # 生成を開始
-        response = client._make_request(
+        response = await client.request(
             "POST",
             "/v2beta/image-to-video",
             data=data,
             files=files
         )
 
+        if "id" not in response.json():
+            throw_error = response.json().get("errors", response.json())
+            raise Exception(throw_error)
+
         generation_id = response.json()["id"]
 
-        if response.status_code == 200:
-            # 生成完了まで待機
-            while True:
-                response = client._make_request(
-                    "GET",
-                    f"/v2beta/image-to-video/result/{generation_id}",
-                    headers={"Accept": "video/*"}
-                )
-                
-                # レスポンスの処理とエラーチェック
-                self.handle_response(response, "video/*")
-
-                # ビデオデータをバイトストリームとして読み込む
-                video_bytes = io.BytesIO(response.content)
-
-                # 一時ファイルにビデオを保存
-                temp_file = "temp_video.mp4"
-                with open(temp_file, "wb") as f:
-                    f.write(response.content)
-
-                # ビデオを読み込む
-                cap = cv2.VideoCapture(temp_file)
-
-                frames = []
-                while True:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    # BGRからRGBに変換
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    frames.append(frame)
-
-                cap.release()
-                import os
-                os.remove(temp_file)
-
-                # フレームをnumpy配列に変換 [B, H, W, C]形式
-                frames_array = np.stack(frames)
-                # float32に変換し、0-1の範囲にスケーリング
-                frames_array = frames_array.astype(np.float32) / 255.0
-                # フレームをtorch.Tensorに変換（形状は[B, H, W, C]のまま）
-                frames_tensor = torch.from_numpy(frames_array)
-
-                return (frames_tensor,)
+        # 生成完了まで待機（202の間はイベントループをブロックせずに待つ）
+        response = await client.poll(
+            f"/v2beta/image-to-video/result/{generation_id}",
+            headers={"Accept": "video/*"},
+            timeout=600.0,
+            stream=True
+        )
 
-        else:
-            throw_error = response.json()["error"]
-            raise Exception(throw_error)
\ No newline at end of file
+        if destination is not None:
+            # 本文を読み込まずに検証し、チャンク単位でファイルへ書き込む
+            try:
+                self.check_response(response, "video/*")
+            except Exception:
+                response.close()
+                raise
+            await client.save_response(response, destination)
+            return destination
+
+        # レスポンスの処理とエラーチェックを行い、本文をチャンク単位で受信
+        return await self.download_result(client, response, "video/*")
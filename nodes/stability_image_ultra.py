@@ -51,7 +51,30 @@ class StabilityImageUltra(StabilityBaseNode):
         """画像を生成"""
 
         # APIクライアントを取得（APIキーが指定されている場合はそれを使用）
-        client = self.get_client(api_key)
+        client = self.get_async_client(api_key)
+        # image-to-imageの場合はバッチの各画像を同時実行数を制限してリクエスト
+        images = client.client.split_batch(image) if image is not None else [None]
+        images_bytes = self.run_async(self.gather_batch([
+            self.generate_async(client, prompt, aspect_ratio, negative_prompt, seed, style_preset, output_format,
+                                item, strength)
+            for item in images
+        ]))
+
+        # 結果を入力順に1つのバッチテンソルへ変換
+        image_tensor = client.client.bytes_to_tensor_batch(images_bytes)
+        return (image_tensor,)
+
+    async def generate_async(self,
+                             client,
+                             prompt: str,
+                             aspect_ratio: str,
+                             negative_prompt: str = "",
+                             seed: int = 0,
+                             style_preset: str = "none",
+                             output_format: str = "png",
+                             image: Optional[torch.Tensor] = None,
+                             strength: float = 0.7) -> bytes:
+        """画像を生成し、画像のバイト列を返す"""
 
         # 入力画像のバリデーション
         if image is not None:
@@ -87,7 +110,7 @@ class StabilityImageUltra(StabilityBaseNode):
         files = {}
         if image is not None:
             data["strength"] = strength
-            files["image"] = ("image.png", client.image_to_bytes(image))
+            files["image"] = await client.encode_upload(image)
         else:
             # text-to-imageの場合はアスペクト比を指定
             data["aspect_ratio"] = aspect_ratio
@@ -102,7 +125,7 @@ class StabilityImageUltra(StabilityBaseNode):
             files[key] = (None, str(value))
 
 
-        response = client._make_request(
+        response = await client.request(
             "POST",
             "/v2beta/stable-image/generate/ultra",
             files=files,
@@ -113,25 +136,4 @@ class StabilityImageUltra(StabilityBaseNode):
         self.handle_response(response, "image/*")
 
         # Content-Typeに基づいて処理を分岐
-        content_type = response.headers.get('content-type', '')
-        if 'application/json' in content_type:
-            # JSONレスポンスの場合
-            response_data = response.json()
-            if 'artifacts' in response_data and response_data['artifacts']:
-                image_data = response_data['artifacts'][0].get('base64')
-                if image_data:
-                    import base64
-                    image_bytes = base64.b64decode(image_data)
-                else:
-                    raise Exception("No base64 image data in response")
-            else:
-                raise Exception("No artifacts in response")
-        elif 'image/' in content_type:
-            # 画像データの場合
-            image_bytes = response.content
-        else:
-            raise Exception(f"Unexpected content type: {content_type}")
-
-        # バイト列を画像テンソルに変換
-        image_tensor = client.bytes_to_tensor(image_bytes)
-        return (image_tensor,)
\ No newline at end of file
+        return self.extract_image_bytes(response)
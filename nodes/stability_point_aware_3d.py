@@ -1,7 +1,9 @@
 # nodes/stability_point_aware_3d.py
 import torch
-from typing import Tuple
+from typing import Tuple, List
 from .stability_base_node import StabilityBaseNode
+from ..downloads import SpooledBody
+from ..model_3d import Model3D
 
 class StablePointAware3D(StabilityBaseNode):
     """Stable Point Aware 3D (SPAR3D)を使用して3Dアセットを生成するノード。
@@ -40,6 +42,8 @@ class StablePointAware3D(StabilityBaseNode):
 
     RETURN_TYPES = ("MODEL_3D",)  # GLBファイルをバイト列として返す
     RETURN_NAMES = ("model_3d",)
+    # バッチの画像ごとに1つのモデルをリストで返す
+    OUTPUT_IS_LIST = (True,)
     FUNCTION = "generate"
 
     def generate(self,
@@ -51,10 +55,10 @@ class StablePointAware3D(StabilityBaseNode):
                 target_count: int = 5000,
                 guidance_scale: float = 3.0,
                 seed: int = 0,
-                api_key: str = "") -> Tuple[bytes]:
+                api_key: str = "") -> Tuple[List[Model3D]]:
         """3Dモデルを生成
         """
-        client = self.get_client(api_key)
+        client = self.get_async_client(api_key)
 
         # 画像サイズのバリデーション
         height, width = image.shape[1:3]
@@ -63,6 +67,27 @@ class StablePointAware3D(StabilityBaseNode):
         if width * height < 4096 or width * height > 4194304:
             raise ValueError(f"総ピクセル数は4,096px以上4,194,304px以下である必要があります。現在のピクセル数: {width * height}px")
 
+        # バッチの各画像を同時実行数を制限してリクエスト
+        model_bodies = self.run_async(self.gather_batch([
+            self.generate_async(client, item, texture_resolution, foreground_ratio, remesh, target_type, target_count,
+                                guidance_scale, seed)
+            for item in client.client.split_batch(image)
+        ]))
+
+        # GLBはファイルとして保持し、ノード間ではバイト列ではなくファイルへの参照を渡す
+        return ([Model3D.from_body(body, "model/gltf-binary") for body in model_bodies],)
+
+    async def generate_async(self,
+                             client,
+                             image: torch.Tensor,
+                             texture_resolution: str = "1024",
+                             foreground_ratio: float = 1.3,
+                             remesh: str = "none",
+                             target_type: str = "none",
+                             target_count: int = 5000,
+                             guidance_scale: float = 3.0,
+                             seed: int = 0) -> SpooledBody:
+        """3Dモデルを生成し、GLBの本文を返す"""
         # リクエストデータの準備
         data = {
             "texture_resolution": texture_resolution,
@@ -80,15 +105,17 @@ class StablePointAware3D(StabilityBaseNode):
 
         # ファイルの準備
         files = {
-            "image": ("image.png", client.image_to_bytes(image))
+            "image": await client.encode_upload(image)
         }
 
         # APIリクエストを実行
-        response = client._make_request(
+        response = await client.request(
             "POST",
             "/v2beta/3d/stable-point-aware-3d",
             data=data,
-            files=files
+            files=files,
+            stream=True
         )
 
-        return ({"string": response.content, "mimetype": "model/gltf-binary"},)
\ No newline at end of file
+        # GLBをチャンク単位で受信
+        return await self.download_result(client, response)
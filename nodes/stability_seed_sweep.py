@@ -0,0 +1,179 @@
+import itertools
+import torch
+from typing import Tuple, List
+from .stability_base_node import StabilityBaseNode
+from .stability_image_core import StabilityImageCore
+from .stability_image_ultra import StabilityImageUltra
+from .stability_image_sd3 import StabilityImageSD3
+from ..async_client import gather_limited
+from ..image_codec import decode_letterboxed, image_size
+
+# エンジンごとの対応アスペクト比
+ASPECT_RATIOS = {
+    "core": ["1:1", "16:9", "21:9", "2:3", "3:2", "4:5", "5:4", "9:16", "9:21"],
+    "ultra": ["1:1", "16:9", "21:9", "2:3", "3:2", "4:5", "5:4", "9:16", "9:21"],
+    "sd3": ["1:1", "3:2", "4:3", "16:9", "2:3", "3:4", "9:16"],
+}
+
+# エンジンごとの対応スタイルプリセット
+STYLE_PRESETS = {
+    "core": ["none", "3d-model", "analog-film", "anime", "cinematic", "comic-book", "digital-art",
+             "enhance", "fantasy-art", "isometric", "line-art", "low-poly", "modeling-compound",
+             "neon-punk", "origami", "photographic", "pixel-art", "tile-texture"],
+    "ultra": ["none", "3d-model", "analog-film", "anime", "cinematic", "comic-book", "digital-art",
+              "enhance", "fantasy-art", "isometric", "line-art", "low-poly", "modeling-compound",
+              "neon-punk", "origami", "photographic", "pixel-art", "tile-texture"],
+    "sd3": ["none", "enhance", "anime", "photographic", "digital-art", "comic-book", "pixel-art", "cinematic",
+            "3d-model", "origami"],
+}
+
+# 1回の実行で生成するバリエーションの上限（クレジットの使い過ぎを防ぐ）
+MAX_VARIANTS = 64
+MAX_SEED = 4294967294
+
+
+def parse_seeds(text: str) -> List[int]:
+    """シード指定文字列をシードのリストに変換
+
+    カンマ区切りの値と範囲指定を組み合わせられる（例: "1, 5, 100-103"）。
+    範囲の終端は含む。
+    """
+    seeds = []
+    for part in text.replace("\n", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start, end = (int(v) for v in part.split("-", 1))
+                if end < start:
+                    raise ValueError
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"無効なシード指定です: {part}")
+        if len(seeds) + end - start + 1 > MAX_VARIANTS:
+            raise ValueError(f"シードの数が上限（{MAX_VARIANTS}）を超えています")
+        seeds.extend(range(start, end + 1))
+    for seed in seeds:
+        if seed < 0 or seed > MAX_SEED:
+            raise ValueError(f"シードは0以上{MAX_SEED}以下である必要があります: {seed}")
+    return seeds
+
+
+def parse_list(text: str, allowed: List[str], name: str) -> List[str]:
+    """カンマ区切りの選択肢を検証してリストに変換"""
+    values = [v.strip() for v in text.replace("\n", ",").split(",") if v.strip()]
+    for value in values:
+        if value not in allowed:
+            raise ValueError(f"無効な{name}です: {value}（指定可能: {', '.join(allowed)}）")
+    return values
+
+
+class StabilitySeedSweep(StabilityBaseNode):
+    """複数のシード・スタイル・アスペクト比で画像を同時に生成するノード
+
+    Core / Ultra / SD3の各ノードと同じリクエストを組み合わせごとに作成し、
+    同時実行数とレート制限の範囲内で並列に送信する。
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        # 親クラスのINPUT_TYPESを取得
+        types = super().INPUT_TYPES()
+        # 必要な入力を追加
+        if "required" not in types:
+            types["required"] = {}
+        if "optional" not in types:
+            types["optional"] = {}
+
+        # required入力を追加
+        types["required"].update({
+            "engine": (["core", "ultra", "sd3"], {"default": "core"}),
+            "prompt": ("STRING", {"default": "", "multiline": True}),
+            # カンマ区切りと範囲指定（例: "1-16" や "7, 42, 1234"）
+            "seeds": ("STRING", {"default": "1-16"}),
+        })
+
+        # optional入力を追加
+        types["optional"].update({
+            "negative_prompt": ("STRING", {"default": "", "multiline": True}),
+            # カンマ区切りで複数指定すると、すべての組み合わせを生成
+            "aspect_ratios": ("STRING", {"default": "1:1"}),
+            "style_presets": ("STRING", {"default": "none"}),
+            "sd3_model": (["sd3.5-large", "sd3.5-large-turbo", "sd3.5-medium", "sd3-large", "sd3-large-turbo", "sd3-medium"],),
+            "cfg_scale": ("FLOAT", {"default": 7.0, "min": 1.0, "max": 10.0, "step": 0.1}),
+            "output_format": (["png", "webp"], {"default": "png"}),
+            # 0の場合はconfig.iniの[batch] max_concurrencyを使用
+            "max_concurrency": ("INT", {"default": 0, "min": 0, "max": MAX_VARIANTS, "step": 1}),
+        })
+
+        return types
+
+    RETURN_TYPES = ("IMAGE", "STRING")
+    RETURN_NAMES = ("images", "seeds")
+    FUNCTION = "generate"
+
+    def generate(self,
+                engine: str,
+                prompt: str,
+                seeds: str,
+                negative_prompt: str = "",
+                aspect_ratios: str = "1:1",
+                style_presets: str = "none",
+                sd3_model: str = "sd3.5-large",
+                cfg_scale: float = 7.0,
+                output_format: str = "png",
+                max_concurrency: int = 0,
+                api_key: str = "") -> Tuple[torch.Tensor, str]:
+        """シードなどの組み合わせごとに画像を並列に生成"""
+
+        if engine not in ASPECT_RATIOS:
+            raise ValueError(f"無効なエンジンです: {engine}")
+        seed_list = parse_seeds(seeds)
+        ratio_list = parse_list(aspect_ratios, ASPECT_RATIOS[engine], "アスペクト比") or ["1:1"]
+        style_list = parse_list(style_presets, STYLE_PRESETS[engine], "スタイルプリセット") or ["none"]
+        if not seed_list:
+            raise ValueError("シードを1つ以上指定してください")
+
+        variants = list(itertools.product(style_list, ratio_list, seed_list))
+        if len(variants) > MAX_VARIANTS:
+            raise ValueError(f"組み合わせの数が上限（{MAX_VARIANTS}）を超えています: {len(variants)}")
+
+        client = self.get_async_client(api_key)
+        limit = max_concurrency or self.get_batch_concurrency()
+        images_bytes = self.run_async(gather_limited([
+            self.generate_variant_async(client, engine, prompt, negative_prompt, seed, aspect_ratio, style_preset,
+                                        sd3_model, cfg_scale, output_format)
+            for style_preset, aspect_ratio, seed in variants
+        ], limit))
+
+        # アスペクト比が混在する場合は最大サイズのキャンバスにレターボックスで配置
+        if len({image_size(data) for data in images_bytes}) > 1:
+            image_tensor = decode_letterboxed(images_bytes)
+        else:
+            image_tensor = client.client.bytes_to_tensor_batch(images_bytes)
+
+        return (image_tensor, ", ".join(str(seed) for _, _, seed in variants))
+
+    async def generate_variant_async(self,
+                                     client,
+                                     engine: str,
+                                     prompt: str,
+                                     negative_prompt: str,
+                                     seed: int,
+                                     aspect_ratio: str,
+                                     style_preset: str,
+                                     sd3_model: str,
+                                     cfg_scale: float,
+                                     output_format: str) -> bytes:
+        """1つの組み合わせを各エンジンのノードと同じ方法で生成し、画像のバイト列を返す"""
+        if engine == "core":
+            return await StabilityImageCore().generate_async(
+                client, prompt, aspect_ratio, negative_prompt, seed, style_preset, output_format)
+        if engine == "ultra":
+            return await StabilityImageUltra().generate_async(
+                client, prompt, aspect_ratio, negative_prompt, seed, style_preset, output_format)
+        return await StabilityImageSD3().generate_async(
+            client, prompt, sd3_model, "text-to-image", negative_prompt, seed, cfg_scale, None, 0.7,
+            aspect_ratio, style_preset, output_format)
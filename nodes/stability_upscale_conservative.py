@@ -1,6 +1,7 @@
 import torch
 from typing import Tuple
 from .stability_base_node import StabilityBaseNode
+from ..downloads import SpooledBody
 
 class StabilityUpscaleConservative(StabilityBaseNode):
     """保守的な画像アップスケールを行うノード。"""
@@ -50,7 +51,7 @@ class StabilityUpscaleConservative(StabilityBaseNode):
                 api_key: str = "") -> Tuple[torch.Tensor]:
         """画像を保守的にアップスケール"""
 
-        client = self.get_client(api_key)
+        client = self.get_async_client(api_key)
 
         # 画像サイズのバリデーション
         height, width = image.shape[1:3]
@@ -62,6 +63,26 @@ class StabilityUpscaleConservative(StabilityBaseNode):
         if aspect_ratio < 0.4 or aspect_ratio > 2.5:
             raise ValueError(f"アスペクト比は1:2.5から2.5:1の間である必要があります。現在のアスペクト比: {aspect_ratio:.2f}")
 
+        # バッチの各画像を同時実行数を制限してリクエスト
+        bodies = self.run_async(self.gather_batch([
+            self.upscale_async(client, item, prompt, negative_prompt, seed, creativity, style_preset, output_format)
+            for item in client.client.split_batch(image)
+        ]))
+
+        # 結果を入力順に1つのバッチテンソルへ変換
+        image_tensor = self.bodies_to_tensor(client, bodies)
+        return (image_tensor,)
+
+    async def upscale_async(self,
+                            client,
+                            image: torch.Tensor,
+                            prompt: str,
+                            negative_prompt: str = "",
+                            seed: int = 0,
+                            creativity: float = 0.35,
+                            style_preset: str = "none",
+                            output_format: str = "png") -> SpooledBody:
+        """画像を保守的にアップスケールし、画像の本文を返す"""
         # リクエストデータの準備
         data = {
             "prompt": prompt,
@@ -77,27 +98,18 @@ class StabilityUpscaleConservative(StabilityBaseNode):
             data["style_preset"] = style_preset
 
         files = {
-            "image": ("image.png", client.image_to_bytes(image))
+            "image": await client.encode_upload(image)
         }
 
         # 生成開始リクエスト - image/*を使用
-        response = client._make_request(
+        response = await client.request(
             "POST",
             "/v2beta/stable-image/upscale/conservative",
             data=data,
             files=files,
-            headers={"Accept": "image/*"}
+            headers={"Accept": "image/*"},
+            stream=True
         )
-        
-        # レスポンスの処理とエラーチェック
-        self.handle_response(response, "image/*")
-
-        # Content-Typeに基づいて処理
-        content_type = response.headers.get('content-type', '')
-
-        if 'image/' in content_type:
-            # 画像データを直接テンソルに変換
-            image_tensor = client.bytes_to_tensor(response.content)
-            return (image_tensor,)
-        else:
-            raise Exception(f"Unexpected content type received: {content_type}")
\ No newline at end of file
+
+        # レスポンスの処理とエラーチェックを行い、画像データをチャンク単位で受信
+        return await self.download_result(client, response, "image/*")
\ No newline at end of file
@@ -1,7 +1,7 @@
 import torch
-from typing import Tuple
+from typing import Tuple, Union
 from .stability_base_node import StabilityBaseNode
-import time
+from ..downloads import SpooledBody
 
 class StabilityUpscaleCreative(StabilityBaseNode):
     """クリエイティブな画像アップスケールを行うノード。"""
@@ -50,7 +50,7 @@ class StabilityUpscaleCreative(StabilityBaseNode):
                 output_format: str = "png",
                 api_key: str = "") -> Tuple[torch.Tensor]:
         """画像をクリエイティブにアップスケール"""
-        client = self.get_client(api_key)
+        client = self.get_async_client(api_key)
 
         # 画像サイズのバリデーション
         height, width = image.shape[1:3]
@@ -59,6 +59,26 @@ class StabilityUpscaleCreative(StabilityBaseNode):
         if width * height < 4096 or width * height > 1048576:
             raise ValueError(f"総ピクセル数は4096px以上1048576px以下である必要があります。現在のピクセル数: {width * height}px")
 
+        # バッチの各画像を同時実行数を制限してリクエスト
+        bodies = self.run_async(self.gather_batch([
+            self.upscale_async(client, item, prompt, negative_prompt, seed, creativity, style_preset, output_format)
+            for item in client.client.split_batch(image)
+        ]))
+
+        # 結果を入力順に1つのバッチテンソルへ変換
+        image_tensor = self.bodies_to_tensor(client, bodies)
+        return (image_tensor,)
+
+    async def upscale_async(self,
+                            client,
+                            image: torch.Tensor,
+                            prompt: str,
+                            negative_prompt: str = "",
+                            seed: int = 0,
+                            creativity: float = 0.3,
+                            style_preset: str = "none",
+                            output_format: str = "png") -> Union[SpooledBody, bytes]:
+        """画像をクリエイティブにアップスケールし、画像の本文を返す"""
         # リクエストデータの準備
         data = {
             "prompt": prompt,
@@ -74,11 +94,11 @@ class StabilityUpscaleCreative(StabilityBaseNode):
             data["style_preset"] = style_preset
 
         files = {
-            "image": ("image.png", client.image_to_bytes(image))
+            "image": await client.encode_upload(image)
         }
 
         # 生成開始リクエスト
-        init_response = client._make_request(
+        init_response = await client.request(
             "POST",
             "/v2beta/stable-image/upscale/creative",
             data=data,
@@ -93,55 +113,20 @@ class StabilityUpscaleCreative(StabilityBaseNode):
 
         generation_id = init_data["id"]
 
-        # 生成完了を待機（最大5分）
-        retry_count = 0
-        max_retries = 30  # 10秒 × 30回 = 5分
-
-        while retry_count < max_retries:
-            try:
-                # 結果取得リクエスト - application/jsonを使用
-                poll_response = client._make_request(
-                    "GET",
-                    f"/v2beta/results/{generation_id}",
-                    headers={"Accept": "*/*"}  # ヘッダーを*/*に変更
-                )
-                if poll_response.status_code == 200:
-                    # アップスケール完了
-
-                    # Content-Typeに基づいて処理を分岐
-                    content_type = poll_response.headers.get('content-type', '')
-
-                    if 'application/json' in content_type:
-                        # JSONレスポンスの場合
-                        response_data = poll_response.json()
-                        if 'artifacts' in response_data and response_data['artifacts']:
-                            if 'base64' in response_data['artifacts'][0]:
-                                import base64
-                                image_data = base64.b64decode(response_data['artifacts'][0]['base64'])
-                            else:
-                                raise Exception("No base64 data in artifact")
-                        else:
-                            raise Exception("No valid artifacts in response")
-
-                    elif 'image/' in content_type:
-                        # 直接画像データが返される場合
-                        image_data = poll_response.content
-                    else:
-                        raise Exception(f"Unexpected content type: {content_type}")
-
-                    # 画像データをテンソルに変換
-                    image_tensor = client.bytes_to_tensor(image_data)
-                    return (image_tensor,)
-
-                elif poll_response.status_code == 202:
-                    # まだ生成中
-                    time.sleep(10)  # 10秒待機
-                    retry_count += 1
-                    continue
-                else:
-                    raise Exception(f"Unexpected status code: {poll_response.status_code}")
-
-            except Exception as e:
-                raise Exception(f"Error while waiting for upscale completion: {str(e)}")
-
-        raise Exception("Upscale timed out after 5 minutes")
\ No newline at end of file
+        # 生成完了を待機（最大5分）。待機中はイベントループをブロックしない
+        try:
+            poll_response = await client.poll(
+                f"/v2beta/results/{generation_id}",
+                headers={"Accept": "*/*"},
+                timeout=300.0,
+                stream=True
+            )
+        except TimeoutError:
+            raise Exception("Upscale timed out after 5 minutes")
+        except Exception as e:
+            raise Exception(f"Error while waiting for upscale completion: {str(e)}")
+
+        # Content-Typeに基づいて処理を分岐（画像はチャンク単位で受信、JSONはbase64をデコード）
+        if 'image/' in poll_response.headers.get('content-type', ''):
+            return await self.download_result(client, poll_response, "image/*")
+        return self.extract_image_bytes(poll_response)
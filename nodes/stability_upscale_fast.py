@@ -1,6 +1,7 @@
 import torch
 from typing import Tuple
 from .stability_base_node import StabilityBaseNode
+from ..downloads import SpooledBody
 
 class StabilityUpscaleFast(StabilityBaseNode):
     """高速な画像アップスケールを行うノード"""
@@ -36,7 +37,7 @@ class StabilityUpscaleFast(StabilityBaseNode):
                 api_key: str = "") -> Tuple[torch.Tensor]:
         """画像を高速にアップスケール"""
 
-        client = self.get_client(api_key)
+        client = self.get_async_client(api_key)
 
         # 画像サイズのバリデーション
         height, width = image.shape[1:3]
@@ -47,28 +48,40 @@ class StabilityUpscaleFast(StabilityBaseNode):
         if width * height < 1024 or width * height > 1048576:
             raise ValueError(f"総ピクセル数は1024px以上1048576px以下である必要があります。現在のピクセル数: {width * height}px")
 
+        # バッチの各画像を同時実行数を制限してリクエスト
+        bodies = self.run_async(self.gather_batch([
+            self.upscale_async(client, item, output_format)
+            for item in client.client.split_batch(image)
+        ]))
+
+        # 結果を入力順に1つのバッチテンソルへ変換
+        image_tensor = self.bodies_to_tensor(client, bodies)
+        return (image_tensor,)
+
+    async def upscale_async(self,
+                            client,
+                            image: torch.Tensor,
+                            output_format: str = "png") -> SpooledBody:
+        """画像を高速にアップスケールし、画像の本文を返す"""
         # リクエストデータの準備
         data = {
             "output_format": output_format
         }
 
         files = {
-            "image": ("image.png", client.image_to_bytes(image)),
+            "image": await client.encode_upload(image),
         }
 
         # APIリクエストを実行
         headers = {"Accept": "image/*"}
-        response = client._make_request(
+        response = await client.request(
             "POST",
             "/v2beta/stable-image/upscale/fast",
             data=data,
             files=files,
-            headers=headers
+            headers=headers,
+            stream=True
         )
-        
-        # レスポンスの処理とエラーチェック
-        self.handle_response(response, "image/*")
 
-        # レスポンスを画像テンソルに変換
-        image_tensor = client.bytes_to_tensor(response.content)
-        return (image_tensor,)
\ No newline at end of file
+        # レスポンスの処理とエラーチェックを行い、画像データをチャンク単位で受信
+        return await self.download_result(client, response, "image/*")
@@ -0,0 +1,144 @@
+import torch
+from typing import Tuple, List
+from .stability_upscale_creative import StabilityUpscaleCreative
+from .stability_upscale_conservative import StabilityUpscaleConservative
+from ..downloads import SpooledBody
+from ..image_codec import image_size, decode_into
+from ..tiling import tile_grid, feather_weights
+from ..credit_ledger import CreditLedger
+
+# モードごとのタイル1枚あたりの入力ピクセル数の上限
+MAX_TILE_PIXELS = {
+    "creative": 1048576,
+    "conservative": 9437184,
+}
+
+
+class StabilityUpscaleTiled(StabilityUpscaleCreative):
+    """APIのピクセル数上限を超える画像をタイルに分割してアップスケールするノード
+
+    入力画像を重なりのある同じサイズのタイルに分割し、creativeまたはconservativeの
+    エンドポイントで並列にアップスケールした後、重なり部分をぼかしながら
+    確保済みの1枚のキャンバスへ合成する。
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        # アップスケールノードの入力を引き継ぐ
+        types = super().INPUT_TYPES()
+
+        types["required"].update({
+            "mode": (["creative", "conservative"], {"default": "creative"}),
+        })
+
+        types["optional"].update({
+            "creativity": ("FLOAT", {"default": 0.3, "min": 0.1, "max": 0.5, "step": 0.01}),
+            # タイルの最大辺長と、隣接タイルの最小の重なり（入力画像のピクセル単位）
+            "tile_size": ("INT", {"default": 1024, "min": 256, "max": 3072, "step": 64}),
+            "overlap": ("INT", {"default": 96, "min": 16, "max": 512, "step": 16}),
+            # 1回の実行で送信するタイル数（バッチ全体）の上限。超える場合はリクエスト前にエラーにする
+            "max_tiles": ("INT", {"default": 16, "min": 1, "max": 1024, "step": 1}),
+        })
+
+        return types
+
+    RETURN_TYPES = ("IMAGE",)
+    FUNCTION = "upscale_tiled"
+
+    def upscale_tiled(self,
+                      image: torch.Tensor,
+                      prompt: str,
+                      mode: str = "creative",
+                      negative_prompt: str = "",
+                      seed: int = 0,
+                      creativity: float = 0.3,
+                      style_preset: str = "none",
+                      output_format: str = "png",
+                      tile_size: int = 1024,
+                      overlap: int = 96,
+                      max_tiles: int = 16,
+                      api_key: str = "") -> Tuple[torch.Tensor]:
+        """画像をタイル分割してアップスケール"""
+
+        if mode not in MAX_TILE_PIXELS:
+            raise ValueError(f"無効なモードです: {mode}")
+        if mode == "conservative" and creativity < 0.2:
+            raise ValueError("conservativeモードのcreativityは0.2以上である必要があります")
+        if overlap * 2 >= tile_size:
+            raise ValueError("overlapはtile_sizeの半分未満である必要があります")
+
+        # 画像サイズのバリデーション
+        batch, height, width = image.shape[0:3]
+        if width < 64 or height < 64:
+            raise ValueError(f"画像の辺は64px以上である必要があります。現在のサイズ: {width}x{height}px")
+
+        tile_w, tile_h, xs, ys = tile_grid(width, height, tile_size, overlap)
+        if tile_w * tile_h > MAX_TILE_PIXELS[mode]:
+            raise ValueError(f"タイルのピクセル数が上限を超えています（{tile_w}x{tile_h}px）。tile_sizeを小さくしてください")
+        if tile_w * tile_h < 4096:
+            raise ValueError(f"タイルのピクセル数は4096px以上である必要があります（{tile_w}x{tile_h}px）")
+
+        # タイル数が上限を超える場合は、クレジットを消費する前に見積もりとともにエラーにする
+        tiles = [(b, y, x) for b in range(batch) for y in ys for x in xs]
+        if len(tiles) > max_tiles:
+            cost = CreditLedger.from_config().estimate("POST", f"/v2beta/stable-image/upscale/{mode}")
+            raise ValueError(
+                f"タイル数が上限を超えています: {len(xs)}x{len(ys)}タイル x {batch}枚 = {len(tiles)}タイル"
+                f"（max_tiles: {max_tiles}、推定{len(tiles) * cost:g}クレジット）。"
+                f"max_tilesを増やすか、tile_sizeを大きくしてください")
+
+        # 全タイルを同時実行数を制限してリクエスト（seedが0の場合はタイルごとに異なるシードになる）
+        node = StabilityUpscaleCreative() if mode == "creative" else StabilityUpscaleConservative()
+        client = self.get_async_client(api_key)
+        bodies = self.run_async(self.gather_batch([
+            node.upscale_async(client, image[b:b + 1, y:y + tile_h, x:x + tile_w], prompt, negative_prompt,
+                               seed, creativity, style_preset, output_format)
+            for b, y, x in tiles
+        ]))
+
+        try:
+            image_tensor = self.assemble_tiles(bodies, tiles, tile_w, tile_h, xs, ys, batch)
+        finally:
+            for body in bodies:
+                if isinstance(body, SpooledBody):
+                    body.close()
+
+        return (image_tensor,)
+
+    def assemble_tiles(self,
+                       bodies: List,
+                       tiles: List[Tuple[int, int, int]],
+                       tile_w: int,
+                       tile_h: int,
+                       xs: List[int],
+                       ys: List[int],
+                       batch: int) -> torch.Tensor:
+        """アップスケールしたタイルを重み付きで1枚のキャンバスへ合成
+
+        タイルは1枚ずつ再利用するバッファへデコードし、重みを掛けてキャンバスに加算する。
+        重みの合計は常に1になるため、重みの累積バッファや正規化の後処理は不要
+        """
+        # すべてのタイルは同じ入力サイズなので、出力サイズ（拡大率）も同じになる
+        sizes = {image_size(body) for body in bodies}
+        if len(sizes) > 1:
+            raise ValueError(f"アップスケール後のタイルのサイズが一致しません: {sorted(sizes)}")
+        out_tile_w, out_tile_h = sizes.pop()
+        scale_x = out_tile_w / tile_w
+        scale_y = out_tile_h / tile_h
+
+        # タイル位置を出力解像度に変換し、各軸の重みを作成
+        out_xs = [round(x * scale_x) for x in xs]
+        out_ys = [round(y * scale_y) for y in ys]
+        weights_x = feather_weights(out_xs, out_tile_w)
+        weights_y = feather_weights(out_ys, out_tile_h)
+
+        canvas = torch.zeros((batch, out_ys[-1] + out_tile_h, out_xs[-1] + out_tile_w, 3), dtype=torch.float32)
+        buffer = torch.empty((out_tile_h, out_tile_w, 3), dtype=torch.float32)
+        for body, (b, y, x) in zip(bodies, tiles):
+            decode_into(body, buffer)
+            ix, iy = xs.index(x), ys.index(y)
+            buffer.mul_(weights_y[iy].view(-1, 1, 1)).mul_(weights_x[ix].view(1, -1, 1))
+            top, left = out_ys[iy], out_xs[ix]
+            canvas[b, top:top + out_tile_h, left:left + out_tile_w].add_(buffer)
+
+        return canvas.clamp_(0.0, 1.0)
@@ -0,0 +1,222 @@
+import time
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future, InvalidStateError
+from typing import Optional, Dict, List
+
+from .config_manager import ConfigManager
+from .metrics import get_metrics
+
+_poller: Optional["GenerationPoller"] = None
+_poller_lock = threading.Lock()
+
+
+class CompletionStats:
+    """
+    Learned typical completion time per result endpoint
+
+    Completion times are tracked as an exponential moving average, keyed by the
+    endpoint without its generation ID (e.g. /v2beta/results).
+    """
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self._expected: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def expected(self, kind: str) -> Optional[float]:
+        """Get the typical completion time in seconds, or None if nothing was learned yet"""
+        with self._lock:
+            return self._expected.get(kind)
+
+    def record(self, kind: str, seconds: float) -> None:
+        """Record the completion time of a finished generation"""
+        with self._lock:
+            previous = self._expected.get(kind)
+            if previous is None:
+                self._expected[kind] = seconds
+            else:
+                self._expected[kind] = previous + self.alpha * (seconds - previous)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._expected)
+
+
+class _PollJob:
+    """State of one outstanding generation"""
+    def __init__(self, client, endpoint: str, headers: Dict[str, str], deadline: float, stream: bool):
+        self.client = client
+        self.endpoint = endpoint
+        self.kind = endpoint.rsplit("/", 1)[0]
+        self.headers = headers
+        self.deadline = deadline
+        self.stream = stream
+        self.started = time.monotonic()
+        self.polls = 0
+        self.future: Future = Future()
+
+
+class GenerationPoller:
+    """
+    Single background thread that polls every outstanding generation
+
+    Jobs are kept in a heap ordered by their next poll time. The poller thread
+    only schedules: each due poll is sent on the shared worker pool, and its
+    result either resolves the job's Future or schedules the next check.
+
+    The first check of a job happens shortly before the learned typical
+    completion time of its endpoint (or after `first_delay` while nothing has
+    been learned yet). Later checks start at `min_interval` and back off by
+    `backoff` up to `max_interval`.
+    """
+    def __init__(self,
+                 first_delay: float = 3.0,
+                 min_interval: float = 1.0,
+                 max_interval: float = 10.0,
+                 backoff: float = 1.5):
+        """Initialize the poller
+
+        Parameters:
+        -----------
+        first_delay : float
+            Seconds before the first check while no completion time has been learned
+        min_interval : float
+            Shortest interval between checks in seconds
+        max_interval : float
+            Longest interval between checks in seconds
+        backoff : float
+            Factor by which the interval grows after each unsuccessful check
+        """
+        self.first_delay = first_delay
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.completion_stats = CompletionStats()
+        self.total_polls = 0
+        self._stats_lock = threading.Lock()
+        self._heap: List = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="stability-poller", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls) -> "GenerationPoller":
+        """Create a poller from the [polling] section of config.ini"""
+        config = ConfigManager()
+        return cls(
+            first_delay=config.get_float("polling", "first_delay", 3.0),
+            min_interval=config.get_float("polling", "min_interval", 1.0),
+            max_interval=config.get_float("polling", "max_interval", 10.0),
+            backoff=config.get_float("polling", "backoff", 1.5),
+        )
+
+    def submit(self,
+               client,
+               endpoint: str,
+               headers: Optional[Dict[str, str]] = None,
+               timeout: float = 300.0,
+               stream: bool = False) -> Future:
+        """Start polling a generation result
+
+        Parameters:
+        -----------
+        client : StabilityAPIClient
+            Client used to send the polls
+        endpoint : str
+            Result endpoint, e.g. /v2beta/results/{id}
+        headers : dict, optional
+            Additional headers
+        timeout : float
+            Deadline in seconds from now
+        stream : bool
+            Request the final result as a streamed response
+
+        Returns:
+        --------
+        concurrent.futures.Future
+            Resolves to the first response with status 200, or fails with
+            TimeoutError once the deadline passes. Cancelling it stops polling.
+        """
+        job = _PollJob(client, endpoint, dict(headers or {}), time.monotonic() + timeout, stream)
+        expected = self.completion_stats.expected(job.kind)
+        first = self.first_delay if expected is None else max(self.min_interval, expected * 0.9)
+        self._schedule(job, first)
+        return job.future
+
+    def _next_interval(self, job: _PollJob) -> float:
+        return min(self.max_interval, self.min_interval * (self.backoff ** (job.polls - 1)))
+
+    def _schedule(self, job: _PollJob, delay: float) -> None:
+        now = time.monotonic()
+        if now >= job.deadline:
+            self._resolve(job, error=TimeoutError(
+                f"Generation did not finish within {job.deadline - job.started:.0f} seconds: {job.endpoint}"))
+            return
+        due = min(now + delay, job.deadline)
+        with self._condition:
+            heapq.heappush(self._heap, (due, next(self._counter), job))
+            self._condition.notify()
+
+    def _run(self) -> None:
+        from .async_client import get_executor
+
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+                _, _, job = heapq.heappop(self._heap)
+            if job.future.cancelled():
+                continue
+            get_executor().submit(self._poll, job)
+
+    def _resolve(self, job: _PollJob, response=None, error: Optional[BaseException] = None) -> None:
+        """Complete the job's Future unless the caller has cancelled it"""
+        metrics = get_metrics()
+        if metrics is not None:
+            metrics.record("poll", time.monotonic() - job.started, endpoint=job.endpoint, polls=job.polls,
+                           status=response.status_code if response is not None else None,
+                           error=type(error).__name__ if error is not None else None)
+        try:
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(response)
+        except InvalidStateError:
+            if response is not None:
+                response.close()
+
+    def _poll(self, job: _PollJob) -> None:
+        """Send one poll and resolve or reschedule the job"""
+        job.polls += 1
+        with self._stats_lock:
+            self.total_polls += 1
+        try:
+            response = job.client._make_request(
+                "GET", job.endpoint, headers=dict(job.headers), stream=job.stream)
+        except Exception as e:
+            self._resolve(job, error=e)
+            return
+
+        if response.status_code == 200:
+            self.completion_stats.record(job.kind, time.monotonic() - job.started)
+            self._resolve(job, response)
+        elif response.status_code == 202:
+            response.close()
+            if not job.future.cancelled():
+                self._schedule(job, self._next_interval(job))
+        else:
+            response.close()
+            self._resolve(job, error=Exception(f"Unexpected status code: {response.status_code}"))
+
+
+def get_poller() -> GenerationPoller:
+    """Get the process-wide generation poller, starting it on first use"""
+    global _poller
+    if _poller is None:
+        with _poller_lock:
+            if _poller is None:
+                _poller = GenerationPoller.from_config()
+    return _poller
@@ -0,0 +1,207 @@
+import os
+import re
+import hashlib
+import tempfile
+from typing import Any, Dict, Optional
+
+from .config_manager import ConfigManager
+from .model_3d import Model3D, to_model_3d
+
+PREVIEW_ROUTE = "/stability/preview"
+
+MIMETYPES = {
+    "glb": "model/gltf-binary",
+    "gltf": "model/gltf+json",
+    "obj": "model/obj",
+    "ply": "application/ply",
+}
+
+# Content-addressed names only: no path separators or other files can be requested.
+# Preview variants carry a digest of the settings they were built with.
+_NAME_PATTERN = re.compile(r"^[0-9a-f]{64}(\.preview-[0-9a-f]{8})?\.(glb|gltf|obj|ply)$")
+
+
+def preview_directory() -> str:
+    """Directory for preview files: stability-previews inside the ComfyUI temp directory
+
+    ComfyUI clears its temp directory on startup, so previews do not accumulate
+    across sessions. Outside ComfyUI the system temp directory is used.
+    """
+    try:
+        import folder_paths
+        base = folder_paths.get_temp_directory()
+    except ImportError:
+        base = os.path.join(tempfile.gettempdir(), "comfyui-stability-ai-api")
+    return os.path.join(base, "stability-previews")
+
+
+def get_preview_settings() -> Dict[str, Any]:
+    """Read the [preview] section of config.ini
+
+    - lightweight     : serve a reduced copy of GLB models to the viewer (default: true)
+    - max_texture     : longest texture side of the copy in pixels (default: 512, 0 keeps the size)
+    - texture_quality : JPEG quality of the copy's texture (default: 80)
+    - target_faces    : triangles of the copy (default: 0, geometry is not simplified)
+    """
+    config = ConfigManager()
+    return {
+        "lightweight": config.get_bool("preview", "lightweight", True),
+        "max_texture": max(0, config.get_int("preview", "max_texture", 512)),
+        "texture_quality": min(100, max(1, config.get_int("preview", "texture_quality", 80))),
+        "target_faces": max(0, config.get_int("preview", "target_faces", 0)),
+    }
+
+
+def _write_atomic(directory: str, name: str, data: bytes) -> None:
+    fd, partial = tempfile.mkstemp(prefix=f"{name}.", suffix=".part", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(partial, os.path.join(directory, name))
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+def publish_lightweight_preview(model: Model3D, settings: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Store a reduced copy of a GLB model for the viewer and return its URL
+
+    The base color texture is downscaled and re-encoded as JPEG, and the
+    geometry is optionally simplified. The copy is cached next to the full
+    model as <sha256>.preview-<settings digest>.glb, so it is built once per
+    model and settings. When the copy would not be smaller, an empty
+    <name>.skip marker records that, so the model is not processed again.
+    The model itself is not modified.
+
+    Returns:
+    --------
+    str or None
+        URL path of the copy, or None when the model is not a GLB or the
+        copy would not be smaller
+    """
+    from .mesh_processing import load_glb, decimate, resize_texture, to_glb
+
+    settings = settings or get_preview_settings()
+    if model.extension != "glb":
+        return None
+    # Decided from the JSON chunk, without parsing the geometry
+    info = model.info
+    if not info["textures"] and not 0 < settings["target_faces"] < info["face_count"]:
+        return None
+
+    digest = hashlib.sha256(repr(sorted(settings.items())).encode("utf-8")).hexdigest()[:8]
+    name = f"{model.sha256}.preview-{digest}.glb"
+    directory = preview_directory()
+    if os.path.exists(os.path.join(directory, name)):
+        return f"{PREVIEW_ROUTE}/{name}"
+    if os.path.exists(os.path.join(directory, f"{name}.skip")):
+        return None
+
+    mesh = load_glb(model.view())
+    mesh = decimate(mesh, settings["target_faces"])
+    mesh = resize_texture(mesh, settings["max_texture"], settings["texture_quality"])
+    data = to_glb(mesh)
+    os.makedirs(directory, exist_ok=True)
+    if len(data) >= model.size:
+        _write_atomic(directory, f"{name}.skip", b"")
+        return None
+
+    _write_atomic(directory, name, data)
+    return f"{PREVIEW_ROUTE}/{name}"
+
+
+def publish_preview(model: Model3D) -> str:
+    """Store a model for preview and return the URL it is served at
+
+    The file is named by the SHA-256 of its content, so previewing the same
+    model again reuses the existing file and the browser's cached copy.
+
+    Parameters:
+    -----------
+    model : Model3D
+        Model to preview
+
+    Returns:
+    --------
+    str
+        URL path relative to the ComfyUI API base, e.g. /stability/preview/<sha256>.glb
+    """
+    extension = model.extension
+    if extension not in MIMETYPES:
+        raise ValueError(f"Unsupported preview type: {extension}")
+
+    name = f"{model.sha256}.{extension}"
+    directory = preview_directory()
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        model.save(path)
+    return f"{PREVIEW_ROUTE}/{name}"
+
+
+def publish_model_preview(model_3d: Any) -> Dict[str, Any]:
+    """Publish a MODEL_3D value and build the preview event payload
+
+    The viewer loads `url`, which is the lightweight copy when one is
+    enabled and smaller than the model; `full_url` is the model itself.
+
+    Returns:
+    --------
+    dict
+        {"url", "model_type", "size", "full_url", "full_size"}: small enough for the websocket
+    """
+    model = to_model_3d(model_3d)
+    full_url = publish_preview(model)
+    payload = {
+        "url": full_url,
+        "model_type": model.extension,
+        "size": model.size,
+        "full_url": full_url,
+        "full_size": model.size,
+    }
+
+    settings = get_preview_settings()
+    if settings["lightweight"]:
+        try:
+            url = publish_lightweight_preview(model, settings)
+        except Exception as e:
+            # The full model can always be shown; a copy that fails to build is not an error
+            print(f"[comfyui-stability-ai-api] Lightweight preview failed, showing the full model: {e}")
+            url = None
+        if url is not None:
+            payload["url"] = url
+            payload["size"] = os.path.getsize(os.path.join(preview_directory(), url.rsplit("/", 1)[1]))
+    return payload
+
+
+def register_preview_route() -> bool:
+    """Serve published previews at /stability/preview/{name} on the ComfyUI server
+
+    Files are sent with aiohttp's FileResponse, which streams them from disk
+    and handles Range, ETag and If-None-Match / If-Modified-Since requests.
+    Since names are content hashes, responses are marked immutable.
+
+    Returns False outside ComfyUI.
+    """
+    try:
+        from aiohttp import web
+        from server import PromptServer
+    except ImportError:
+        return False
+    if getattr(PromptServer, "instance", None) is None:
+        return False
+
+    @PromptServer.instance.routes.get(PREVIEW_ROUTE + "/{name}")
+    async def stability_preview(request):
+        name = request.match_info["name"]
+        match = _NAME_PATTERN.match(name)
+        path = os.path.join(preview_directory(), name)
+        if match is None or not os.path.isfile(path):
+            return web.Response(status=404)
+        return web.FileResponse(path, headers={
+            "Content-Type": MIMETYPES[match.group(2)],
+            "Cache-Control": "public, max-age=31536000, immutable",
+        })
+
+    return True
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict
+
+from .config_manager import ConfigManager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_limiters: Dict[str, "TokenBucket"] = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the request rate of one API key
+    """
+    def __init__(self, rate: float, capacity: float):
+        """Initialize the bucket
+
+        Parameters:
+        -----------
+        rate : float
+            Tokens added per second (sustained requests per second)
+        capacity : float
+            Maximum number of tokens (largest allowed burst)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float) -> float:
+        """Try to take tokens, returning 0 on success or the seconds until enough are available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until tokens are available and take them
+
+        Parameters:
+        -----------
+        tokens : float
+            Number of tokens to take
+
+        Returns:
+        --------
+        float
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            delay = self._take(tokens)
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a locked file, shared by every process on the host
+
+    Several ComfyUI instances using the same API key draw from one bucket. The
+    file holds the token count and the wall-clock time of the last update.
+    """
+    def __init__(self, rate: float, capacity: float, path: str):
+        """Initialize the bucket
+
+        Parameters:
+        -----------
+        rate : float
+            Tokens added per second
+        capacity : float
+            Maximum number of tokens
+        path : str
+            State file (created if missing)
+        """
+        super().__init__(rate, capacity)
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    @contextmanager
+    def _locked_file(self):
+        with open(self.path, "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield f
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _take(self, tokens: float) -> float:
+        with self._lock, self._locked_file() as f:
+            f.seek(0)
+            try:
+                state = json.loads(f.read() or "{}")
+            except ValueError:
+                state = {}
+            now = time.time()
+            available = state.get("tokens", self.capacity)
+            updated = state.get("updated", now)
+            available = min(self.capacity, available + max(0.0, now - updated) * self.rate)
+
+            delay = 0.0
+            if available >= tokens:
+                available -= tokens
+            else:
+                delay = (tokens - available) / self.rate
+
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps({"tokens": available, "updated": now}))
+            f.flush()
+            return delay
+
+
+def get_rate_limiter(api_key: str) -> Optional[TokenBucket]:
+    """Get the rate limiter for an API key, or None if rate limiting is disabled
+
+    One bucket exists per API key and process, shared by all nodes. Configured
+    in the [rate_limit] section of config.ini:
+    - enabled             : enable client-side rate limiting (default: true)
+    - requests_per_second : sustained request rate (default: 14)
+    - burst               : bucket capacity (default: 20)
+    - shared              : share the bucket across processes via a lock file (default: false)
+    - state_directory     : directory for shared bucket files (default: system temp dir)
+
+    Parameters:
+    -----------
+    api_key : str
+        API key the requests are sent with
+
+    Returns:
+    --------
+    TokenBucket or None
+        Bucket to acquire a token from before each request
+    """
+    config = ConfigManager()
+    if not config.get_bool("rate_limit", "enabled", True):
+        return None
+
+    # Never keep or write the key itself
+    key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    limiter = _limiters.get(key_id)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key_id)
+            if limiter is None:
+                rate = max(0.01, config.get_float("rate_limit", "requests_per_second", 14.0))
+                capacity = max(1.0, config.get_float("rate_limit", "burst", 20.0))
+                if config.get_bool("rate_limit", "shared", False):
+                    directory = config.get_setting("rate_limit", "state_directory", "") or \
+                        os.path.join(tempfile.gettempdir(), "comfyui-stability-ai-api")
+                    limiter = SharedTokenBucket(rate, capacity, os.path.join(directory, f"{key_id}.bucket"))
+                else:
+                    limiter = TokenBucket(rate, capacity)
+                _limiters[key_id] = limiter
+    return limiter
@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Optional, Dict, Any, Tuple
+
+from .config_manager import ConfigManager
+
+# Synchronous endpoints whose output is fully determined by the request when a
+# non-zero seed is given (or which take no seed at all). Asynchronous endpoints
+# such as upscale/creative and image-to-video return a generation ID instead.
+CACHEABLE_ENDPOINT_PREFIXES = (
+    "/v2beta/stable-image/generate/",
+    "/v2beta/stable-image/upscale/fast",
+    "/v2beta/stable-image/upscale/conservative",
+    "/v2beta/stable-image/edit/",
+    "/v2beta/stable-image/control/",
+    "/v2beta/3d/",
+)
+
+# Seconds between sweeps of expired entries when the size limit is not reached
+SWEEP_INTERVAL = 3600
+# Fraction of max_bytes the cache is reduced to once it exceeds the limit,
+# so that the following writes do not each trigger a scan
+EVICT_TARGET = 0.9
+
+_cache: Optional["ResponseCache"] = None
+_cache_lock = threading.Lock()
+
+
+def _form_fields(data: Optional[Dict[str, Any]], files: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Collect plain form fields from both `data` and filename-less `files` parts"""
+    fields = {key: str(value) for key, value in (data or {}).items()}
+    for key, value in (files or {}).items():
+        if isinstance(value, tuple) and value[0] is None:
+            fields[key] = str(value[1])
+    return fields
+
+
+def is_cacheable(method: str,
+                 endpoint: str,
+                 data: Optional[Dict[str, Any]] = None,
+                 files: Optional[Dict[str, Any]] = None) -> bool:
+    """Check whether a request produces a reproducible response
+
+    Parameters:
+    -----------
+    method : str
+        HTTP method
+    endpoint : str
+        API endpoint
+    data : dict, optional
+        Form fields
+    files : dict, optional
+        Multipart parts
+
+    Returns:
+    --------
+    bool
+        True for POSTs to synchronous generation endpoints that either take no
+        seed or are given a non-zero seed (seed 0 asks the API for a random one)
+    """
+    if method.upper() != "POST" or not endpoint.startswith(CACHEABLE_ENDPOINT_PREFIXES):
+        return False
+    seed = _form_fields(data, files).get("seed")
+    if seed is None:
+        return True
+    try:
+        return int(float(seed)) != 0
+    except ValueError:
+        return False
+
+
+def request_fingerprint(method: str,
+                        endpoint: str,
+                        data: Optional[Dict[str, Any]] = None,
+                        files: Optional[Dict[str, Any]] = None,
+                        headers: Optional[Dict[str, str]] = None) -> str:
+    """Compute a content-addressed key for a request
+
+    The key covers the method, endpoint, normalized form fields, the Accept
+    header and a SHA-256 of every uploaded file. The API key is not part of
+    it; the client prefixes the key with a hash of the API key so results
+    are never shared between accounts.
+
+    Returns:
+    --------
+    str
+        Hex digest identifying the request
+    """
+    uploads = {}
+    for key, value in (files or {}).items():
+        if isinstance(value, tuple) and value[0] is not None:
+            content = value[1]
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            elif not isinstance(content, (bytes, bytearray, memoryview)):
+                content = content.read() if hasattr(content, "read") else bytes(content)
+            uploads[key] = hashlib.sha256(content).hexdigest()
+
+    accept = ""
+    for key, value in (headers or {}).items():
+        if key.lower() == "accept":
+            accept = value
+
+    payload = json.dumps({
+        "method": method.upper(),
+        "endpoint": endpoint,
+        "fields": _form_fields(data, files),
+        "uploads": uploads,
+        "accept": accept,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of API response bodies with TTL and LRU size-based eviction
+
+    Each entry is stored as <key>.bin (body) and <key>.json (status, headers,
+    creation time) under a two-character shard directory. The modification
+    time of the body file is refreshed on every hit and used as the LRU order.
+    The total size is scanned once and then kept as a running total, so the
+    directory is only walked when the limit is exceeded or expired entries
+    are swept (every SWEEP_INTERVAL seconds).
+    """
+    def __init__(self, directory: str, max_bytes: int, ttl: float):
+        """Initialize the cache
+
+        Parameters:
+        -----------
+        directory : str
+            Cache directory (created if missing)
+        max_bytes : int
+            Maximum total size of cached bodies
+        ttl : float
+            Entry lifetime in seconds
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Total size of the cached bodies, scanned on the first write
+        self._total: Optional[int] = None
+        self._last_sweep = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        shard = os.path.join(self.directory, key[:2])
+        return os.path.join(shard, f"{key}.bin"), os.path.join(shard, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """Look up an entry
+
+        Returns:
+        --------
+        tuple or None
+            (status_code, headers, body) if a fresh entry exists
+        """
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if time.time() - meta["created"] > self.ttl:
+                self._discard(key)
+                return None
+            with open(body_path, "rb") as f:
+                body = f.read()
+            os.utime(body_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return meta["status"], meta["headers"], body
+
+    def put(self, key: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        """Store an entry and evict old ones if the cache exceeds its size limit"""
+        if len(body) > self.max_bytes:
+            return
+        body_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(body_path + suffix, "wb") as f:
+            f.write(body)
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump({"status": status, "headers": headers, "created": time.time()}, f)
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._entries())
+            try:
+                replaced = os.path.getsize(body_path)
+            except OSError:
+                replaced = 0
+            os.replace(body_path + suffix, body_path)
+            os.replace(meta_path + suffix, meta_path)
+            self._total += len(body) - replaced
+            if self._total > self.max_bytes or time.monotonic() - self._last_sweep > SWEEP_INTERVAL:
+                self._evict()
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self._lock:
+            for entry in self._entries():
+                self._remove(entry[2])
+            self._total = 0
+
+    def _discard(self, key: str) -> None:
+        """Remove an entry and subtract it from the running total"""
+        with self._lock:
+            removed = self._remove(key)
+            if self._total is not None:
+                self._total = max(0, self._total - removed)
+
+    def _remove(self, key: str) -> int:
+        """Delete the files of an entry and return the size of its body"""
+        removed = 0
+        for path in self._paths(key):
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            if path.endswith(".bin"):
+                removed = size
+        return removed
+
+    def _entries(self):
+        """List (mtime, size, key) for every cached body"""
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".bin"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name[:-4]))
+        return entries
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones until the total
+        is under EVICT_TARGET of max_bytes (when it exceeds max_bytes)
+
+        Called with the lock held. The scan also resynchronizes the running
+        total with the directory (e.g. when another process shares it).
+        """
+        now = time.time()
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        limit = self.max_bytes * EVICT_TARGET if total > self.max_bytes else self.max_bytes
+        for mtime, size, key in entries:
+            if total <= limit and now - mtime <= self.ttl:
+                break
+            self._remove(key)
+            total -= size
+        self._total = total
+        self._last_sweep = time.monotonic()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the process-wide response cache, or None if caching is disabled
+
+    Configured in the [cache] section of config.ini:
+    - enabled     : opt-in switch (default: false)
+    - directory   : cache directory (default: ./cache next to this package)
+    - max_size_mb : maximum total size of cached bodies (default: 1024)
+    - ttl_hours   : entry lifetime (default: 168)
+    """
+    global _cache
+    config = ConfigManager()
+    if not config.get_bool("cache", "enabled", False):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                directory = config.get_setting("cache", "directory", "") or \
+                    os.path.join(os.path.dirname(__file__), "cache")
+                _cache = ResponseCache(
+                    directory,
+                    int(config.get_float("cache", "max_size_mb", 1024) * 1024 * 1024),
+                    config.get_float("cache", "ttl_hours", 168) * 3600,
+                )
+    return _cache
@@ -0,0 +1,217 @@
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple
+import requests
+
+from .config_manager import ConfigManager
+
+# Methods that can be repeated without side effects
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _parse_statuses(value: Optional[str], fallback: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Parse a comma separated list of status codes"""
+    if not value:
+        return fallback
+    try:
+        return tuple(int(item) for item in value.split(",") if item.strip())
+    except ValueError:
+        return fallback
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed API request is retried
+
+    Idempotent requests (GET result polls, balance checks) are retried on any
+    status in `retry_statuses` and on connection errors or timeouts. POSTs start
+    a paid generation, so they are only retried when the API guarantees the
+    request was not processed: statuses in `post_retry_statuses` (429 and 503
+    by default) and connection timeouts before anything was sent.
+    """
+    def __init__(self,
+                 enabled: bool = True,
+                 max_attempts: int = 5,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 30.0,
+                 max_elapsed: float = 120.0,
+                 retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504),
+                 post_retry_statuses: Tuple[int, ...] = (429, 503)):
+        """Initialize the policy
+
+        Parameters:
+        -----------
+        enabled : bool
+            Whether to retry at all
+        max_attempts : int
+            Maximum number of attempts, including the first one
+        backoff_base : float
+            Base delay in seconds for exponential backoff
+        backoff_max : float
+            Upper bound of a single backoff delay in seconds
+        max_elapsed : float
+            Total time budget in seconds after which no further retry is made
+        retry_statuses : tuple of int
+            Status codes retried for idempotent requests
+        post_retry_statuses : tuple of int
+            Status codes retried for POST requests
+        """
+        self.enabled = enabled
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_elapsed = max_elapsed
+        self.retry_statuses = retry_statuses
+        self.post_retry_statuses = post_retry_statuses
+
+    @classmethod
+    def from_config(cls) -> "RetryPolicy":
+        """Create a policy from the [retry] section of config.ini"""
+        config = ConfigManager()
+        default = cls()
+        return cls(
+            enabled=config.get_bool("retry", "enabled", default.enabled),
+            max_attempts=config.get_int("retry", "max_attempts", default.max_attempts),
+            backoff_base=config.get_float("retry", "backoff_base", default.backoff_base),
+            backoff_max=config.get_float("retry", "backoff_max", default.backoff_max),
+            max_elapsed=config.get_float("retry", "max_elapsed", default.max_elapsed),
+            retry_statuses=_parse_statuses(
+                config.get_setting("retry", "retry_statuses"), default.retry_statuses),
+            post_retry_statuses=_parse_statuses(
+                config.get_setting("retry", "post_retry_statuses"), default.post_retry_statuses),
+        )
+
+    def is_retryable(self,
+                     method: str,
+                     response: Optional[requests.Response] = None,
+                     error: Optional[Exception] = None) -> bool:
+        """Check whether a failed attempt may be repeated
+
+        Parameters:
+        -----------
+        method : str
+            HTTP method of the request
+        response : requests.Response, optional
+            Response with an error status
+        error : Exception, optional
+            Transport error raised instead of a response
+
+        Returns:
+        --------
+        bool
+            True if the request is safe to retry
+        """
+        if not self.enabled:
+            return False
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        if response is not None:
+            statuses = self.retry_statuses if idempotent else self.post_retry_statuses
+            return response.status_code in statuses
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if idempotent:
+            return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+        return False
+
+    def get_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Get the delay before the next attempt
+
+        A Retry-After header (seconds or HTTP date) takes precedence; otherwise
+        full-jitter exponential backoff is used.
+
+        Parameters:
+        -----------
+        attempt : int
+            Number of the attempt that just failed (1-based)
+        response : requests.Response, optional
+            Failed response, used for Retry-After
+
+        Returns:
+        --------
+        float
+            Delay in seconds
+        """
+        if response is not None:
+            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def next_delay(self,
+                   method: str,
+                   attempt: int,
+                   started: float,
+                   response: Optional[requests.Response] = None,
+                   error: Optional[Exception] = None) -> Optional[float]:
+        """Get the delay before retrying, or None if the request must not be retried
+
+        Parameters:
+        -----------
+        method : str
+            HTTP method
+        attempt : int
+            Number of the attempt that just failed (1-based)
+        started : float
+            time.monotonic() when the first attempt started
+        response : requests.Response, optional
+            Failed response
+        error : Exception, optional
+            Transport error
+
+        Returns:
+        --------
+        float or None
+            Seconds to wait before the next attempt
+        """
+        if attempt >= self.max_attempts or not self.is_retryable(method, response, error):
+            return None
+        delay = self.get_delay(attempt, response)
+        if time.monotonic() - started + delay > self.max_elapsed:
+            return None
+        return delay
+
+
+class RetryStats:
+    """Thread-safe counters of retried and abandoned requests for monitoring"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.gave_up = 0
+        self.retries_by_reason: Dict[str, int] = {}
+
+    def record_retry(self, reason: str) -> None:
+        """Record a retry caused by `reason` (status code or exception name)"""
+        with self._lock:
+            self.retries += 1
+            self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+
+    def record_give_up(self) -> None:
+        """Record a request that failed after its retries were exhausted"""
+        with self._lock:
+            self.gave_up += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of the current counters"""
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "gave_up": self.gave_up,
+                "retries_by_reason": dict(self.retries_by_reason),
+            }
+
+
+retry_stats = RetryStats()
@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, Tuple
+
+from .config_manager import ConfigManager
+
+_single_flight: Optional["SingleFlight"] = None
+_single_flight_lock = threading.Lock()
+
+
+class _Call:
+    """A running call and the number of callers waiting for it"""
+    def __init__(self):
+        self.future = Future()
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Deduplicate identical calls that are in flight at the same time
+
+    The first caller for a key runs the function; callers arriving with the
+    same key before it finishes wait for that call and receive the same
+    result (or exception). Once the call completes the key is released, so
+    later calls run again.
+    """
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self,
+           key: str,
+           func: Callable[[], Any],
+           retain: Optional[Callable[[Any, int], None]] = None) -> Tuple[Any, bool]:
+        """Run `func` once for all concurrent callers with the same key
+
+        Parameters:
+        -----------
+        key : str
+            Identity of the call
+        func : Callable
+            Function to run when no identical call is in flight
+        retain : Callable, optional
+            Called as retain(result, followers) with the number of other
+            callers before any of them receives the result, e.g. to add
+            references to a resource every caller releases
+
+        Returns:
+        --------
+        Tuple[Any, bool]
+            (result, shared) where shared is True when the result came from
+            another caller's call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                call.followers += 1
+                self.shared += 1
+
+        if not leader:
+            return call.future.result(), True
+
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            call.future.set_exception(e)
+            raise
+        # No caller can join once the key is released, so the follower count is final
+        with self._lock:
+            del self._calls[key]
+        if retain is not None and call.followers:
+            retain(result, call.followers)
+        call.future.set_result(result)
+        return result, False
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"executed": self.executed, "shared": self.shared, "in_flight": len(self._calls)}
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Get the process-wide SingleFlight, or None when [coalesce] enabled is false"""
+    global _single_flight
+    if not ConfigManager().get_bool("coalesce", "enabled", True):
+        return None
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
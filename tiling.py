@@ -0,0 +1,104 @@
+import math
+from typing import List, Tuple
+import torch
+
+
+def tile_starts(length: int, tile: int, overlap: int) -> List[int]:
+    """Compute evenly spaced tile start positions covering `length`
+
+    Every tile has the same size, so every tile is upscaled by the same
+    factor; the last tile ends exactly at the edge. Neighbouring tiles
+    overlap by at least `overlap` pixels.
+
+    Parameters:
+    -----------
+    length : int
+        Image size along the axis
+    tile : int
+        Tile size along the axis (clamped to `length`)
+    overlap : int
+        Minimum overlap between neighbouring tiles
+
+    Returns:
+    --------
+    List[int]
+        Start position of each tile
+    """
+    tile = min(tile, length)
+    if tile >= length:
+        return [0]
+    overlap = min(overlap, tile - 1)
+    count = math.ceil((length - overlap) / (tile - overlap))
+    return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: int,
+              max_aspect: float = 2.5) -> Tuple[int, int, List[int], List[int]]:
+    """Lay out a grid of equally sized tiles over an image
+
+    Parameters:
+    -----------
+    width, height : int
+        Image size
+    tile_size : int
+        Maximum tile width and height
+    overlap : int
+        Minimum overlap between neighbouring tiles
+    max_aspect : float
+        Maximum tile aspect ratio accepted by the endpoint
+
+    Returns:
+    --------
+    Tuple[int, int, List[int], List[int]]
+        (tile width, tile height, x starts, y starts)
+    """
+    tile_w = min(tile_size, width)
+    tile_h = min(tile_size, height)
+    # A thin image would give thin tiles; keep them within the accepted aspect ratio
+    tile_w = min(tile_w, int(tile_h * max_aspect))
+    tile_h = min(tile_h, int(tile_w * max_aspect))
+    return tile_w, tile_h, tile_starts(width, tile_w, overlap), tile_starts(height, tile_h, overlap)
+
+
+def feather_weights(starts: List[int], tile: int) -> List[torch.Tensor]:
+    """Build 1D blend weights for tiles along one axis
+
+    Each tile gets a linear ramp across the region it shares with each
+    neighbour and full weight elsewhere (including at the image edges).
+    The ramps are normalized by their sum, so the weights of all tiles
+    add up to exactly one at every position, even where three tiles
+    overlap. Because the 2D weight of a tile is the product of its x and
+    y weights, the 2D weights also sum to one and no per-pixel weight
+    accumulator is needed.
+
+    Parameters:
+    -----------
+    starts : List[int]
+        Start positions of the tiles (in output pixels)
+    tile : int
+        Tile size (in output pixels)
+
+    Returns:
+    --------
+    List[torch.Tensor]
+        float32 weights of length `tile` for each tile
+    """
+    ramps = []
+    for index, start in enumerate(starts):
+        ramp = torch.ones(tile, dtype=torch.float32)
+        if index > 0:
+            shared = starts[index - 1] + tile - start
+            if shared > 0:
+                rising = (torch.arange(shared, dtype=torch.float32) + 0.5) / shared
+                ramp[:shared] = torch.minimum(ramp[:shared], rising)
+        if index + 1 < len(starts):
+            shared = start + tile - starts[index + 1]
+            if shared > 0:
+                falling = (shared - 0.5 - torch.arange(shared, dtype=torch.float32)) / shared
+                ramp[tile - shared:] = torch.minimum(ramp[tile - shared:], falling)
+        ramps.append(ramp)
+
+    total = torch.zeros(starts[-1] + tile, dtype=torch.float32)
+    for start, ramp in zip(starts, ramps):
+        total[start:start + tile] += ramp
+    return [ramp / total[start:start + tile] for start, ramp in zip(starts, ramps)]
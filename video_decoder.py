@@ -0,0 +1,159 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Optional, Union
+import cv2
+import numpy as np
+import torch
+
+from .downloads import SpooledBody
+
+
+@contextmanager
+def video_path(video: Union[bytes, str, SpooledBody]):
+    """Expose video bytes as a path OpenCV can open
+
+    On Linux the bytes are placed in an anonymous in-memory file (memfd) and
+    opened through /proc/self/fd; elsewhere a uniquely named temporary file is
+    used. Either way concurrent decodes never share a file. A str argument is
+    treated as an existing path and passed through unchanged, as is the
+    temporary file of a SpooledBody that was spilled to disk.
+
+    Parameters:
+    -----------
+    video : bytes, str or SpooledBody
+        Encoded video, or a path to it
+
+    Yields:
+    -------
+    str
+        Path to the video
+    """
+    if isinstance(video, SpooledBody):
+        if video.path is not None:
+            video.finish()
+            yield video.path
+            return
+        video = video.view()
+
+    if isinstance(video, str):
+        yield video
+        return
+
+    if sys.platform.startswith("linux") and hasattr(os, "memfd_create"):
+        fd = os.memfd_create("stability-video")
+        try:
+            view = memoryview(video)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            yield f"/proc/self/fd/{fd}"
+        finally:
+            os.close(fd)
+        return
+
+    handle, path = tempfile.mkstemp(suffix=".mp4", prefix="stability-video-")
+    try:
+        with os.fdopen(handle, "wb") as f:
+            f.write(video)
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def decode_video(video: Union[bytes, str, SpooledBody],
+                 start_frame: int = 0,
+                 end_frame: Optional[int] = None,
+                 stride: int = 1,
+                 scale: float = 1.0) -> torch.Tensor:
+    """Decode a video into a float32 frame tensor [T,H,W,C] with values 0-1
+
+    Frames are decoded one at a time into a reused BGR buffer, converted to
+    RGB in a second reused buffer and written straight into a tensor that is
+    preallocated from the container's frame count. The full clip is never
+    held as a list of uint8 frames.
+
+    Only the selected frames are converted: frames outside the range or
+    between strides are grabbed without being retrieved, and downscaling
+    happens before the color conversion, so the cost follows the size of
+    the output rather than of the clip.
+
+    Parameters:
+    -----------
+    video : bytes, str or SpooledBody
+        Encoded video (e.g. MP4), or a path to it
+    start_frame : int
+        Index of the first frame to keep
+    end_frame : int, optional
+        Index after the last frame to keep (None: until the end)
+    stride : int
+        Keep every `stride`-th frame from `start_frame`
+    scale : float
+        Output size relative to the video (0 < scale <= 1)
+
+    Returns:
+    --------
+    torch.Tensor
+        Frames [T,H,W,3], float32 in the range 0-1
+    """
+    if start_frame < 0 or stride < 1:
+        raise ValueError(f"Invalid frame selection: start_frame={start_frame}, stride={stride}")
+    if not 0.0 < scale <= 1.0:
+        raise ValueError(f"scale must be in (0, 1]: {scale}")
+
+    with video_path(video) as path:
+        cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG)
+        if not cap.isOpened():
+            raise ValueError("Failed to open the video")
+        try:
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            out_width = max(1, round(width * scale))
+            out_height = max(1, round(height * scale))
+            resize = (out_width, out_height) != (width, height)
+
+            # The header count can be missing or slightly off; the buffer grows if needed
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            stop = end_frame if total <= 0 else min(total, end_frame if end_frame is not None else total)
+            capacity = max(1, len(range(start_frame, stop, stride))) if stop is not None else 1
+
+            frames = torch.empty((capacity, out_height, out_width, 3), dtype=torch.float32)
+            bgr = np.empty((height, width, 3), dtype=np.uint8)
+            small = np.empty((out_height, out_width, 3), dtype=np.uint8) if resize else bgr
+            rgb = np.empty((out_height, out_width, 3), dtype=np.uint8)
+            rgb_tensor = torch.from_numpy(rgb)
+
+            count = 0
+            index = -1
+            while end_frame is None or index + 1 < end_frame:
+                index += 1
+                if index < start_frame or (index - start_frame) % stride:
+                    # Advance the decoder without converting the frame
+                    if not cap.grab():
+                        break
+                    continue
+                ok, bgr = cap.read(bgr)
+                if not ok:
+                    break
+                if count == frames.shape[0]:
+                    grown = torch.empty((count * 2, out_height, out_width, 3), dtype=torch.float32)
+                    grown[:count].copy_(frames)
+                    frames = grown
+                if resize:
+                    cv2.resize(bgr, (out_width, out_height), dst=small, interpolation=cv2.INTER_AREA)
+                else:
+                    small = bgr
+                # Convert to RGB in the reused buffer, then to float32 inside the tensor slice
+                cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=rgb)
+                frames[count].copy_(rgb_tensor).div_(255.0)
+                count += 1
+        finally:
+            cap.release()
+
+    if count == 0:
+        raise ValueError("No frames in the selected range")
+    return frames[:count]